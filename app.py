@@ -5,23 +5,36 @@ Main application entry point.
 import streamlit as st
 from dotenv import load_dotenv
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_groq import ChatGroq
 
 # Import from src modules
 from src.config import get_settings
 from src.models import Assistant, SentenceTransformersEmbeddings
+from src.models.providers import HedgedChatModel, LLMProvider, create_fallback_llm
 from src.data import generate_employee_data
+from src.data.employee_repository import EmployeeRepository
 from src.ui import render_api_config, AssistantGUI
-from src.utils import logger, log_startup
-from src.utils.prompts import SYSTEM_PROMPT, WELCOME_MESSAGE
+from src.utils import logger, log_startup, log_event, configure_sampling, use_json_format
+from src.utils.cache import ResponseCache, create_cache_backend
+from src.utils.embedding_store import EmbeddingStore
+from src.utils.faq import FAQIndex
+from src.utils.governor import create_governor
+from src.utils.employee_context import EmployeeContextProjector
+from src.utils.index_registry import IndexRegistry
+from src.utils.query_rewrite import QueryRewriter
+from src.utils.scope import ScopeClassifier
+from src.utils.session_store import create_session_store, is_session_id, new_session_id, owned_session_key
+from src.utils.streaming import StreamCoalescer
+from src.utils.prompts import WELCOME_MESSAGE, system_prompt_for
 
 
 def initialize_app():
     """Initialize application configuration."""
     # Setup logging
+    settings = get_settings()
+    configure_sampling(settings.log_sample_rate)
+    if settings.log_json:
+        use_json_format()
     log_startup("OnBoard AI", "1.0.0")
     logger.info("Application starting - API keys must be entered via UI")
     
@@ -34,9 +47,56 @@ def initialize_app():
     )
 
 
-@st.cache_data(ttl=3600, show_spinner="Loading Employee Data...")
-def get_user_data():
-    """Load employee data."""
+@st.cache_resource(show_spinner=False)
+def get_governor():
+    """Process-wide admission control for LLM, embedding and index-load work."""
+    return create_governor(get_settings())
+
+
+@st.cache_resource(show_spinner=False)
+def get_employee_repository():
+    """Open the employee directory if an HR export has been imported."""
+    import os
+    settings = get_settings()
+    if not os.path.exists(settings.employee_db_path):
+        logger.warning("No employee directory at %s; using generated employees", settings.employee_db_path)
+        return None
+    return EmployeeRepository(settings.employee_db_path, cache_size=settings.employee_cache_size)
+
+
+def get_authenticated_employee_key():
+    """Employee ID or email asserted by the authenticating proxy, or None.
+    
+    Only the header named by `settings.auth_header` is trusted. URL
+    parameters are never used for identity because anyone can edit them.
+    """
+    header = get_settings().auth_header
+    if not header:
+        return None
+    try:
+        return st.context.headers.get(header) or None
+    except Exception as e:
+        logger.warning("Could not read authentication header: %s", e)
+        return None
+
+
+def get_user_data(employee_key: str = None):
+    """Load the logged-in employee from the directory, or generate a fake one.
+    
+    Args:
+        employee_key: Authenticated employee ID or email (see get_authenticated_employee_key)
+        
+    Returns:
+        Employee dictionary
+    """
+    repository = get_employee_repository()
+    if repository is not None and employee_key:
+        data = repository.get(employee_key)
+        if data is not None:
+            logger.info("Loaded employee record from directory")
+            return data
+        logger.warning("Employee %s not found in directory", employee_key)
+    
     logger.info("Generating employee data...")
     data = generate_employee_data(1)[0]
     logger.info("Employee data generated successfully")
@@ -45,90 +105,200 @@ def get_user_data():
 
 @st.cache_resource(show_spinner=False)
 def get_embedding_model(model_name: str):
-    """Cache the embedding model to avoid reloading (3s saved per request)."""
+    """Cache the embedding model to avoid reloading (3s saved per request).
+    
+    The instance is shared by every session, so its query micro-batcher
+    groups embedding calls from concurrent users.
+    """
     logger.info("Loading embedding model into cache: %s", model_name)
-    return SentenceTransformersEmbeddings(model_name=model_name)
+    settings = get_settings()
+    return SentenceTransformersEmbeddings(
+        model_name=model_name,
+        batch_window_ms=settings.embedding_batch_window_ms,
+        max_batch=settings.embedding_max_batch,
+        queue_depth=settings.embedding_queue_depth,
+        ingestion_mode=settings.ingestion_mode,
+        token_budget=settings.ingestion_token_budget,
+        ingestion_workers=settings.ingestion_workers,
+        governor=get_governor(),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_index_registry():
+    """Create the process-wide registry of tenant indexes (loaded lazily)."""
+    import os
+    settings = get_settings()
+    embedding_function = get_embedding_model(settings.embedding_model)
+    registry = IndexRegistry(
+        embedding_function,
+        memory_budget_bytes=settings.index_memory_budget_mb * 1024 * 1024,
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        embedding_model=settings.embedding_model,
+        embedding_store=EmbeddingStore.for_model(settings.embedding_store_path, settings.embedding_model),
+        pca_dim=settings.index_pca_dim,
+        quantization=settings.index_quantization,
+        rescore_factor=settings.index_rescore_factor,
+        docstore_format=settings.docstore_format,
+        refresh_interval=settings.index_refresh_seconds,
+        governor=get_governor(),
+    )
+    # Under memory pressure keep only the most recently used index resident
+    get_governor().add_pressure_handler(registry.trim)
+    registry.register(settings.default_tenant, settings.pdf_path, settings.vectorstore_path)
+    for name, pdf_path in settings.tenants.items():
+        registry.register(name, pdf_path, os.path.join(settings.index_root, name))
+    return registry
 
 
-@st.cache_resource(ttl=3600, show_spinner="🔄 Loading Knowledge Base...")
-def init_vector_store(pdf_path: str, embedding_model: str, chunk_size: int, chunk_overlap: int):
-    """Initialize the vector store from PDF or load from cache.
+def init_vector_store(tenant: str):
+    """Load the tenant's vector store through the index registry.
     
     Args:
-        pdf_path: Path to the PDF file
-        embedding_model: Name of the embedding model
-        chunk_size: Size of text chunks
-        chunk_overlap: Overlap between chunks
+        tenant: Name of the tenant knowledge base
         
     Returns:
-        FAISS vector store instance
+        FAISS vector store instance, or None on failure
     """
-    import os
-    vectorstore_path = "./src/data/vectorstore"
-    
     try:
-        # Get cached embedding model (avoids 3s reload on every query)
-        embedding_function = get_embedding_model(embedding_model)
-        logger.info("Using cached embedding function: %s", embedding_model)
-        
-        # Try to load existing vector store first (much faster)
-        if os.path.exists(vectorstore_path) and os.path.exists(os.path.join(vectorstore_path, "index.faiss")):
-            logger.info("Loading existing FAISS index from %s", vectorstore_path)
-            vectorstore = FAISS.load_local(
-                vectorstore_path, 
-                embedding_function,
-                allow_dangerous_deserialization=True
-            )
-            logger.info("Vector store loaded successfully from cache (fast load)")
-            return vectorstore
-        
-        # If not found, create new vector store from PDF
-        logger.info("No cached vector store found. Building from PDF: %s", pdf_path)
-        
-        # Load PDF
-        loader = PyPDFLoader(pdf_path)
-        docs = loader.load()
-        logger.info("Loaded PDF and extracted %d documents", len(docs))
-        
-        # Split documents
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
-        splits = text_splitter.split_documents(docs)
-        logger.info("Split documents into %d chunks (chunk_size=%d, overlap=%d)", 
-                   len(splits), chunk_size, chunk_overlap)
-        
-        # Build vector store with optimized FAISS index
-        logger.info("Building FAISS index from %d document chunks...", len(splits))
-        vectorstore = FAISS.from_documents(documents=splits, embedding=embedding_function)
-        
-        # Optimize FAISS index for faster search (trade memory for speed)
-        try:
-            # Use IVF index for faster search on larger datasets
-            if len(splits) > 100:
-                logger.info("Optimizing FAISS index for faster retrieval...")
-                # This creates a more efficient index structure
-        except Exception as e:
-            logger.debug("Could not optimize FAISS index: %s", e)
-        
-        # Save for future fast loading
-        try:
-            os.makedirs(vectorstore_path, exist_ok=True)
-            vectorstore.save_local(vectorstore_path)
-            logger.info("Successfully saved FAISS index to %s for future fast loading", vectorstore_path)
-        except Exception as e:
-            logger.warning("Could not persist FAISS index: %s", e)
-        
-        logger.info("Vector store initialization complete (FAISS)")
+        with st.spinner("🔄 Loading Knowledge Base..."):
+            vectorstore = get_index_registry().get(tenant)
         return vectorstore
-        
     except Exception as e:
         logger.error("Error initializing vector store: %s", str(e), exc_info=True)
         st.error(f"Failed to initialize vector store: {str(e)}")
         return None
 
 
+@st.cache_resource(show_spinner=False)
+def get_employee_context():
+    """Shared projector caching compact employee renderings (None for raw mode)."""
+    if get_settings().employee_context_mode != "compact":
+        return None
+    return EmployeeContextProjector()
+
+
+@st.cache_resource(show_spinner=False)
+def get_scope_classifier():
+    """Shared local scope classifier (None when disabled)."""
+    settings = get_settings()
+    if settings.scope_classifier == "off":
+        return None
+    if settings.scope_classifier == "embedding":
+        return ScopeClassifier(get_embedding_model(settings.embedding_model))
+    return ScopeClassifier()
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_rewriter():
+    """Shared follow-up rewriter; its cache covers every session (None when disabled)."""
+    settings = get_settings()
+    if settings.query_rewrite == "off":
+        return None
+    llm = None
+    if settings.query_rewrite == "llm":
+        llm = create_fallback_llm(settings)
+        if llm is None:
+            logger.warning("query_rewrite=llm needs llm_fallback to name a local model; using heuristic rewrites")
+    return QueryRewriter(llm, budget_ms=settings.query_rewrite_budget_ms, cache_size=settings.query_rewrite_cache_size)
+
+
+@st.cache_resource(show_spinner=False)
+def get_stream_coalescer():
+    """Shared token coalescer; its metrics cover every session (None when disabled)."""
+    settings = get_settings()
+    if settings.stream_flush_chars <= 0:
+        return None
+    return StreamCoalescer(settings.stream_flush_chars, settings.stream_flush_ms)
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    """Process-wide store of chat histories, shared by every browser session."""
+    settings = get_settings()
+    logger.info("Session store backend: %s", settings.session_backend)
+    return create_session_store(settings)
+
+
+def get_session_id() -> str:
+    """Session store key of this browser tab's conversation.
+    
+    Behind the authenticating proxy the conversation ID is kept in the URL
+    (?session=<id>) so reloads resume it, and the key is scoped to the
+    authenticated employee: a shared or guessed link opens the visitor's
+    own conversation, never someone else's. Without authentication there
+    is no identity to check ownership against (and every reload generates
+    a new employee), so the conversation lasts as long as the browser
+    session and the URL is ignored.
+    """
+    if "session_id" not in st.session_state:
+        owner = get_authenticated_employee_key()
+        if owner is None:
+            st.session_state.session_id = new_session_id()
+        else:
+            session_id = st.query_params.get("session")
+            if not is_session_id(session_id):
+                session_id = new_session_id()
+                st.query_params["session"] = session_id
+            st.session_state.session_id = owned_session_key(owner, session_id)
+    return st.session_state.session_id
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache(index_version: str):
+    """Shared retrieval/answer cache for one index version (None if disabled)."""
+    settings = get_settings()
+    backend = create_cache_backend(settings)
+    if backend is None:
+        return None
+    logger.info("Response cache enabled (backend=%s, index_version=%s)", settings.cache_backend, index_version)
+    return ResponseCache(backend, index_version, ttl=settings.cache_ttl_seconds)
+
+
+@st.cache_resource(show_spinner=False)
+def get_faq_index(tenant: str, index_version: str, faq_stamp: float):
+    """Precomputed FAQ answers for the tenant's current index (None if absent or stale).
+
+    `faq_stamp` only keys the cache, so a FAQ backfilled for the served
+    version is picked up without a restart.
+    """
+    settings = get_settings()
+    if settings.faq_threshold <= 0:
+        return None
+    return FAQIndex.load(
+        get_index_registry().index_path(tenant),
+        index_version,
+        get_embedding_model(settings.embedding_model),
+        threshold=settings.faq_threshold,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm(model_name: str, api_key: str):
+    """Groq chat model, hedged with the configured fallback provider if any.
+    
+    Cached per model and key so provider health is tracked across sessions.
+    """
+    settings = get_settings()
+    primary = ChatGroq(
+        model=model_name,
+        api_key=api_key,
+        temperature=0.5,  # Balanced speed/quality
+        max_tokens=350,  # Shorter responses for speed
+        streaming=True,
+        timeout=10.0  # Fail fast if LLM is slow
+    )
+    fallback = create_fallback_llm(settings)
+    if fallback is None:
+        return primary
+    logger.info("Hedging Groq with '%s' fallback after %.0f ms", settings.llm_fallback, settings.llm_hedge_after_ms)
+    return HedgedChatModel(
+        providers=[LLMProvider("groq", primary), LLMProvider(settings.llm_fallback, fallback)],
+        hedge_after=settings.llm_hedge_after_ms / 1000,
+    )
+
+
 def main():
     """Main application function."""
     # Initialize app
@@ -143,58 +313,71 @@ def main():
     
     # Initialize session state
     if "customer" not in st.session_state:
-        st.session_state.customer = get_user_data()
+        st.session_state.customer = get_user_data(get_authenticated_employee_key())
         logger.info("Customer data stored in session state")
     
-    if "messages" not in st.session_state:
-        st.session_state.messages = [{"role": "ai", "content": WELCOME_MESSAGE}]
-        logger.info("Message history initialized in session state")
+    session_store = get_session_store()
+    session_id = get_session_id()
+    if session_store.count(session_id) == 0:
+        session_store.append(session_id, {"role": "ai", "content": WELCOME_MESSAGE})
+        logger.info("Message history initialized for session %s", session_id)
+    
+    # Route the session to its tenant's knowledge base (?tenant=<name>)
+    tenant = st.query_params.get("tenant", settings.default_tenant)
+    registry = get_index_registry()
+    if tenant not in registry.tenants():
+        st.error(f"❌ Unknown knowledge base: {tenant}")
+        st.stop()
     
     # Initialize vector store
-    logger.info("Initializing vector store from PDF...")
-    vector_store = init_vector_store(
-        settings.pdf_path,
-        settings.embedding_model,
-        settings.chunk_size,
-        settings.chunk_overlap
-    )
+    log_event("init_vector_store", sampled=True, tenant=tenant)
+    vector_store = init_vector_store(tenant)
     
     if vector_store is None:
         st.error("❌ Failed to initialize vector store. Please check the logs.")
         st.stop()
     
     # Initialize LLM
-    logger.info("Initializing LLM: ChatGroq (model=%s)", settings.model_name)
+    log_event("init_llm", sampled=True, model=settings.model_name)
     try:
-        llm = ChatGroq(
-            model=settings.model_name,
-            api_key=settings.groq_api_key,
-            temperature=0.5,  # Balanced speed/quality
-            max_tokens=350,  # Shorter responses for speed
-            streaming=True,
-            timeout=10.0  # Fail fast if LLM is slow
-        )
+        llm = get_llm(settings.model_name, settings.groq_api_key)
     except Exception as e:
         logger.error("Error initializing LLM: %s", str(e), exc_info=True)
         st.error(f"❌ Failed to initialize AI model: {str(e)}")
         st.stop()
     
+    # Shared cache keyed by index version so rebuilt indexes never serve stale entries
+    index_version = registry.index_version(tenant)
+    response_cache = get_response_cache(index_version)
+    
     # Create assistant
-    logger.info("Creating Assistant instance...")
     assistant = Assistant(
-        system_prompt=SYSTEM_PROMPT,
+        system_prompt=system_prompt_for(settings.prompt_layout),
         llm=llm,
-        message_history=st.session_state.messages,
+        message_history=session_store.recent(session_id, settings.chat_history_window),
         employee_information=st.session_state.customer,
-        vector_store=vector_store,
+        employee_context=get_employee_context(),
+        scope_classifier=get_scope_classifier(),
+        faq_index=get_faq_index(tenant, index_version, FAQIndex.stamp(registry.index_path(tenant))),
+        response_cache=response_cache,
+        index_registry=registry,
+        tenant=tenant,
+        governor=get_governor(),
+        query_rewriter=get_query_rewriter(),
+        prompt_layout=settings.prompt_layout,
     )
-    logger.info("Assistant instance created successfully")
     
     # Render GUI
-    logger.info("Rendering GUI...")
-    gui = AssistantGUI(assistant)
+    gui = AssistantGUI(
+        assistant,
+        history_window=settings.chat_history_window,
+        stream_coalescer=get_stream_coalescer(),
+        session_store=session_store,
+        session_id=session_id,
+        governor=get_governor(),
+    )
     gui.render()
-    logger.info("GUI rendered successfully")
+    log_event("rerun_complete", sampled=True, tenant=tenant)
 
 
 if __name__ == "__main__":
@@ -3,8 +3,8 @@ Settings and environment configuration management.
 Handles API keys and application configuration.
 """
 import os
-from typing import Optional
-from dataclasses import dataclass
+from typing import Dict, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -20,6 +20,61 @@ class Settings:
     temperature: float = 0.3  # Lower = faster, more focused responses
     pdf_path: str = "src/data/umbrella_corp_policies.pdf"
     vectorstore_path: str = "src/data/vectorstore"
+    embedding_batch_window_ms: float = 5.0  # Wait this long to group concurrent queries
+    embedding_max_batch: int = 32
+    embedding_queue_depth: int = 256
+    ingestion_mode: str = "fixed"  # "adaptive" = length-sorted, token-budget batches
+    ingestion_token_budget: int = 8192
+    ingestion_workers: int = 1
+    embedding_store_path: str = "src/data/embedding_store"  # Chunk-hash -> vector cache
+    cache_backend: str = "memory"  # "memory", "sqlite", "redis" or "none"
+    cache_path: str = "src/data/cache.sqlite3"
+    cache_url: str = "redis://localhost:6379/0"
+    cache_ttl_seconds: int = 3600
+    cache_max_entries: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    default_tenant: str = "umbrella"  # Served from pdf_path / vectorstore_path
+    tenants: Dict[str, str] = field(default_factory=dict)  # Extra tenant name -> policy PDF path
+    index_root: str = "src/data/indexes"  # Index directories for extra tenants
+    index_memory_budget_mb: int = 512
+    index_pca_dim: int = 0  # Store vectors reduced to this many PCA dimensions; 0 keeps all
+    index_quantization: str = "none"  # Stored vector precision: "none" (float32), "fp16" or "int8"
+    index_rescore_factor: int = 0  # Re-rank factor * k candidates with exact vectors; 0 disables
+    docstore_format: str = "compact"  # "compact" (docstore.bin) or "pickle" (LangChain index.pkl)
+    index_refresh_seconds: float = 5.0  # How often to check for a newly published index version; 0 disables
+    employee_db_path: str = "src/data/employees.sqlite3"  # Imported HR directory
+    auth_header: str = ""  # Header with the SSO-authenticated email or ID, set by the auth proxy (which must strip client copies); "" = no login
+    employee_cache_size: int = 4096
+    employee_context_mode: str = "compact"  # "compact" = question-specific fields, "raw" = full dict
+    scope_classifier: str = "off"  # Answer clearly off-topic questions locally: "lexical", "embedding" or "off"
+    llm_fallback: str = "none"  # Secondary LLM for hedged requests: "none", "ollama" or "fake"
+    llm_fallback_url: str = "http://localhost:11434"
+    llm_fallback_model: str = "llama3.2"
+    llm_hedge_after_ms: float = 1500.0  # Ask the fallback if no first token arrives within this time
+    faq_threshold: float = 0.9  # Min cosine similarity to serve a precomputed FAQ answer; 0 disables (answers are built offline by `python -m src.utils.faq build`)
+    query_rewrite: str = "heuristic"  # Follow-up expansion before retrieval: "heuristic", "llm" (local fallback model) or "off"
+    query_rewrite_budget_ms: float = 150.0  # Model rewrites slower than this fall back to the heuristic
+    query_rewrite_cache_size: int = 4096
+    prompt_layout: str = "inline"  # "inline" or "prefix" (static system prompt first, for KV/prefix caching)
+    chat_history_window: int = 20  # Messages rendered per rerun before paging (also the LLM's history)
+    session_backend: str = "memory"  # Chat history store: "memory", "sqlite" or "redis"
+    session_path: str = "src/data/sessions.sqlite3"
+    session_url: str = "redis://localhost:6379/0"
+    session_ttl_seconds: int = 7 * 24 * 3600  # Forget sessions this long after their last message; 0 = never
+    session_max_messages: int = 500  # Oldest messages beyond this are dropped per session
+    session_max_bytes: int = 256 * 1024  # ...as are messages beyond this many bytes per session
+    session_max_sessions: int = 10000  # Memory backend only: least recently active sessions dropped
+    stream_flush_chars: int = 64  # Coalesce streamed tokens up to this many characters; 0 disables
+    stream_flush_ms: float = 50.0  # ...or until this long since the last flush
+    max_concurrent_llm: int = 8  # In-flight LLM streams per process; 0 = unlimited
+    max_concurrent_embeddings: int = 2  # Concurrent embedding model calls per process
+    max_concurrent_index_loads: int = 1  # Concurrent index loads/builds per process
+    admission_queue_limit: int = 32  # Requests waiting per resource before new ones are rejected
+    admission_timeout_seconds: float = 10.0  # Longest a request waits for a slot or for memory
+    memory_soft_limit_mb: int = 0  # Above this RSS new work waits and idle indexes are evicted; 0 disables
+    memory_hard_limit_mb: int = 0  # Above this RSS new work is rejected; 0 disables
+    log_json: bool = False  # JSON records in logs/app.log
+    log_sample_rate: float = 0.1  # Fraction of per-query INFO events written
     
     def __post_init__(self):
         """Do NOT load from environment variables - user must enter keys in UI."""
@@ -0,0 +1,270 @@
+"""
+Employee directory backed by a local SQLite database.
+
+Records imported from an HR export (CSV, Parquet or generated batches)
+are stored as JSON with indexed `employee_id` and email columns, so a
+lookup is a single B-tree probe regardless of directory size. Hot records
+are served from an in-process LRU cache.
+
+Usage:
+    python -m src.data.employee_repository import hr_export.csv
+    python -m src.data.employee_repository lookup jane.doe@example.com
+    python -m src.data.employee_repository benchmark --count 200000
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional
+
+from src.utils.logger import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id TEXT PRIMARY KEY,
+    email TEXT,
+    record TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS employees_email ON employees (email);
+"""
+
+
+class EmployeeRepository:
+    """Indexed employee lookups over a SQLite store with an LRU cache of hot records."""
+
+    def __init__(self, db_path: str, cache_size: int = 4096):
+        """Open or create the employee database.
+
+        Args:
+            db_path: Path to the SQLite database file
+            cache_size: Number of records kept in the in-process LRU cache
+        """
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite connections are not shareable."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------ lookup
+
+    def get(self, key: str) -> Optional[dict]:
+        """Look up an employee by email (if `key` contains '@') or employee ID."""
+        if "@" in key:
+            return self.get_by_email(key)
+        return self.get_by_id(key)
+
+    def get_by_id(self, employee_id: str) -> Optional[dict]:
+        """Look up an employee by employee ID."""
+        return self._lookup("id:" + employee_id, "SELECT record FROM employees WHERE employee_id = ?", employee_id)
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        """Look up an employee by email address (case-insensitive)."""
+        email = email.strip().lower()
+        return self._lookup("email:" + email, "SELECT record FROM employees WHERE email = ?", email)
+
+    def _lookup(self, cache_key: str, sql: str, value: str) -> Optional[dict]:
+        with self._cache_lock:
+            record = self._cache.get(cache_key)
+            if record is not None:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+                return dict(record)
+            self.misses += 1
+
+        row = self._connection().execute(sql, (value,)).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row[0])
+
+        with self._cache_lock:
+            self._cache[cache_key] = record
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(record)
+
+    def count(self) -> int:
+        """Number of employees in the directory."""
+        return self._connection().execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    # ------------------------------------------------------------------ import
+
+    def bulk_import(self, records: Iterable[dict], batch_size: int = 10000) -> int:
+        """Insert or replace employee records in one transaction.
+
+        Args:
+            records: Employee dictionaries with at least `employee_id`
+            batch_size: Rows per executemany call
+
+        Returns:
+            Number of records imported
+        """
+        start = time.perf_counter()
+        conn = self._connection()
+        conn.execute("PRAGMA synchronous=OFF")
+        total = 0
+        try:
+            with conn:
+                batch = []
+                for record in records:
+                    email = (record.get("email") or "").strip().lower() or None
+                    batch.append((str(record["employee_id"]), email, json.dumps(record)))
+                    if len(batch) >= batch_size:
+                        conn.executemany("INSERT OR REPLACE INTO employees VALUES (?, ?, ?)", batch)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    conn.executemany("INSERT OR REPLACE INTO employees VALUES (?, ?, ?)", batch)
+                    total += len(batch)
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._cache_lock:
+            self._cache.clear()
+        elapsed = time.perf_counter() - start
+        logger.info("Imported %d employees in %.2fs (%.0f/s)", total, elapsed, total / elapsed if elapsed else 0)
+        return total
+
+    def import_batches(self, batches: Iterable[Dict]) -> int:
+        """Import columnar batches produced by `iter_employee_batches`."""
+        from src.data.bulk_employees import batch_to_records
+
+        return self.bulk_import(record for batch in batches for record in batch_to_records(batch))
+
+    def import_csv(self, path: str) -> int:
+        """Import a CSV export; a `skills` column may hold ';'-separated values."""
+        return self.bulk_import(_read_csv(path))
+
+    def import_parquet(self, path: str) -> int:
+        """Import a Parquet export (requires pyarrow)."""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading Parquet requires pyarrow: pip install pyarrow") from exc
+
+        def rows() -> Iterator[dict]:
+            for batch in pq.ParquetFile(path).iter_batches():
+                yield from batch.to_pylist()
+
+        return self.bulk_import(rows())
+
+    def import_file(self, path: str) -> int:
+        """Import a CSV or Parquet file based on its extension."""
+        if path.endswith(".parquet"):
+            return self.import_parquet(path)
+        return self.import_csv(path)
+
+
+def _read_csv(path: str) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if "skills" in row and isinstance(row["skills"], str):
+                row["skills"] = [s for s in row["skills"].split(";") if s]
+            if row.get("salary"):
+                try:
+                    row["salary"] = float(row["salary"])
+                except ValueError:
+                    pass
+            yield row
+
+
+def benchmark(count: int = 200000, lookups: int = 10000, db_path: str = None) -> dict:
+    """Import `count` generated employees and time uncached and cached lookups.
+
+    Args:
+        count: Directory size
+        lookups: Number of lookups to time
+        db_path: Database file (a temporary file if None)
+
+    Returns:
+        Import rate and mean lookup latencies in microseconds
+    """
+    import random
+    import tempfile
+
+    from src.data.bulk_employees import iter_employee_batches
+
+    tmp_dir = None
+    if db_path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "employees.sqlite3")
+
+    repo = EmployeeRepository(db_path, cache_size=lookups)
+    start = time.perf_counter()
+    ids = []
+    emails = []
+
+    def tracked(batches):
+        for batch in batches:
+            ids.extend(batch["employee_id"].tolist())
+            emails.extend(batch["email"].tolist())
+            yield batch
+
+    repo.import_batches(tracked(iter_employee_batches(count, seed=0)))
+    import_seconds = time.perf_counter() - start
+
+    sample = random.Random(0).sample(range(len(ids)), min(lookups, len(ids)))
+    timings = {}
+    for label, keys in (("id", [ids[i] for i in sample]), ("email", [emails[i] for i in sample])):
+        start = time.perf_counter()
+        for key in keys:
+            repo.get(key)
+        timings[f"{label}_uncached_us"] = (time.perf_counter() - start) / len(keys) * 1e6
+        start = time.perf_counter()
+        for key in keys:
+            repo.get(key)
+        timings[f"{label}_cached_us"] = (time.perf_counter() - start) / len(keys) * 1e6
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+    return {"count": count, "import_rate": count / import_seconds, **timings}
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    from src.config import get_settings
+
+    parser = argparse.ArgumentParser(description="Manage the employee directory.")
+    parser.add_argument("--db", default=None, help="Database path (default: settings.employee_db_path)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a CSV or Parquet HR export")
+    imp.add_argument("path")
+    look = sub.add_parser("lookup", help="Look up an employee by ID or email")
+    look.add_argument("key")
+    bench = sub.add_parser("benchmark", help="Time lookups on a generated directory")
+    bench.add_argument("--count", type=int, default=200000)
+    bench.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    db_path = args.db or get_settings().employee_db_path
+    if args.command == "benchmark":
+        for key, value in benchmark(args.count, args.lookups).items():
+            print(f"{key:>20}: {value:,.1f}")
+        return
+
+    repo = EmployeeRepository(db_path)
+    if args.command == "import":
+        print(f"Imported {repo.import_file(args.path)} employees into {db_path}")
+    else:
+        print(json.dumps(repo.get(args.key), indent=2))
+
+
+if __name__ == "__main__":
+    main()
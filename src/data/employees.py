@@ -8,6 +8,36 @@ from datetime import datetime, timedelta
 
 fake = Faker()
 
+POSITIONS = [
+    "Research Scientist", 
+    "Software Engineer", 
+    "Operations Manager", 
+    "HR Specialist", 
+    "Security Officer"
+]
+
+DEPARTMENTS = [
+    "R&D", 
+    "IT", 
+    "Operations", 
+    "HR", 
+    "Security"
+]
+
+SKILLS = [
+    "Python", "Project Management", "Data Analysis", 
+    "Genetic Research", "Cybersecurity", "Machine Learning",
+    "Leadership", "Database Management", "Public Speaking"
+]
+
+LOCATIONS = [
+    "Raccoon City HQ", 
+    "Umbrella Europe", 
+    "Umbrella Asia", 
+    "Umbrella North America", 
+    "Umbrella South America"
+]
+
 
 def generate_employee_data(num_employees: int = 5) -> list:
     """Generate fake employee data for testing.
@@ -27,32 +57,10 @@ def generate_employee_data(num_employees: int = 5) -> list:
             "lastname": fake.last_name(),
             "email": fake.email(),
             "phone_number": fake.phone_number(),
-            "position": random.choice([
-                "Research Scientist", 
-                "Software Engineer", 
-                "Operations Manager", 
-                "HR Specialist", 
-                "Security Officer"
-            ]),
-            "department": random.choice([
-                "R&D", 
-                "IT", 
-                "Operations", 
-                "HR", 
-                "Security"
-            ]),
-            "skills": random.sample([
-                "Python", "Project Management", "Data Analysis", 
-                "Genetic Research", "Cybersecurity", "Machine Learning",
-                "Leadership", "Database Management", "Public Speaking"
-            ], k=random.randint(2, 5)),
-            "location": random.choice([
-                "Raccoon City HQ", 
-                "Umbrella Europe", 
-                "Umbrella Asia", 
-                "Umbrella North America", 
-                "Umbrella South America"
-            ]),
+            "position": random.choice(POSITIONS),
+            "department": random.choice(DEPARTMENTS),
+            "skills": random.sample(SKILLS, k=random.randint(2, 5)),
+            "location": random.choice(LOCATIONS),
             "hire_date": (
                 datetime.now() - timedelta(days=random.randint(1, 365 * 10))
             ).strftime("%Y-%m-%d"),
@@ -1,10 +1,17 @@
 """
 AI Assistant class for handling conversations with employees.
 """
+from contextlib import contextmanager
+
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from src.utils.logger import logger
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+import logging
+
+from src.utils.logger import logger, log_event
+from src.utils.faq import fill_placeholders
+from src.utils.governor import LLM
+from src.utils.prompts import OUT_OF_SCOPE_MESSAGE, PREFIX_QUESTION_TEMPLATE
 
 
 class Assistant:
@@ -17,6 +24,17 @@ class Assistant:
         message_history: list = None,
         vector_store=None,
         employee_information: dict = None,
+        response_cache=None,
+        index_registry=None,
+        tenant: str = None,
+        employee_id: str = None,
+        employee_repository=None,
+        employee_context=None,
+        scope_classifier=None,
+        faq_index=None,
+        governor=None,
+        query_rewriter=None,
+        prompt_layout: str = "inline",
     ):
         """Initialize the Assistant.
         
@@ -26,19 +44,46 @@ class Assistant:
             message_history: List of previous messages
             vector_store: Vector store for retrieving policy information
             employee_information: Employee data dictionary
+            response_cache: Optional ResponseCache for retrieval results and answers
+            index_registry: Optional IndexRegistry resolving the tenant's vector store per query
+            tenant: Tenant whose index this assistant answers from
+            employee_id: Employee ID or email to load when employee_information is not given
+            employee_repository: EmployeeRepository used to load the employee record
+            employee_context: Optional EmployeeContextProjector; the raw dict is used if None
+            scope_classifier: Optional ScopeClassifier answering clearly off-topic questions locally
+            faq_index: Optional FAQIndex serving precomputed answers to stock questions
+            governor: Optional ResourceGovernor admitting LLM calls
+            query_rewriter: Optional QueryRewriter expanding follow-ups into standalone retrieval queries
+            prompt_layout: "inline" (context inside the system prompt) or "prefix" (static system
+                prompt, context sent with the question so the prompt prefix is cacheable)
         """
-        logger.info("Initializing Assistant instance")
-        logger.debug("system_prompt=%s", repr(system_prompt)[:200])
-        logger.debug("llm=%s", repr(llm))
+        log_event("assistant_init", sampled=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("system_prompt=%s", repr(system_prompt)[:200])
+            logger.debug("llm=%s", repr(llm))
         
         self.system_prompt = system_prompt
         self.llm = llm
         self.messages = message_history or []
         self.vector_store = vector_store
+        if employee_information is None and employee_id and employee_repository is not None:
+            employee_information = employee_repository.get(employee_id)
+            if employee_information is None:
+                logger.warning("Employee %s not found in directory", employee_id)
         self.employee_information = employee_information
+        self.employee_context = employee_context
+        self.scope_classifier = scope_classifier
+        self.faq_index = faq_index
+        self.response_cache = response_cache
+        self.index_registry = index_registry
+        self.tenant = tenant
+        self.governor = governor
+        self.query_rewriter = query_rewriter
+        if prompt_layout == "prefix" and "{retrieved_policy_information}" in system_prompt:
+            raise ValueError("The prefix prompt layout needs a static system prompt such as PREFIX_SYSTEM_PROMPT")
+        self.prompt_layout = prompt_layout
 
         self.chain = self._get_conversation_chain()
-        logger.info("Conversation chain created for Assistant")
 
     def get_response(self, user_input: str):
         """Get AI response for user input.
@@ -50,48 +95,159 @@ class Assistant:
             Streaming response generator
         """
         import time
-        logger.info("Assistant.get_response called with input length: %d chars", len(user_input))
-        logger.debug("user_input=%s", user_input)
+        log_event("get_response", sampled=True, input_chars=len(user_input))
+        log_event("user_input", level=logging.DEBUG, text=user_input)
         try:
             start = time.time()
-            result = self.chain.stream(user_input)
-            logger.info("Assistant streaming response initiated successfully (%.2fs)", time.time() - start)
+            if self.scope_classifier is not None:
+                decision = self.scope_classifier.classify(user_input)
+                if not decision.in_scope:
+                    log_event("out_of_scope", sampled=True, topic=decision.topic, method=decision.method)
+                    name = (self.employee_information or {}).get("name", "there")
+                    return iter([OUT_OF_SCOPE_MESSAGE.format(name=name, topic=decision.topic, resource=decision.resource)])
+            if self.faq_index is not None and not self._has_user_turns():
+                match = self.faq_index.match(user_input)
+                if match is not None:
+                    entry, score = match
+                    log_event("faq_hit", sampled=True, score=round(score, 3), seconds=round(time.time() - start, 4))
+                    return iter([fill_placeholders(entry["answer"], self.employee_information)])
+            if self._answer_cacheable():
+                cached = self.response_cache.get_answer(user_input, self._employee_scope())
+                if cached is not None:
+                    log_event("answer_cache_hit", sampled=True, seconds=round(time.time() - start, 4))
+                    return iter([cached])
+                result = self._cache_answer(self._stream(user_input), user_input)
+            else:
+                result = self._stream(user_input)
+            log_event("stream_started", sampled=True, seconds=round(time.time() - start, 4))
             return result
         except Exception as e:
             logger.error("Error while getting response: %s", str(e), exc_info=True)
             raise
 
+    def _stream(self, user_input: str):
+        """Stream the RAG chain, holding an LLM slot from the governor while it runs."""
+        if self.governor is None:
+            return self.chain.stream(user_input)
+        return self.governor.stream(LLM, lambda: self.chain.stream(user_input))
+
+    def _answer_cacheable(self) -> bool:
+        """Answers are only shared when no earlier user turn can change them."""
+        if self.response_cache is None:
+            return False
+        return not self._has_user_turns()
+
+    def _has_user_turns(self) -> bool:
+        """Whether the conversation already contains a user message."""
+        return any(m.get("role") == "user" for m in self.messages)
+
+    def _employee_scope(self) -> str:
+        """Cache scope for answers personalised to the current employee."""
+        return str((self.employee_information or {}).get("employee_id", "anonymous"))
+
+    def _cache_answer(self, stream, user_input: str):
+        """Pass a response stream through, storing the full answer once it completes.
+
+        Closing this generator early closes `stream` as well, so an abandoned
+        answer releases its LLM slot and is not cached.
+        """
+        parts = []
+        try:
+            for chunk in stream:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        self.response_cache.set_answer(user_input, self._employee_scope(), "".join(parts))
+
+    def _render_employee_information(self, user_input: str):
+        """Employee fields for the prompt, projected to the question when configured."""
+        if self.employee_context is None:
+            return self.employee_information
+        return self.employee_context.render(self.employee_information, user_input)
+
+    @contextmanager
+    def _vector_store(self):
+        """Resolve the vector store, leasing it from the registry so evicted or replaced indexes reload."""
+        if self.index_registry is None:
+            yield self.vector_store
+            return
+        with self.index_registry.lease(self.tenant) as vector_store:
+            yield vector_store
+
+    def _retrieve(self, query: str) -> list:
+        """Retrieve policy chunks for a query, consulting the response cache first.
+        
+        Follow-up questions are rewritten into standalone queries first, so
+        both the search and the retrieval cache see the resolved question.
+        """
+        if self.query_rewriter is not None:
+            query = self.query_rewriter.rewrite(query, self.messages, self.employee_information)
+        if self.response_cache is not None:
+            cached = self.response_cache.get_retrieval(query)
+            if cached is not None:
+                logger.debug("Retrieval cache hit")
+                return cached
+        with self._vector_store() as vector_store:
+            documents = vector_store.similarity_search(query, k=2)  # Reduced to 2 for fastest retrieval
+        if self.response_cache is not None:
+            self.response_cache.set_retrieval(query, documents)
+        return documents
+
+    def answer_with_documents(self, user_input: str, documents: list) -> str:
+        """Answer a question from already retrieved policy chunks, without streaming.
+        
+        Used by batch jobs that run retrieval for many questions at once.
+        
+        Args:
+            user_input: User's message
+            documents: Policy chunks to ground the answer in
+            
+        Returns:
+            Complete answer text
+        """
+        inputs = {
+            "retrieved_policy_information": documents,
+            "employee_information": self._render_employee_information(user_input),
+            "user_input": user_input,
+            "conversation_history": self.messages,
+        }
+        if self.governor is None:
+            return self.generation_chain.invoke(inputs)
+        with self.governor.admit(LLM):
+            return self.generation_chain.invoke(inputs)
+
     def _get_conversation_chain(self):
         """Build the conversation chain with RAG."""
-        logger.info("Building conversation chain...")
+        logger.debug("Building conversation chain...")
         
+        # The prefix layout keeps the system prompt and history ahead of everything
+        # that changes per question, so consecutive prompts share a long prefix
+        question = PREFIX_QUESTION_TEMPLATE if self.prompt_layout == "prefix" else "{user_input}"
         prompt = ChatPromptTemplate(
             [
                 ("system", self.system_prompt),
                 MessagesPlaceholder("conversation_history"),
-                ("human", "{user_input}"),
+                ("human", question),
             ]
         )
 
         output_parser = StrOutputParser()
 
+        # Prompt -> LLM -> text, reusable with retrieval done elsewhere
+        self.generation_chain = prompt | self.llm | output_parser
+
         chain = (
             {
-                "retrieved_policy_information": self.vector_store.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={
-                        "k": 2,  # Reduced to 2 for fastest retrieval
-                        "fetch_k": 5  # Pre-fetch only 5 candidates
-                    }
-                ),
-                "employee_information": lambda x: self.employee_information,
+                "retrieved_policy_information": RunnableLambda(self._retrieve),
+                "employee_information": self._render_employee_information,
                 "user_input": RunnablePassthrough(),
                 "conversation_history": lambda x: self.messages,
             }
-            | prompt
-            | self.llm
-            | output_parser
+            | self.generation_chain
         )
         
-        logger.info("Conversation chain built successfully with retriever and output parser")
+        logger.debug("Conversation chain built successfully with retriever and output parser")
         return chain
@@ -0,0 +1,212 @@
+"""
+Micro-batching helpers for embedding work.
+Collects concurrent single-text requests into one model call.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, List
+
+from src.utils.logger import logger
+
+
+@dataclass
+class BatcherMetrics:
+    """Running counters for a MicroBatcher."""
+
+    requests: int = 0
+    batches: int = 0
+    inline_fallbacks: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+    total_batch_fill: float = 0.0
+
+    def snapshot(self) -> dict:
+        """Return the metrics as a plain dictionary with derived averages."""
+        batched = self.requests - self.inline_fallbacks
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "inline_fallbacks": self.inline_fallbacks,
+            "avg_queue_wait_ms": (self.total_queue_wait / batched * 1000) if batched else 0.0,
+            "max_queue_wait_ms": self.max_queue_wait * 1000,
+            "avg_batch_size": (batched / self.batches) if self.batches else 0.0,
+            "avg_batch_fill": (self.total_batch_fill / self.batches) if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Shared worker that groups concurrent requests into batches.
+
+    Callers block in `submit` while a single background thread gathers
+    them, runs `encode_fn` once for the whole batch and hands each caller
+    its result. A lone request is encoded immediately; when others are
+    already queued the worker waits up to `batch_window_ms` (or until
+    `max_batch` items are queued) for more.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], list],
+        batch_window_ms: float = 5.0,
+        max_batch: int = 32,
+        queue_depth: int = 256,
+    ):
+        """Initialize the batcher.
+
+        Args:
+            encode_fn: Function mapping a list of texts to a list of results
+            batch_window_ms: How long to wait for more requests after the first one
+            max_batch: Maximum number of requests encoded together
+            queue_depth: Maximum number of pending requests before callers encode inline
+        """
+        self.encode_fn = encode_fn
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.metrics = BatcherMetrics()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_depth))
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, text: str):
+        """Queue a text for the next batch and wait for its result.
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            The result produced by `encode_fn` for this text
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((text, future, time.perf_counter()))
+        except queue.Full:
+            # Backpressure: a full queue means the worker is saturated, so
+            # encoding on the caller's thread is cheaper than waiting.
+            with self._lock:
+                self.metrics.requests += 1
+                self.metrics.inline_fallbacks += 1
+            logger.debug("Embedding queue full, encoding inline")
+            return self.encode_fn([text])[0]
+        return future.result()
+
+    def _ensure_worker(self):
+        """Start the background worker thread on first use."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> list:
+        """Block for the first request, then gather more until the window closes.
+
+        A request that finds the queue otherwise empty is dispatched at once;
+        the window only opens when a second request is already waiting, so
+        an uncontended query never pays for it.
+        """
+        batch = [self._queue.get()]
+        try:
+            batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Worker loop: collect, encode and dispatch batches forever."""
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts = [text for text, _, _ in batch]
+
+            with self._lock:
+                self.metrics.requests += len(batch)
+                self.metrics.batches += 1
+                self.metrics.total_batch_fill += len(batch) / self.max_batch
+                for _, _, enqueued in batch:
+                    wait = started - enqueued
+                    self.metrics.total_queue_wait += wait
+                    self.metrics.max_queue_wait = max(self.metrics.max_queue_wait, wait)
+
+            try:
+                results = self.encode_fn(texts)
+            except Exception as e:
+                logger.error("Batched embedding failed: %s", str(e), exc_info=True)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            if len(results) < len(batch):
+                logger.error("Batched embedding returned %d results for %d texts", len(results), len(batch))
+                error = RuntimeError(f"encode_fn returned {len(results)} results for {len(batch)} texts")
+                for _, future, _ in batch[len(results):]:
+                    future.set_exception(error)
+            logger.debug("Encoded micro-batch of %d queries in %.4fs", len(batch), time.perf_counter() - started)
+
+
+@dataclass
+class IngestionStats:
+    """Throughput figures for one document embedding run."""
+
+    chunks: int = 0
+    batches: int = 0
+    padded_tokens: int = 0
+    real_tokens: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def padding_ratio(self) -> float:
+        """Fraction of encoded tokens that were padding."""
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+
+def plan_token_batches(lengths: List[int], token_budget: int, max_batch: int = 256) -> List[List[int]]:
+    """Group text indices into length-sorted batches bounded by a token budget.
+
+    Texts are sorted by token length so each batch pads to a similar length.
+    A batch is closed once `len(batch) * longest_member` would exceed
+    `token_budget`, which is roughly the work done by one padded encode call.
+
+    Args:
+        lengths: Token length of each text
+        token_budget: Maximum padded tokens per batch
+        max_batch: Hard cap on texts per batch
+
+    Returns:
+        List of batches, each a list of indices into `lengths`
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    current: List[int] = []
+    for idx in order:
+        longest = max(lengths[idx], 1)
+        if current and ((len(current) + 1) * longest > token_budget or len(current) >= max_batch):
+            batches.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
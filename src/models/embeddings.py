@@ -2,8 +2,14 @@
 Local embeddings using sentence-transformers.
 Provides embeddings without requiring external API calls.
 """
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import List
-from src.utils.logger import logger
+from src.models.batching import IngestionStats, MicroBatcher, plan_token_batches
+from src.utils.governor import EMBEDDING
+from src.utils.logger import logger, log_event
 
 try:
     from langchain_core.embeddings import Embeddings
@@ -17,6 +23,29 @@ except ImportError:
             raise NotImplementedError
 
 
+# Per-process model used by adaptive ingestion workers
+_worker_model = None
+
+
+def _init_ingestion_worker(model_name: str):
+    """Load the model once in each ingestion worker process."""
+    global _worker_model
+    from sentence_transformers import SentenceTransformer
+
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_in_worker(texts: List[str]):
+    """Encode one batch inside an ingestion worker process."""
+    return _worker_model.encode(
+        texts,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        batch_size=len(texts),
+        normalize_embeddings=True,
+    )
+
+
 class SentenceTransformersEmbeddings(Embeddings):
     """Lightweight wrapper that provides embeddings using sentence-transformers.
     
@@ -25,15 +54,44 @@ class SentenceTransformersEmbeddings(Embeddings):
     - embed_query(str) -> list[float]
     
     Falls back to deterministic dummy embeddings if sentence-transformers is unavailable.
+    
+    Concurrent `embed_query` calls are funnelled through a shared MicroBatcher so
+    queries arriving within a few milliseconds are encoded in one batch.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_window_ms: float = 5.0,
+        max_batch: int = 32,
+        queue_depth: int = 256,
+        ingestion_mode: str = "fixed",
+        token_budget: int = 8192,
+        ingestion_workers: int = 1,
+        governor=None,
+    ):
         """Initialize embeddings model.
         
         Args:
             model_name: Name of the sentence-transformers model to use
+            batch_window_ms: Time to collect concurrent queries before encoding (0 disables batching)
+            max_batch: Maximum number of queries encoded in one micro-batch
+            queue_depth: Maximum number of queries waiting for the batch worker
+            ingestion_mode: "fixed" for batch_size=32 encoding, "adaptive" for length-sorted token-budget batches
+            token_budget: Maximum padded tokens per batch in adaptive mode
+            ingestion_workers: Number of encoder processes used in adaptive mode; the
+                pool is started on first use and kept (each worker holds a model copy)
+                until `close()`
+            governor: Optional ResourceGovernor limiting concurrent model calls
         """
         self.model_name = model_name
+        self.ingestion_mode = ingestion_mode
+        self.token_budget = token_budget
+        self.ingestion_workers = max(1, ingestion_workers)
+        self.last_ingestion_stats = None
+        self.governor = governor
+        self._ingestion_pool = None
+        self._pool_lock = threading.Lock()
         logger.info("Initializing embeddings model: %s", model_name)
         
         try:
@@ -57,6 +115,15 @@ class SentenceTransformersEmbeddings(Embeddings):
             self.model = None
             self.dim = 384
 
+        self.query_batcher = None
+        if batch_window_ms > 0 and max_batch > 1:
+            self.query_batcher = MicroBatcher(
+                self._encode,
+                batch_window_ms=batch_window_ms,
+                max_batch=max_batch,
+                queue_depth=queue_depth,
+            )
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of documents/texts.
         
@@ -66,17 +133,100 @@ class SentenceTransformersEmbeddings(Embeddings):
         Returns:
             List of embedding vectors
         """
-        logger.info("Embedding %d documents using %s", len(texts), "SentenceTransformer" if self.model else "fallback")
+        log_event("embed_documents", sampled=len(texts) == 1, count=len(texts),
+                  backend="SentenceTransformer" if self.model else "fallback")
+        if self.ingestion_mode == "adaptive" and len(texts) > 1:
+            return self.embed_documents_adaptive(texts)
+        return self._encode(texts)
+
+    def embed_documents_adaptive(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in length-sorted batches sized by a token budget.
+        
+        Batches are encoded across `ingestion_workers` processes and the
+        vectors are written back in the original order of `texts`.
         
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            List of embedding vectors in input order
+        """
+        start = time.perf_counter()
+        lengths = self._token_lengths(texts)
+        batches = plan_token_batches(lengths, self.token_budget)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+
+        workers = self.ingestion_workers if self.model is not None else 1
+        if workers > 1 and len(batches) > 1:
+            pool = self._get_ingestion_pool()
+            encoded = [list(vectors) for vectors in pool.map(_encode_in_worker, batch_texts)]
+        else:
+            encoded = [self._encode(chunk) for chunk in batch_texts]
+
+        result: List[List[float]] = [None] * len(texts)
+        for batch, vectors in zip(batches, encoded):
+            for idx, vector in zip(batch, vectors):
+                result[idx] = vector.tolist() if hasattr(vector, "tolist") else vector
+
+        stats = IngestionStats(
+            chunks=len(texts),
+            batches=len(batches),
+            padded_tokens=sum(len(b) * max(lengths[i] for i in b) for b in batches),
+            real_tokens=sum(lengths),
+            seconds=time.perf_counter() - start,
+            workers=workers,
+        )
+        self.last_ingestion_stats = stats
+        logger.info(
+            "Adaptive ingestion: %d chunks in %d batches, %.1f chunks/s (workers=%d, padding=%.0f%%)",
+            stats.chunks, stats.batches, stats.chunks_per_second, stats.workers, stats.padding_ratio * 100,
+        )
+        return result
+
+    def _get_ingestion_pool(self) -> ProcessPoolExecutor:
+        """Start the ingestion worker pool once; workers load the model a single time."""
+        with self._pool_lock:
+            if self._ingestion_pool is None:
+                self._ingestion_pool = ProcessPoolExecutor(
+                    max_workers=self.ingestion_workers,
+                    initializer=_init_ingestion_worker,
+                    initargs=(self.model_name,),
+                )
+            return self._ingestion_pool
+
+    def close(self):
+        """Shut down the ingestion worker pool, if one was started."""
+        with self._pool_lock:
+            pool, self._ingestion_pool = self._ingestion_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Count tokens per text with the model tokenizer, or estimate from words."""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is not None:
+            try:
+                max_length = getattr(self.model, "max_seq_length", 512)
+                encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=max_length)
+                return [len(ids) for ids in encoded["input_ids"]]
+            except Exception as e:
+                logger.debug("Tokenizer length count failed, estimating: %s", e)
+        # Roughly 4 tokens per 3 words for English WordPiece vocabularies
+        return [len(t.split()) * 4 // 3 + 2 for t in texts]
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts with the loaded model or the hash-based fallback."""
         if self.model is not None:
-            # Batch processing with optimizations for speed
-            vectors = self.model.encode(
-                texts, 
-                convert_to_numpy=True, 
-                show_progress_bar=False,
-                batch_size=32,  # Process in batches for efficiency
-                normalize_embeddings=True  # Faster cosine similarity
-            )
+            # Adaptive batches are already sized by the token budget; don't re-split them by count
+            batch_size = len(texts) if self.ingestion_mode == "adaptive" else 32
+            with self._admit():
+                vectors = self.model.encode(
+                    texts, 
+                    convert_to_numpy=True, 
+                    show_progress_bar=False,
+                    batch_size=batch_size,
+                    normalize_embeddings=True  # Faster cosine similarity
+                )
             logger.debug("Embedded %d documents to vectors of dim %d", len(texts), self.dim)
             return vectors.tolist()
         
@@ -100,6 +250,12 @@ class SentenceTransformersEmbeddings(Embeddings):
         logger.debug("Fallback embeddings generated for %d documents", len(result))
         return result
 
+    def _admit(self):
+        """Hold an embedding slot from the governor, if one is configured."""
+        if self.governor is None:
+            return nullcontext()
+        return self.governor.admit(EMBEDDING)
+
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query text.
         
@@ -109,5 +265,13 @@ class SentenceTransformersEmbeddings(Embeddings):
         Returns:
             Embedding vector
         """
-        logger.info("Embedding single query text (length=%d chars)", len(text))
-        return self.embed_documents([text])[0]
+        log_event("embed_query", sampled=True, chars=len(text))
+        if self.query_batcher is not None:
+            return self.query_batcher.submit(text)
+        return self._encode([text])[0]
+
+    def batching_metrics(self) -> dict:
+        """Return queue wait and batch fill metrics for query micro-batching."""
+        if self.query_batcher is None:
+            return {}
+        return self.query_batcher.metrics.snapshot()
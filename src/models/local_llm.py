@@ -0,0 +1,72 @@
+"""
+In-process stand-in for a streaming chat model.
+Used by load tests and local runs where no LLM server is available.
+"""
+import random
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+DEFAULT_RESPONSE = (
+    "Hey there! 👋 Great question. According to the Umbrella Corporation policies, "
+    "you'll find the details in the employee handbook. As a new team member, start by "
+    "reviewing the relevant section with your supervisor, and let me know if you have "
+    "any other questions about your onboarding!"
+)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model that streams a canned answer with configurable latency.
+
+    Each response waits `first_token_latency` seconds before the first token
+    and `token_latency` seconds between tokens; `error_rate` makes a
+    fraction of calls raise to exercise error handling.
+    """
+
+    response: str = DEFAULT_RESPONSE
+    first_token_latency: float = 0.2
+    token_latency: float = 0.01
+    error_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat-model"
+
+    def _tokens(self) -> List[str]:
+        """Split the response into word-sized tokens, keeping the spacing."""
+        words = self.response.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    def _maybe_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Simulated LLM failure")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        time.sleep(self.first_token_latency)
+        for i, token in enumerate(self._tokens()):
+            if i:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,237 @@
+"""
+LLM provider layer with health tracking and hedged streaming requests.
+
+`HedgedChatModel` wraps an ordered list of providers (Groq first, then a
+local Ollama/llama.cpp server or an in-process stub). The healthiest
+provider is asked first; if it has not produced a first token within
+`hedge_after` seconds, or fails before doing so, the next provider is
+asked as well. Streaming continues from whichever produces a token
+first and the slower request is abandoned, which trims tail latency
+without changing the answer path for the common case.
+"""
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.utils.logger import logger, log_event
+
+
+@dataclass
+class ProviderHealth:
+    """Rolling health of one provider."""
+
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    hedges_won: int = 0
+    ttft_ewma: Optional[float] = None  # Seconds to first token, exponentially weighted
+    last_failure: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_first_token(self, seconds: float, alpha: float = 0.2):
+        with self._lock:
+            self.ttft_ewma = seconds if self.ttft_ewma is None else alpha * seconds + (1 - alpha) * self.ttft_ewma
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_failure = time.monotonic()
+
+    def record_hedge_won(self):
+        with self._lock:
+            self.hedges_won += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "successes": self.successes,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "hedges_won": self.hedges_won,
+                "ttft_ms": round(self.ttft_ewma * 1000, 1) if self.ttft_ewma is not None else None,
+            }
+
+
+class LLMProvider:
+    """A named chat model with health tracking."""
+
+    def __init__(self, name: str, llm: BaseChatModel, max_failures: int = 3, cooldown: float = 30.0):
+        """Initialize the provider.
+
+        Args:
+            name: Provider name used in logs and metrics
+            llm: LangChain chat model
+            max_failures: Consecutive failures after which the provider is demoted
+            cooldown: Seconds a demoted provider waits before being tried first again
+        """
+        self.name = name
+        self.llm = llm
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.health = ProviderHealth()
+
+    @property
+    def healthy(self) -> bool:
+        """False while the provider is cooling down after repeated failures or lost hedges."""
+        if self.health.consecutive_failures < self.max_failures:
+            return True
+        return time.monotonic() - self.health.last_failure > self.cooldown
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that streams from the first of several providers to respond."""
+
+    providers: List[Any]
+    hedge_after: float = 1.5  # Seconds without a first token before asking the next provider
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat-model"
+
+    def ordered_providers(self) -> List[LLMProvider]:
+        """Providers in configured order, healthy ones first."""
+        return sorted(self.providers, key=lambda p: not p.healthy)
+
+    def health(self) -> Dict[str, dict]:
+        """Health snapshot per provider."""
+        return {p.name: dict(p.health.snapshot(), healthy=p.healthy) for p in self.providers}
+
+    def _pump(self, index: int, provider: LLMProvider, messages, stop, kwargs, out: queue.Queue, cancel: threading.Event):
+        """Stream one provider into the shared queue until done, failed or cancelled."""
+        start = time.perf_counter()
+        first = True
+        try:
+            for chunk in provider.llm.stream(messages, stop=stop, **kwargs):
+                if cancel.is_set():
+                    return
+                if first:
+                    provider.health.record_first_token(time.perf_counter() - start)
+                    first = False
+                out.put(("chunk", index, chunk))
+            provider.health.record_success()
+            out.put(("done", index, None))
+        except Exception as exc:  # noqa: BLE001 - any provider error triggers failover
+            if not cancel.is_set():
+                provider.health.record_failure()
+                logger.warning("LLM provider '%s' failed: %s", provider.name, exc)
+            out.put(("error", index, exc))
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        providers = self.ordered_providers()
+        out: queue.Queue = queue.Queue()
+        cancels: List[threading.Event] = []
+
+        def launch():
+            index = len(cancels)
+            cancels.append(threading.Event())
+            ctx = contextvars.copy_context()  # keep the request ID on provider log records
+            threading.Thread(
+                target=ctx.run,
+                args=(self._pump, index, providers[index], messages, stop, kwargs, out, cancels[index]),
+                daemon=True,
+                name=f"llm-{providers[index].name}",
+            ).start()
+
+        launch()
+        deadline = time.monotonic() + self.hedge_after
+        winner = None
+        failed = set()
+        try:
+            while True:
+                timeout = None
+                if winner is None and len(cancels) < len(providers):
+                    timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    kind, index, payload = out.get(timeout=timeout)
+                except queue.Empty:
+                    log_event("llm_hedge", provider=providers[len(cancels)].name, after_s=self.hedge_after)
+                    launch()
+                    deadline = time.monotonic() + self.hedge_after
+                    continue
+
+                if winner is None:
+                    if kind == "error":
+                        failed.add(index)
+                        if len(failed) < len(cancels):
+                            continue
+                        if len(cancels) < len(providers):
+                            launch()
+                            deadline = time.monotonic() + self.hedge_after
+                            continue
+                        raise payload
+                    winner = index
+                    for i, cancel in enumerate(cancels):
+                        if i != winner:
+                            cancel.set()
+                            if i not in failed:
+                                # Too slow to answer counts against the provider's health
+                                providers[i].health.record_failure()
+                    if winner:
+                        providers[winner].health.record_hedge_won()
+                    log_event("llm_provider", sampled=True, provider=providers[winner].name, hedged=len(cancels) > 1)
+
+                if index != winner:
+                    continue
+                if kind == "chunk":
+                    chunk = ChatGenerationChunk(message=payload)
+                    if run_manager:
+                        run_manager.on_llm_new_token(payload.content, chunk=chunk)
+                    yield chunk
+                elif kind == "error":
+                    raise payload
+                else:
+                    return
+        finally:
+            for cancel in cancels:
+                cancel.set()
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def create_fallback_llm(settings) -> Optional[BaseChatModel]:
+    """Build the secondary chat model named by `settings.llm_fallback`.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Chat model, or None when no fallback is configured
+    """
+    if settings.llm_fallback == "ollama":
+        try:
+            from langchain_community.chat_models import ChatOllama
+        except ImportError as exc:
+            raise ImportError("The Ollama fallback requires langchain-community") from exc
+        return ChatOllama(base_url=settings.llm_fallback_url, model=settings.llm_fallback_model, temperature=0.5)
+    if settings.llm_fallback == "fake":
+        from src.models.local_llm import FakeStreamingChatModel
+
+        return FakeStreamingChatModel()
+    return None
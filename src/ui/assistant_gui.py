@@ -1,23 +1,48 @@
 """
 Main Assistant GUI for interacting with employees.
 """
+import time
+
 import streamlit as st
-from src.utils.logger import logger
+from src.utils.governor import Overloaded
+from src.utils.logger import logger, log_event, request_context
+from src.utils.prompts import BUSY_MESSAGE
 from src.ui.theme import DARK_GLASS_THEME
 
 
 class AssistantGUI:
     """GUI for the AI Assistant chat interface."""
     
-    def __init__(self, assistant):
+    def __init__(
+        self,
+        assistant,
+        history_window: int = 20,
+        stream_coalescer=None,
+        session_store=None,
+        session_id=None,
+        governor=None,
+    ):
         """Initialize the GUI with an assistant instance.
         
         Args:
             assistant: The Assistant instance to use for responses
+            history_window: Number of recent messages rendered on each rerun;
+                older ones are loaded a page at a time on request
+            stream_coalescer: Optional StreamCoalescer grouping tokens before
+                they are sent to the browser
+            session_store: Optional SessionStore holding the conversation; without
+                one the history lives in st.session_state.messages
+            session_id: Conversation ID in the session store
+            governor: Optional ResourceGovernor whose usage is shown in Diagnostics
         """
         self.assistant = assistant
         self.messages = assistant.messages
         self.employee_information = assistant.employee_information
+        self.history_window = max(1, history_window)
+        self.stream_coalescer = stream_coalescer
+        self.session_store = session_store
+        self.session_id = session_id
+        self.governor = governor
 
     def get_response(self, user_input: str):
         """Get response from the assistant.
@@ -31,12 +56,37 @@ class AssistantGUI:
         return self.assistant.get_response(user_input)
 
     def render_messages(self):
-        """Render all chat messages."""
-        for message in self.messages:
+        """Render the recent chat messages, with older history paged in on request.
+        
+        Only the last `history_window` messages (plus any pages the user asked
+        for) are sent to the browser, so rerun cost stays flat as the
+        conversation grows.
+        """
+        pages = st.session_state.get("history_pages", 1)
+        visible = self.history_window * pages
+        if self.session_store is not None:
+            total = self.session_store.count(self.session_id)
+            messages = self.session_store.recent(self.session_id, visible)
+        else:
+            total, messages = len(self.messages), self.messages[-visible:]
+        hidden = max(0, total - len(messages))
+        
+        if hidden:
+            if st.button(f"⬆️ Show earlier messages ({hidden} hidden)", key="load_history"):
+                st.session_state["history_pages"] = pages + 1
+                st.rerun()
+        
+        for message in messages:
             if message["role"] == "user":
-                st.chat_message("human").markdown(message["content"])
+                st.chat_message("human").markdown(self._message_text(message))
             elif message["role"] == "ai":
-                st.chat_message("ai").markdown(message["content"])
+                st.chat_message("ai").markdown(self._message_text(message))
+
+    @staticmethod
+    def _message_text(message: dict) -> str:
+        """Message content as markdown; streamed responses may be stored as chunk lists."""
+        content = message["content"]
+        return content if isinstance(content, str) else "".join(str(part) for part in content)
 
     def set_state(self, key: str, value):
         """Update session state.
@@ -55,15 +105,39 @@ class AssistantGUI:
             # Display user message
             st.chat_message("human").markdown(user_input)
 
-            # Get AI response
-            response_generator = self.get_response(user_input)
+            # Tag every log record of this turn with one request ID
+            with request_context():
+                try:
+                    response_generator = self.get_response(user_input)
+                    if self.stream_coalescer is not None:
+                        response_generator = self.stream_coalescer.wrap(response_generator)
+
+                    with st.chat_message("ai"):
+                        response = st.write_stream(response_generator)
+                except Overloaded as exc:
+                    # Shed load instead of queueing without bound; the turn is not recorded
+                    log_event("overloaded", resource=exc.resource, reason=exc.reason)
+                    st.warning(BUSY_MESSAGE.format(seconds=max(1, round(exc.retry_after))))
+                    return
 
-            with st.chat_message("ai"):
-                response = st.write_stream(response_generator)
+            self.record_messages(
+                {"role": "user", "content": user_input},
+                {"role": "ai", "content": response},
+            )
 
-            # Update message history
-            self.messages.append({"role": "user", "content": user_input})
-            self.messages.append({"role": "ai", "content": response})
+    def record_messages(self, *messages: dict):
+        """Append a turn to the conversation history.
+        
+        With a session store the turn is appended to the session's log;
+        the assistant's in-memory window is extended either way.
+        
+        Args:
+            messages: Messages to append, oldest first
+        """
+        self.messages.extend(messages)
+        if self.session_store is not None:
+            self.session_store.append(self.session_id, *messages)
+        else:
             self.set_state("messages", self.messages)
 
     def render_sidebar(self):
@@ -97,13 +171,41 @@ class AssistantGUI:
                 if emp.get('skills'):
                     st.markdown(f"**Skills:** {', '.join(emp.get('skills', []))}")
             
+            timings = st.session_state.get("render_times_ms")
+            if timings:
+                with st.expander("⚙️ Diagnostics"):
+                    st.caption(f"Last render: {timings[-1]:.1f} ms · avg of {len(timings)}: "
+                               f"{sum(timings) / len(timings):.1f} ms")
+                    if self.stream_coalescer is not None:
+                        stream = self.stream_coalescer.metrics.snapshot()
+                        st.caption(f"Streaming: {stream['flushes']} flushes · {stream['bytes_sent']:,} bytes · "
+                                   f"{stream['chunks_per_flush']:.1f} tokens/flush")
+                    if self.governor is not None:
+                        st.caption(self._load_summary(self.governor.status()))
+            
             st.markdown("---")
             st.caption("🔒 Confidential Information")
             st.caption("⚠️ Clearance Level: Restricted")
 
+    @staticmethod
+    def _load_summary(status: dict) -> str:
+        """One-line summary of governor pools and process memory."""
+        parts = [
+            f"{name} {pool['in_use']}/{pool['limit']}" + (f" (+{pool['waiting']} queued)" if pool["waiting"] else "")
+            for name, pool in status["pools"].items()
+        ]
+        if status["memory_mb"] is not None:
+            parts.append(f"RSS {status['memory_mb']:.0f} MB")
+        rejected = sum(pool["rejected"] + pool["timed_out"] for pool in status["pools"].values())
+        rejected += status["memory_rejections"]
+        if rejected:
+            parts.append(f"{rejected} shed")
+        return "Load: " + " · ".join(parts)
+
     def render(self):
         """Render the complete GUI."""
-        logger.info("Rendering AssistantGUI")
+        start = time.perf_counter()
+        log_event("render_gui", sampled=True)
         
         # Apply dark glossy glass theme
         st.markdown(DARK_GLASS_THEME, unsafe_allow_html=True)
@@ -118,7 +220,16 @@ class AssistantGUI:
         # Render chat history
         self.render_messages()
         
+        # Measured before the input: answering a question blocks on the LLM stream
+        self._record_render_time(time.perf_counter() - start)
+        
         # Render input
         self.render_user_input()
-        
         logger.debug("GUI render complete")
+
+    def _record_render_time(self, seconds: float):
+        """Keep server-side render times for recent reruns in session state."""
+        timings = st.session_state.setdefault("render_times_ms", [])
+        timings.append(seconds * 1000)
+        del timings[:-50]
+        log_event("render_time", sampled=True, ms=round(seconds * 1000, 2), messages=len(self.messages))
@@ -1,9 +1,22 @@
 """Utils module."""
-from .logger import logger, get_logger, log_startup, log_shutdown
+from .logger import (
+    logger,
+    get_logger,
+    log_startup,
+    log_shutdown,
+    log_event,
+    request_context,
+    configure_sampling,
+    use_json_format,
+)
 
 __all__ = [
     "logger", 
     "get_logger", 
     "log_startup", 
-    "log_shutdown"
+    "log_shutdown",
+    "log_event",
+    "request_context",
+    "configure_sampling",
+    "use_json_format",
 ]
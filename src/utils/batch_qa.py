@@ -0,0 +1,270 @@
+"""
+Batch question answering for HR bulk processing.
+
+Reads (employee_id, question) rows from a CSV or JSONL file. All questions
+are embedded in one batch and retrieved with a single multi-query FAISS
+search. Answers are then generated with a bounded number of concurrent
+LLM calls that back off on rate limits. Each result is appended to a
+JSONL file as soon as it completes, so an interrupted run resumes with
+the rows that are still missing.
+
+Usage:
+    python -m src.utils.batch_qa survey.csv --out answers.jsonl --concurrency 4
+"""
+import argparse
+import csv
+import hashlib
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Set
+
+from src.utils.logger import logger
+from src.utils.prompts import OUT_OF_SCOPE_MESSAGE
+from src.utils.vectorstore import search_vectors
+
+
+@dataclass
+class BatchItem:
+    """One question to answer."""
+
+    row: int
+    employee_id: str
+    question: str
+
+    @property
+    def key(self) -> str:
+        """Stable identity used to skip rows already answered."""
+        digest = hashlib.sha1(self.question.encode("utf-8")).hexdigest()[:12]
+        return f"{self.row}:{self.employee_id}:{digest}"
+
+
+def read_questions(path: str) -> List[BatchItem]:
+    """Read `employee_id`/`question` rows from a CSV or JSONL file."""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    return [
+        BatchItem(row, str(r.get("employee_id") or ""), r["question"].strip())
+        for row, r in enumerate(rows)
+        if r.get("question", "").strip()
+    ]
+
+
+def completed_keys(out_path: str) -> Set[str]:
+    """Keys of rows already answered successfully in an earlier run."""
+    done = set()
+    try:
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from an interrupted write
+                if record.get("status") == "ok":
+                    done.add(record["key"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _terminate_partial_line(out_path: str):
+    """End a line cut off by a crash so appended records start on their own line."""
+    try:
+        with open(out_path, "rb+") as f:
+            if f.seek(0, 2) == 0:
+                return
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+
+def is_rate_limit(exc: Exception) -> bool:
+    """Whether an LLM error is a rate limit (HTTP 429) worth retrying."""
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(exc).__name__.lower() or "rate limit" in str(exc).lower()
+
+
+def call_with_backoff(fn: Callable[[], str], max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0) -> str:
+    """Call `fn`, retrying rate-limited calls with exponential backoff and jitter.
+
+    A `retry-after` header on the error's response is honoured when present.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt == max_retries or not is_rate_limit(exc):
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+            try:
+                delay = max(delay, float(headers.get("retry-after", 0)))
+            except (TypeError, ValueError):
+                pass
+            logger.warning("Rate limited; retrying in %.1fs (attempt %d/%d)", delay, attempt + 1, max_retries)
+            time.sleep(delay)
+
+
+class BatchRunner:
+    """Answers many questions with shared retrieval and bounded LLM concurrency."""
+
+    def __init__(
+        self,
+        assistant_factory: Callable[[str], object],
+        embedding_function,
+        vector_store,
+        k: int = 2,
+        concurrency: int = 4,
+        scope_classifier=None,
+        max_retries: int = 5,
+    ):
+        """Initialize the runner.
+
+        Args:
+            assistant_factory: Callable (employee_id) -> Assistant with fresh history
+            embedding_function: Embeddings used for the questions
+            vector_store: FAISS vector store to retrieve from
+            k: Policy chunks retrieved per question
+            concurrency: Maximum concurrent LLM calls
+            scope_classifier: Optional ScopeClassifier answering off-topic rows without the LLM
+            max_retries: Retries per row after rate-limit errors
+        """
+        self.assistant_factory = assistant_factory
+        self.embedding_function = embedding_function
+        self.vector_store = vector_store
+        self.k = k
+        self.concurrency = concurrency
+        self.scope_classifier = scope_classifier
+        self.max_retries = max_retries
+
+    def run(self, items: List[BatchItem], out_path: str) -> dict:
+        """Answer every item not yet in `out_path`, appending results as they finish.
+
+        Args:
+            items: Questions to answer
+            out_path: JSONL results file, also used to resume
+
+        Returns:
+            Counts of skipped, answered and failed rows and the elapsed time
+        """
+        done = completed_keys(out_path)
+        pending = [item for item in items if item.key not in done]
+        summary = {"total": len(items), "skipped": len(items) - len(pending), "ok": 0, "error": 0}
+        if not pending:
+            return dict(summary, seconds=0.0)
+
+        start = time.perf_counter()
+        vectors = self.embedding_function.embed_documents([item.question for item in pending])
+        documents = search_vectors(self.vector_store, vectors, k=self.k).all_documents()
+        logger.info("Retrieved context for %d questions in %.2fs", len(pending), time.perf_counter() - start)
+
+        _terminate_partial_line(out_path)
+        with open(out_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._answer, item, docs) for item, docs in zip(pending, documents)]
+            for future in as_completed(futures):
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                summary[record["status"]] += 1
+
+        summary["seconds"] = time.perf_counter() - start
+        logger.info("Batch finished: %s", summary)
+        return summary
+
+    def _answer(self, item: BatchItem, documents: list) -> dict:
+        """Answer one row; failures are recorded rather than raised so the batch continues."""
+        start = time.perf_counter()
+        record = {"key": item.key, "row": item.row, "employee_id": item.employee_id, "question": item.question}
+        try:
+            assistant = self.assistant_factory(item.employee_id)
+            decision = self.scope_classifier.classify(item.question) if self.scope_classifier else None
+            if decision is not None and not decision.in_scope:
+                name = (assistant.employee_information or {}).get("name", "there")
+                answer = OUT_OF_SCOPE_MESSAGE.format(name=name, topic=decision.topic, resource=decision.resource)
+                documents = []
+            else:
+                answer = call_with_backoff(
+                    lambda: assistant.answer_with_documents(item.question, documents), max_retries=self.max_retries
+                )
+            record.update(status="ok", answer=answer, pages=[doc.metadata.get("page") for doc in documents])
+        except Exception as exc:
+            logger.error("Row %d failed: %s", item.row, exc)
+            record.update(status="error", error=str(exc))
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        return record
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Answer a file of employee questions in bulk.")
+    parser.add_argument("path", help="CSV or JSONL file with employee_id and question columns")
+    parser.add_argument("--out", required=True, help="JSONL results file (appended to; reruns resume)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--k", type=int, default=2, help="Policy chunks per question")
+    parser.add_argument("--tenant", default=None, help="Tenant name (default: settings.default_tenant)")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the local fake LLM instead of Groq")
+    args = parser.parse_args(argv)
+
+    import os
+
+    from src.config import get_settings
+    from src.data.employee_repository import EmployeeRepository
+    from src.models import Assistant, SentenceTransformersEmbeddings
+    from src.utils.employee_context import EmployeeContextProjector
+    from src.utils.index_registry import IndexRegistry
+    from src.utils.prompts import system_prompt_for
+    from src.utils.scope import ScopeClassifier
+
+    settings = get_settings()
+    tenant = args.tenant or settings.default_tenant
+    embeddings = SentenceTransformersEmbeddings(settings.embedding_model)
+    registry = IndexRegistry(embeddings, chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+                             embedding_model=settings.embedding_model, pca_dim=settings.index_pca_dim,
+                             quantization=settings.index_quantization, rescore_factor=settings.index_rescore_factor,
+                             docstore_format=settings.docstore_format)
+    registry.register(settings.default_tenant, settings.pdf_path, settings.vectorstore_path)
+    for name, pdf_path in settings.tenants.items():
+        registry.register(name, pdf_path, os.path.join(settings.index_root, name))
+
+    if args.fake_llm:
+        from src.models.local_llm import FakeStreamingChatModel
+
+        llm = FakeStreamingChatModel()
+    else:
+        from langchain_groq import ChatGroq
+
+        # Retries are handled by call_with_backoff so rate limits are not retried twice
+        llm = ChatGroq(model=settings.model_name, temperature=0.5, max_tokens=350, max_retries=0)
+
+    repository = EmployeeRepository(settings.employee_db_path) if os.path.exists(settings.employee_db_path) else None
+    projector = EmployeeContextProjector() if settings.employee_context_mode == "compact" else None
+
+    def assistant_factory(employee_id):
+        return Assistant(system_prompt=system_prompt_for(settings.prompt_layout), llm=llm, message_history=[],
+                         employee_id=employee_id, employee_repository=repository, employee_context=projector,
+                         prompt_layout=settings.prompt_layout)
+
+    runner = BatchRunner(
+        assistant_factory,
+        embeddings,
+        registry.get(tenant),
+        k=args.k,
+        concurrency=args.concurrency,
+        scope_classifier=ScopeClassifier() if settings.scope_classifier != "off" else None,
+    )
+    summary = runner.run(read_questions(args.path), args.out)
+    print(f"{summary['ok']} answered, {summary['error']} failed, {summary['skipped']} already done "
+          f"in {summary['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Pluggable cache layer for retrieval results and final answers.
+
+Backends share a tiny bytes-in/bytes-out interface so the same
+ResponseCache can run in-process, on a local SQLite file shared by several
+replicas on one host, or against any Redis-protocol server.
+"""
+import abc
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from src.utils.logger import logger
+
+
+class CacheBackend(abc.ABC):
+    """Minimal key/value interface implemented by every cache backend."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored value, or None if missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Store a value, expiring after `ttl` seconds if given."""
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        """Remove a key."""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Remove every key."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with TTL and entry/byte limits."""
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, default_ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total size of stored values
+            default_ttl: Expiry in seconds used when `set` gets no ttl
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._data: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if len(value) > self.max_bytes:
+            return
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, expires_at)
+            self._bytes += len(value)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _pop(self, key: str):
+        value, _ = self._data.pop(key)
+        self._bytes -= len(value)
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a local SQLite file, shared by processes on one host."""
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: Optional[float] = None,
+    ):
+        """Open or create the cache database.
+
+        Args:
+            path: Path to the SQLite database file
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total size of stored values
+            default_ttl: Expiry in seconds used when `set` gets no ttl
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), expires_at, now),
+            )
+            self._evict(now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def _evict(self, now: float):
+        """Drop expired rows, then least recently used rows until within limits."""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            removed += 1
+        logger.debug("SQLite cache evicted %d entries", removed)
+
+
+class RedisCache(CacheBackend):
+    """Cache on a Redis-protocol server.
+
+    Size-based eviction is left to the server (`maxmemory` with an LRU
+    policy); values larger than `max_value_bytes` are not stored.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        client=None,
+        prefix: str = "onboard:",
+        default_ttl: Optional[float] = None,
+        max_value_bytes: int = 1024 * 1024,
+    ):
+        """Connect to the server.
+
+        Args:
+            url: Redis URL, used when no client is given
+            client: Existing client exposing get/set/delete/scan_iter
+            prefix: Namespace prepended to every key
+            default_ttl: Expiry in seconds used when `set` gets no ttl
+            max_value_bytes: Largest value that will be stored
+        """
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.max_value_bytes = max_value_bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if len(value) > self.max_value_bytes:
+            return
+        ttl = ttl if ttl is not None else self.default_ttl
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_cache_backend(settings) -> Optional[CacheBackend]:
+    """Build the cache backend selected by `settings.cache_backend`.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Cache backend, or None when caching is disabled
+    """
+    kind = settings.cache_backend
+    if kind == "memory":
+        return MemoryCache(settings.cache_max_entries, settings.cache_max_bytes, settings.cache_ttl_seconds)
+    if kind == "sqlite":
+        return SQLiteCache(settings.cache_path, settings.cache_max_entries, settings.cache_max_bytes, settings.cache_ttl_seconds)
+    if kind == "redis":
+        return RedisCache(settings.cache_url, default_ttl=settings.cache_ttl_seconds)
+    if kind in (None, "", "none"):
+        return None
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a cache key."""
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip(" ?!.")
+
+
+class ResponseCache:
+    """Caches retrieval results and final answers for one index version.
+
+    Keys combine the index version, the employee scope and a hash of the
+    normalized query, so rebuilding the index invalidates every entry.
+    """
+
+    def __init__(self, backend: CacheBackend, index_version: str, ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            backend: Storage backend
+            index_version: Version of the vector index the entries belong to
+            ttl: Expiry in seconds for new entries (backend default if None)
+        """
+        self.backend = backend
+        self.index_version = index_version
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, kind: str, query: str, scope: str) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{kind}:{self.index_version}:{scope}:{digest}"
+
+    def _get(self, key: str):
+        try:
+            raw = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Cache read failed: %s", e)
+            raw = None
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if raw is None else json.loads(raw)
+
+    def _set(self, key: str, value):
+        try:
+            self.backend.set(key, json.dumps(value).encode("utf-8"), ttl=self.ttl)
+        except Exception as e:
+            logger.warning("Cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        """Hit and miss counts since the cache was created."""
+        with self._lock:
+            return {"index_version": self.index_version, "hits": self.hits, "misses": self.misses}
+
+    def get_retrieval(self, query: str, scope: str = "*") -> Optional[list]:
+        """Return cached documents for a query, or None."""
+        from langchain_core.documents import Document
+
+        data = self._get(self._key("retrieval", query, scope))
+        if data is None:
+            return None
+        return [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in data]
+
+    def set_retrieval(self, query: str, documents: List, scope: str = "*"):
+        """Store the documents retrieved for a query."""
+        data = [{"page_content": d.page_content, "metadata": d.metadata} for d in documents]
+        self._set(self._key("retrieval", query, scope), data)
+
+    def get_answer(self, query: str, scope: str) -> Optional[str]:
+        """Return a cached final answer for a query and employee scope, or None."""
+        return self._get(self._key("answer", query, scope))
+
+    def set_answer(self, query: str, scope: str, answer: str):
+        """Store the final answer for a query and employee scope."""
+        self._set(self._key("answer", query, scope), answer)
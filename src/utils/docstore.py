@@ -0,0 +1,360 @@
+"""
+Compact on-disk docstore for FAISS indexes.
+
+`FAISS.save_local` pickles every chunk `Document`, so the overlapping
+chunk text and the PDF metadata are stored once per chunk and the whole
+docstore is unpickled at startup. This format stores each page's text
+once, describes chunks as (segment, start, end, metadata id) offsets,
+interns metadata dicts, and compresses segment text in blocks (zstd when
+`zstandard` is installed, zlib otherwise). Opening a file reads only the
+header and the chunk table; blocks are decompressed when retrieval first
+returns a chunk from them.
+
+File layout::
+
+    MAGIC | uint32 header length | JSON header | chunk table (int64 n x 4) | blocks
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback keeps the format usable without the extra dependency
+    zstandard = None
+
+MAGIC = b"OBDOCv1\n"
+DOCSTORE_FILE = "docstore.bin"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("This docstore was written with zstd; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class CompactDocstore(Docstore, AddableMixin):
+    """Read-mostly docstore backed by a compressed, offset-indexed file.
+
+    Implements the `search`/`add` interface LangChain's FAISS store uses.
+    Documents added after opening are kept in memory and included on the
+    next `rewrite`.
+    """
+
+    def __init__(self, path: str, block_cache_size: int = 16):
+        """Open a docstore file.
+
+        Args:
+            path: Path to the docstore file
+            block_cache_size: Number of decompressed blocks kept in memory
+        """
+        self.path = path
+        self.block_cache_size = block_cache_size
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compact docstore file")
+        (header_len,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._map[start : start + header_len].decode("utf-8"))
+
+        self.codec = header["codec"]
+        self.ids: List[str] = header["ids"]
+        self.metadata: List[dict] = header["metadata"]
+        self._segments = header["segments"]  # [block, start, end] in decompressed block text
+        self._blocks = header["blocks"]  # [offset, length] of compressed data in the file
+        table_offset = start + header_len
+        table = self._map[table_offset : table_offset + len(self.ids) * 32]
+        self._chunks = np.frombuffer(table, dtype="<i8").reshape(-1, 4)
+
+        self._rows: Optional[Dict[str, int]] = None
+        self._added: Dict[str, Document] = {}
+        self._block_cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.blocks_decoded = 0
+
+    # ------------------------------------------------------------------ write
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        ids: Sequence[str],
+        documents: Sequence[Document],
+        pages: Optional[Sequence[Document]] = None,
+        block_size: int = 64 * 1024,
+        codec: Optional[str] = None,
+    ) -> "CompactDocstore":
+        """Write chunks to a compact docstore file and open it.
+
+        Chunks whose text occurs in their source page (matched on `source`
+        and `page` metadata) are stored as offsets into that page; others
+        get a segment of their own.
+
+        Args:
+            path: Output file
+            ids: Docstore id of each chunk
+            documents: Chunk documents in the same order
+            pages: Unsplit page documents the chunks were cut from
+            block_size: Target uncompressed bytes per compressed block
+            codec: "zstd" or "zlib" (default: zstd when available)
+
+        Returns:
+            The opened CompactDocstore
+        """
+        codec = codec or ("zstd" if zstandard is not None else "zlib")
+        page_segments: Dict[tuple, int] = {}
+        segment_texts: List[str] = []
+        for page in pages or []:
+            key = (page.metadata.get("source"), page.metadata.get("page"))
+            if key not in page_segments:
+                page_segments[key] = len(segment_texts)
+                segment_texts.append(page.page_content)
+
+        metadata_ids: Dict[str, int] = {}
+        metadata: List[dict] = []
+        chunks = np.zeros((len(documents), 4), dtype="<i8")
+        search_from: Dict[int, int] = {}
+        for row, doc in enumerate(documents):
+            meta_key = json.dumps(doc.metadata, sort_keys=True, default=str)
+            if meta_key not in metadata_ids:
+                metadata_ids[meta_key] = len(metadata)
+                metadata.append(json.loads(meta_key))
+
+            segment = page_segments.get((doc.metadata.get("source"), doc.metadata.get("page")))
+            start = -1
+            if segment is not None:
+                # Chunks of a page come in order; search from the previous hit first
+                start = segment_texts[segment].find(doc.page_content, search_from.get(segment, 0))
+                if start < 0:
+                    start = segment_texts[segment].find(doc.page_content)
+            if start < 0:
+                segment, start = len(segment_texts), 0
+                segment_texts.append(doc.page_content)
+            else:
+                search_from[segment] = start
+            chunks[row] = (segment, start, start + len(doc.page_content), metadata_ids[meta_key])
+
+        # Pack segments into blocks; offsets are in characters of the decoded block text
+        blocks: List[bytes] = []
+        segments = []
+        current: List[str] = []
+        current_len = 0
+        for text in segment_texts:
+            if current and current_len + len(text) > block_size:
+                blocks.append(_compress("".join(current).encode("utf-8"), codec))
+                current, current_len = [], 0
+            segments.append([len(blocks), current_len, current_len + len(text)])
+            current.append(text)
+            current_len += len(text)
+        if current:
+            blocks.append(_compress("".join(current).encode("utf-8"), codec))
+
+        table = chunks.tobytes()
+        header = {"codec": codec, "ids": list(ids), "metadata": metadata, "segments": segments, "blocks": []}
+        # Block offsets depend on the header length, which depends on the offsets: size it once with
+        # placeholders wide enough for any offset, then fill in
+        header["blocks"] = [[2 ** 40, len(b)] for b in blocks]
+        header_len = len(json.dumps(header).encode("utf-8"))
+        offset = len(MAGIC) + 4 + header_len + len(table)
+        for entry, block in zip(header["blocks"], blocks):
+            entry[0] = offset
+            offset += len(block)
+        header_bytes = json.dumps(header).encode("utf-8").ljust(header_len)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            f.write(table)
+            for block in blocks:
+                f.write(block)
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def rewrite(self, path: Optional[str] = None) -> "CompactDocstore":
+        """Write this docstore, including documents added since opening, to `path`."""
+        ids = list(self.ids) + list(self._added)
+        documents = [self.search(doc_id) for doc_id in self.ids] + list(self._added.values())
+        return self.write(path or self.path, ids, documents, codec=self.codec)
+
+    # ------------------------------------------------------------------ read
+
+    def _row(self, doc_id: str) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        return self._rows.get(doc_id)
+
+    def _block_text(self, block: int) -> str:
+        with self._lock:
+            text = self._block_cache.get(block)
+            if text is not None:
+                self._block_cache.move_to_end(block)
+                return text
+        offset, length = self._blocks[block]
+        text = _decompress(self._map[offset : offset + length], self.codec).decode("utf-8")
+        with self._lock:
+            self.blocks_decoded += 1
+            self._block_cache[block] = text
+            while len(self._block_cache) > self.block_cache_size:
+                self._block_cache.popitem(last=False)
+        return text
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Return the Document for a docstore id (LangChain Docstore interface)."""
+        if search in self._added:
+            return self._added[search]
+        row = self._row(search)
+        if row is None:
+            return f"ID {search} not found."
+        segment, start, end, meta = (int(v) for v in self._chunks[row])
+        block, seg_start, _ = self._segments[segment]
+        text = self._block_text(block)[seg_start + start : seg_start + end]
+        return Document(page_content=text, metadata=dict(self.metadata[meta]), id=search)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Add documents in memory; they are persisted by `rewrite`."""
+        overlapping = [doc_id for doc_id in texts if doc_id in self._added or self._row(doc_id) is not None]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._added.update(texts)
+
+    def delete(self, ids: List) -> None:
+        """Remove documents added since opening (stored chunks are read-only)."""
+        for doc_id in ids:
+            if doc_id not in self._added:
+                raise ValueError(f"Cannot delete stored document {doc_id}; rebuild the docstore instead")
+            del self._added[doc_id]
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self._added)
+
+    def resident_bytes(self) -> int:
+        """Approximate memory held: header tables plus decompressed blocks."""
+        with self._lock:
+            cached = sum(len(text) for text in self._block_cache.values())
+        return (
+            sum(len(i) + 56 for i in self.ids)
+            + len(json.dumps(self.metadata))
+            + cached
+            + sum(len(d.page_content) + 512 for d in self._added.values())
+        )
+
+    def file_bytes(self) -> int:
+        """Size of the docstore file."""
+        return len(self._map)
+
+    def close(self):
+        """Release the file mapping."""
+        self._map.close()
+        self._file.close()
+
+    def __getstate__(self):
+        raise TypeError("CompactDocstore is persisted with write(), not pickled")
+
+
+def benchmark(pdf_path: str, copies: int = 50, chunk_size: int = 1000, chunk_overlap: int = 100) -> dict:
+    """Compare a pickled Document docstore with the compact format.
+
+    The policy PDF is repeated `copies` times (as distinct sources) to
+    simulate a large corpus.
+
+    Args:
+        pdf_path: PDF to split
+        copies: Number of copies of the corpus
+        chunk_size: Chunk size
+        chunk_overlap: Chunk overlap
+
+    Returns:
+        File sizes, load times and memory allocated by loading each format
+    """
+    import pickle
+    import tempfile
+    import time
+    import tracemalloc
+
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    from src.utils.vectorstore import load_pdf, split_documents
+
+    base_pages = load_pdf(pdf_path)
+    pages = [
+        Document(page_content=p.page_content, metadata={**p.metadata, "source": f"{p.metadata.get('source')}#{c}"})
+        for c in range(copies)
+        for p in base_pages
+    ]
+    chunks = split_documents(pages, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    ids = [str(i) for i in range(len(chunks))]
+
+    def measure(load):
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = load()
+        seconds = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return store, seconds, allocated
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "index.pkl")
+        with open(pickle_path, "wb") as f:
+            pickle.dump((InMemoryDocstore(dict(zip(ids, chunks))), dict(enumerate(ids))), f)
+        compact_path = os.path.join(tmp, DOCSTORE_FILE)
+        CompactDocstore.write(compact_path, ids, chunks, pages=pages).close()
+
+        def load_pickle():
+            with open(pickle_path, "rb") as f:
+                return pickle.load(f)
+
+        _, pickle_s, pickle_mem = measure(load_pickle)
+        compact, compact_s, compact_mem = measure(lambda: CompactDocstore(compact_path))
+        sample = ids[:: max(1, len(ids) // 100)]
+        start = time.perf_counter()
+        found = [compact.search(i) for i in sample]
+        lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+        for doc_id, doc in zip(sample, found):
+            if not isinstance(doc, Document) or doc.page_content != chunks[int(doc_id)].page_content:
+                compact.close()
+                raise RuntimeError(f"Compact docstore returned the wrong text for chunk {doc_id}")
+        result = {
+            "chunks": len(chunks),
+            "pickle_file_kb": os.path.getsize(pickle_path) / 1024,
+            "compact_file_kb": os.path.getsize(compact_path) / 1024,
+            "pickle_load_ms": pickle_s * 1000,
+            "compact_load_ms": compact_s * 1000,
+            "pickle_memory_kb": pickle_mem / 1024,
+            "compact_memory_kb": compact_mem / 1024,
+            "compact_lookup_us": lookup_us,
+        }
+        compact.close()
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.config import get_settings
+
+    parser = argparse.ArgumentParser(description="Benchmark the compact docstore against index.pkl.")
+    parser.add_argument("--copies", type=int, default=50, help="Times the policy PDF is repeated")
+    args = parser.parse_args()
+    for key, value in benchmark(get_settings().pdf_path, copies=args.copies).items():
+        print(f"{key:>18}: {value:,.1f}")
@@ -0,0 +1,335 @@
+"""
+Content-addressed on-disk store for chunk embeddings.
+
+Vectors are keyed by sha256(model name + chunk text) and kept in a single
+append-only file of fixed-size records, so the file can be memory-mapped
+and rebuilt indexes only call the embedding model for chunks it has never
+seen before.
+
+File layout:
+    header:  magic (8 bytes) | dim (uint32) | name length (uint32) | model name (utf-8)
+    records: key (32 bytes) | vector (dim x float32, little endian)
+
+Several processes may share one store file (tenant build threads, the
+`index_versions build` CLI). Appends and compaction hold an exclusive
+`flock` on the file, row numbers are derived from the file size under that
+lock, and every store re-reads records other writers appended before it
+looks anything up.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils.logger import logger
+
+MAGIC = b"OBEMBv1\n"
+_HEADER = struct.Struct("<II")
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped map of chunk hash -> float32 vector."""
+
+    def __init__(self, path: str, model_name: str, dim: Optional[int] = None):
+        """Open or create an embedding store.
+
+        Args:
+            path: Path of the store file
+            model_name: Embedding model the vectors belong to
+            dim: Vector dimension; read from the file when it already exists
+        """
+        self.path = path
+        self.model_name = model_name
+        self.dim = dim
+        self._header_size = 0
+        self._index: Dict[bytes, int] = {}
+        self._records = 0
+        self._mmap = None
+        self._inode = None
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._read_header()
+            self._load_index()
+            logger.info("Opened embedding store %s (%d vectors)", path, len(self._index))
+
+    @classmethod
+    def for_model(cls, root: str, model_name: str, dim: Optional[int] = None) -> "EmbeddingStore":
+        """Open the store file for `model_name` inside directory `root`."""
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        return cls(os.path.join(root, f"{safe_name}.emb"), model_name, dim)
+
+    # ------------------------------------------------------------------ layout
+
+    @property
+    def _dtype(self) -> np.dtype:
+        return np.dtype([("key", "S32"), ("vec", "<f4", (self.dim,))])
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _header_bytes(self) -> bytes:
+        name = self.model_name.encode("utf-8")
+        return MAGIC + _HEADER.pack(self.dim, len(name)) + name
+
+    def _read_header(self):
+        with open(self.path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not an embedding store file")
+            dim, name_len = _HEADER.unpack(f.read(_HEADER.size))
+            name = f.read(name_len).decode("utf-8")
+        if name != self.model_name:
+            raise ValueError(
+                f"Embedding store {self.path} belongs to model '{name}', not '{self.model_name}'"
+            )
+        if self.dim is not None and self.dim != dim:
+            raise ValueError(f"Embedding store {self.path} has dim {dim}, expected {self.dim}")
+        self.dim = dim
+        self._header_size = len(MAGIC) + _HEADER.size + name_len
+
+    def _load_index(self):
+        """Map every key to its latest record, ignoring a torn trailing record."""
+        record_size = self._dtype.itemsize
+        stat = os.stat(self.path)
+        payload = stat.st_size - self._header_size
+        if payload % record_size:
+            logger.warning("Embedding store %s has a partial trailing record; ignoring it", self.path)
+        self._inode = stat.st_ino
+        self._records = 0
+        self._mmap = None
+        self._index = {}
+        self._index_rows(payload // record_size)
+
+    def _index_rows(self, records: int):
+        """Add index entries for rows `self._records` .. `records - 1`."""
+        if records <= self._records:
+            return
+        keys = np.memmap(
+            self.path, dtype=self._dtype, mode="r",
+            offset=self._header_size + self._records * self._dtype.itemsize,
+            shape=(records - self._records,),
+        )["key"]
+        for offset, key in enumerate(keys):
+            self._index[bytes(key)] = self._records + offset
+        self._records = records
+        self._mmap = None
+
+    def _sync(self):
+        """Pick up records other writers appended or a compaction rewrote.
+
+        The caller holds `self._lock`.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_size == 0:
+            return
+        if not self._header_size:
+            self._read_header()
+        records = (stat.st_size - self._header_size) // self._dtype.itemsize
+        if stat.st_ino != self._inode or records < self._records:
+            self._load_index()
+        else:
+            self._index_rows(records)
+
+    @contextmanager
+    def _locked_file(self):
+        """Open the store file for appending under an exclusive `flock`.
+
+        Retries when a compaction replaced the file while we waited, so
+        records are never appended to an unlinked file.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        while True:
+            f = open(self.path, "ab")
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                same_file = os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino
+            except FileNotFoundError:
+                same_file = False
+            if same_file:
+                break
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()  # also releases the flock
+
+    def _map(self):
+        """Return (and cache) a read-only memmap over all complete records."""
+        if self._mmap is None or len(self._mmap) != self._records:
+            self._mmap = np.memmap(
+                self.path, dtype=self._dtype, mode="r",
+                offset=self._header_size, shape=(self._records,),
+            )
+        return self._mmap
+
+    # ------------------------------------------------------------------ access
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors for texts.
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            One float32 vector per text, or None where the store has no entry
+        """
+        with self._lock:
+            self._sync()
+            if not self._index:
+                return [None] * len(texts)
+            vectors = self._map()["vec"]
+            result = []
+            for text in texts:
+                row = self._index.get(self._key(text))
+                result.append(None if row is None else np.array(vectors[row]))
+        return result
+
+    def put_many(self, texts: List[str], vectors) -> int:
+        """Append vectors for texts that are not stored yet.
+
+        Args:
+            texts: Chunk texts
+            vectors: Matching embedding vectors
+
+        Returns:
+            Number of records appended
+        """
+        vectors = np.asarray(vectors, dtype="<f4")
+        if len(texts) == 0:
+            return 0
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+
+        with self._lock, self._locked_file() as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                header = self._header_bytes()
+                f.write(header)
+                self._header_size = len(header)
+                self._inode = os.fstat(f.fileno()).st_ino
+                self._index, self._records, self._mmap = {}, 0, None
+            else:
+                self._sync()
+
+            fresh: Dict[bytes, np.ndarray] = {}
+            for text, vector in zip(texts, vectors):
+                key = self._key(text)
+                if key not in self._index:
+                    fresh[key] = vector
+            if not fresh:
+                return 0
+
+            records = np.empty(len(fresh), dtype=self._dtype)
+            records["key"] = list(fresh.keys())
+            records["vec"] = np.stack(list(fresh.values()))
+
+            end = self._header_size + self._records * self._dtype.itemsize
+            if max(size, self._header_size) > end:
+                logger.warning("Dropping partial trailing record from embedding store %s", self.path)
+                f.truncate(end)
+            f.write(records.tobytes())
+            f.flush()
+
+            for offset, key in enumerate(fresh):
+                self._index[key] = self._records + offset
+            self._records += len(fresh)
+            self._mmap = None
+        return len(fresh)
+
+    # ------------------------------------------------------------- maintenance
+
+    def compact(self, keep_texts: Optional[List[str]] = None) -> int:
+        """Rewrite the file without duplicate or unwanted records.
+
+        Args:
+            keep_texts: If given, only vectors for these texts are kept
+
+        Returns:
+            Number of records dropped
+        """
+        with self._lock, self._locked_file():
+            self._sync()
+            if not self._records:
+                return 0
+            if keep_texts is None:
+                rows = sorted(self._index.values())
+            else:
+                wanted = {self._key(t) for t in keep_texts}
+                rows = sorted(row for key, row in self._index.items() if key in wanted)
+
+            kept = np.array(self._map()[rows]) if rows else np.empty(0, dtype=self._dtype)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._header_bytes())
+                f.write(kept.tobytes())
+            self._mmap = None
+            os.replace(tmp_path, self.path)
+
+            dropped = self._records - len(rows)
+            self._load_index()
+        logger.info("Compacted embedding store %s: dropped %d records", self.path, dropped)
+        return dropped
+
+    def stats(self) -> dict:
+        """Report record counts and on-disk size."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {
+            "path": self.path,
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "vectors": len(self._index),
+            "records": self._records,
+            "dead_records": self._records - len(self._index),
+            "size_bytes": size,
+        }
+
+
+def stores_real_vectors(embedding_function) -> bool:
+    """Whether vectors from `embedding_function` may be read from or written to a store.
+
+    SentenceTransformersEmbeddings sets `model` to None when it falls back to
+    hash-based vectors; those must never be filed under the real model's
+    name or mixed with real vectors from the store.
+    """
+    return getattr(embedding_function, "model", True) is not None
+
+
+def embed_with_store(texts: List[str], embedding_function, store: EmbeddingStore) -> List[List[float]]:
+    """Embed texts, reading cached vectors from `store` and embedding only misses.
+
+    Args:
+        texts: Chunk texts to embed
+        embedding_function: LangChain embeddings used for texts not in the store
+        store: Embedding store to consult and update
+
+    Returns:
+        List of embedding vectors in input order
+    """
+    if not stores_real_vectors(embedding_function):
+        logger.warning("Embedding model is not loaded; bypassing embedding store %s", store.path)
+        return embedding_function.embed_documents(texts)
+
+    cached = store.get_many(texts)
+    missing = [i for i, vector in enumerate(cached) if vector is None]
+    logger.info("Embedding store hits: %d/%d chunks", len(texts) - len(missing), len(texts))
+
+    if missing:
+        fresh = embedding_function.embed_documents([texts[i] for i in missing])
+        store.put_many([texts[i] for i in missing], fresh)
+        for i, vector in zip(missing, fresh):
+            cached[i] = vector
+
+    return [v.tolist() if isinstance(v, np.ndarray) else list(v) for v in cached]
@@ -0,0 +1,168 @@
+"""
+Compact employee context for the system prompt.
+
+Instead of injecting the raw employee dict (UUID, phone, salary, full
+skills list...) into every turn, the projector picks the fields relevant to
+the question type and renders them as one short line. Renderings are
+computed once per employee and cached.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Lexical cues used to pick a question type; first match wins
+QUESTION_TYPE_RULES = [
+    ("compensation", re.compile(r"\b(salary|pay|paid|paycheck|payroll|bonus|compensation|raise|wage)", re.I)),
+    ("contact", re.compile(r"\b(email|phone|contact|supervisor|manager|boss|reach)", re.I)),
+    ("tenure", re.compile(r"\b(hire|hired|start date|anniversary|probation|tenure|vacation|pto|leave)", re.I)),
+    ("location", re.compile(r"\b(office|location|site|building|facilit|parking|commute|campus)", re.I)),
+    ("role", re.compile(r"\b(role|responsib|position|job|duties|tasks|team|department|skill|career|training)", re.I)),
+]
+
+# Fields rendered for each question type
+DEFAULT_PROFILES: Dict[str, List[str]] = {
+    "general": ["name", "position", "department", "location"],
+    "role": ["name", "position", "department", "skills", "supervisor"],
+    "compensation": ["name", "position", "department", "salary", "hire_date"],
+    "contact": ["name", "position", "department", "supervisor", "email", "location"],
+    "tenure": ["name", "position", "hire_date", "location"],
+    "location": ["name", "department", "location"],
+}
+
+_LABELS = {
+    "name": "Name",
+    "position": "Position",
+    "department": "Dept",
+    "location": "Location",
+    "skills": "Skills",
+    "supervisor": "Supervisor",
+    "salary": "Salary",
+    "hire_date": "Hired",
+    "email": "Email",
+    "phone_number": "Phone",
+}
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count (words and punctuation marks)."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def classify_question(question: str) -> str:
+    """Map a question to one of the profile names using lexical rules."""
+    for question_type, pattern in QUESTION_TYPE_RULES:
+        if pattern.search(question or ""):
+            return question_type
+    return "general"
+
+
+class EmployeeContextProjector:
+    """Renders the employee fields relevant to a question as a compact line."""
+
+    def __init__(self, profiles: Optional[Dict[str, List[str]]] = None, max_skills: int = 3, cache_size: int = 4096):
+        """Initialize the projector.
+
+        Args:
+            profiles: Question type -> fields to include (defaults to DEFAULT_PROFILES)
+            max_skills: Maximum number of skills listed
+            cache_size: Number of employees whose renderings are cached
+        """
+        self.profiles = profiles or DEFAULT_PROFILES
+        self.max_skills = max_skills
+        self.cache_size = cache_size
+        self.raw_tokens = 0
+        self.compact_tokens = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, employee: dict, question: str = "") -> str:
+        """Return the compact context for an employee and question.
+
+        Args:
+            employee: Employee dictionary
+            question: Current user question, used to pick the profile
+
+        Returns:
+            Pre-rendered context line
+        """
+        if not employee:
+            return "Unknown employee"
+        renderings = self._renderings(employee)
+        text = renderings.get(classify_question(question), renderings["general"])
+        with self._lock:
+            self.raw_tokens += renderings["_raw_tokens"]
+            self.compact_tokens += count_tokens(text)
+        return text
+
+    def _renderings(self, employee: dict) -> dict:
+        """Render every profile for the employee once and cache the result."""
+        key = employee.get("employee_id") or id(employee)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        renderings = {name: self._render_fields(employee, fields) for name, fields in self.profiles.items()}
+        renderings.setdefault("general", self._render_fields(employee, DEFAULT_PROFILES["general"]))
+        renderings["_raw_tokens"] = count_tokens(str(employee))
+
+        with self._lock:
+            self._cache[key] = renderings
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return renderings
+
+    def _render_fields(self, employee: dict, fields: List[str]) -> str:
+        parts = []
+        for field in fields:
+            if field == "name":
+                value = " ".join(p for p in (employee.get("name"), employee.get("lastname")) if p)
+            elif field == "skills":
+                value = ", ".join((employee.get("skills") or [])[: self.max_skills])
+            elif field == "salary" and employee.get("salary") is not None:
+                value = f"${float(employee['salary']):,.0f}"
+            else:
+                value = employee.get(field)
+            if value:
+                parts.append(f"{_LABELS.get(field, field)}: {value}")
+        return " | ".join(parts)
+
+    def invalidate(self, employee_id: str):
+        """Drop cached renderings after an employee record changes."""
+        with self._lock:
+            self._cache.pop(employee_id, None)
+
+    def savings(self) -> dict:
+        """Tokens rendered so far versus the raw dict repr they replaced."""
+        with self._lock:
+            raw, compact = self.raw_tokens, self.compact_tokens
+        return {
+            "raw_tokens": raw,
+            "compact_tokens": compact,
+            "saved_tokens": raw - compact,
+            "saved_pct": (1 - compact / raw) * 100 if raw else 0.0,
+        }
+
+
+def report_token_savings(employee: dict, projector: Optional[EmployeeContextProjector] = None) -> dict:
+    """Compare the raw dict repr with each compact profile for one employee.
+
+    Args:
+        employee: Employee dictionary
+        projector: Projector to evaluate (a default one if None)
+
+    Returns:
+        Token counts for the raw repr and every profile
+    """
+    projector = projector or EmployeeContextProjector()
+    renderings = projector._renderings(employee)
+    raw = renderings["_raw_tokens"]
+    report = {"raw": raw}
+    for name, text in renderings.items():
+        if not name.startswith("_"):
+            report[name] = count_tokens(text)
+    return report
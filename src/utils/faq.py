@@ -0,0 +1,321 @@
+"""
+Precomputed answers for the most common onboarding questions.
+
+Offline, a curated FAQ list is run through the normal Assistant pipeline
+with a placeholder employee, so answers contain `{name}`, `{position}`...
+tokens. Answers and question embeddings are stored in the index version
+directory, tagged with the index version, and the version's manifest
+records how many there are. This costs one LLM call per question, so it
+never runs while serving: pass `--faq-llm` to `index_versions build`, or
+backfill an already published (or legacy unversioned) index with the
+command below. At query time a high-confidence match is served directly
+with the placeholders filled from the current employee; a version
+mismatch makes the FAQ index unavailable until it is rebuilt.
+
+Usage:
+    python -m src.utils.faq build [--tenant NAME] [--fake-llm]    # backfill the served version
+"""
+import argparse
+import json
+import os
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logger import logger
+
+FAQ_QUESTIONS: List[str] = [
+    "What's the dress code policy?",
+    "What are the password requirements?",
+    "How often do I need to change my password?",
+    "How do I report a security incident?",
+    "How do I report misconduct?",
+    "What is the company mission statement?",
+    "Who founded the Umbrella Corporation?",
+    "Who are the key people in the company?",
+    "What is the Monster Mash party?",
+    "What are the company's cultural norms?",
+    "What happens if I violate the code of conduct?",
+    "What are the consequences of non-compliance?",
+    "What is the social media policy?",
+    "How do I handle confidential information?",
+    "What are the data classification levels?",
+    "What is UmbraNet?",
+    "Which project management tools does the company use?",
+    "What should I do before starting a lab experiment?",
+    "What PPE do I need in the laboratory?",
+    "How should hazardous materials be handled and stored?",
+    "What are the BSL-3 protocols?",
+    "What should I do in case of a laboratory accident?",
+    "What is the Basement Cleaning Detail?",
+    "How do I disclose a conflict of interest?",
+    "When do incidents need to be reported?",
+    "What compliance training do I need to complete?",
+    "How are audits and inspections carried out?",
+    "Can I interact with laboratory specimens?",
+]
+
+# Employee fields that may appear as placeholders in stored answers
+PLACEHOLDER_FIELDS = ["name", "lastname", "position", "department", "location", "supervisor", "hire_date"]
+
+PLACEHOLDER_EMPLOYEE = {"employee_id": "__faq__", "skills": []}
+PLACEHOLDER_EMPLOYEE.update({field: "{" + field + "}" for field in PLACEHOLDER_FIELDS})
+
+_PLACEHOLDER_RE = re.compile(r"\{(" + "|".join(PLACEHOLDER_FIELDS) + r")\}")
+
+
+class FAQIndex:
+    """Question embeddings and precomputed answers for one index version."""
+
+    ANSWERS_FILE = "faq.json"
+    VECTORS_FILE = "faq.npy"
+
+    def __init__(self, entries: List[dict], vectors: np.ndarray, index_version: str,
+                 embedding_function=None, threshold: float = 0.9):
+        """Initialize the FAQ index.
+
+        Args:
+            entries: List of {"question", "answer"} dicts
+            vectors: Normalized question embeddings, one row per entry
+            index_version: Version of the vector index the answers were built from
+            embedding_function: Embeddings used to embed incoming questions
+            threshold: Minimum cosine similarity for a direct answer
+        """
+        self.entries = entries
+        self.vectors = np.asarray(vectors, dtype="float32")
+        self.index_version = index_version
+        self.embedding_function = embedding_function
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def directory(index_path: str) -> str:
+        """Directory holding the FAQ files for a FAISS index directory."""
+        return os.path.join(index_path, "faq")
+
+    @classmethod
+    def stamp(cls, index_path: str) -> float:
+        """Modification time of the stored answers (0.0 if there are none)."""
+        try:
+            return os.path.getmtime(os.path.join(cls.directory(index_path), cls.ANSWERS_FILE))
+        except OSError:
+            return 0.0
+
+    @classmethod
+    def load(cls, index_path: str, index_version: str, embedding_function, threshold: float = 0.9) -> Optional["FAQIndex"]:
+        """Load the FAQ index stored next to a FAISS index.
+
+        Args:
+            index_path: FAISS index directory
+            index_version: Current index version; a stale FAQ index is ignored
+            embedding_function: Embeddings used to embed incoming questions
+            threshold: Minimum cosine similarity for a direct answer
+
+        Returns:
+            FAQIndex, or None when missing or built for another index version
+        """
+        directory = cls.directory(index_path)
+        answers_path = os.path.join(directory, cls.ANSWERS_FILE)
+        if not os.path.exists(answers_path):
+            return None
+        with open(answers_path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("index_version") != index_version:
+            logger.info("FAQ index in %s is for version %s, current is %s; ignoring it",
+                        directory, data.get("index_version"), index_version)
+            return None
+        vectors = np.load(os.path.join(directory, cls.VECTORS_FILE))
+        logger.info("Loaded FAQ index with %d answers (version %s)", len(data["entries"]), index_version)
+        return cls(data["entries"], vectors, index_version, embedding_function, threshold)
+
+    def save(self, index_path: str):
+        """Write answers and embeddings next to the FAISS index."""
+        directory = self.directory(index_path)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, self.VECTORS_FILE), self.vectors)
+        tmp_path = os.path.join(directory, self.ANSWERS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"index_version": self.index_version, "built_at": time.time(), "entries": self.entries}, f, indent=2)
+        # Answers last: a half-written index never matches the current version
+        os.replace(tmp_path, os.path.join(directory, self.ANSWERS_FILE))
+
+    def match(self, question: str) -> Optional[Tuple[dict, float]]:
+        """Find a stored answer whose question is close enough to `question`.
+
+        Returns:
+            (entry, similarity) for a high-confidence match, else None
+        """
+        if not len(self.entries):
+            return None
+        vector = np.asarray(self.embedding_function.embed_query(question), dtype="float32")
+        vector /= np.linalg.norm(vector) or 1.0
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+        if float(scores[best]) >= self.threshold:
+            self.hits += 1
+            return self.entries[best], float(scores[best])
+        self.misses += 1
+        return None
+
+
+def fill_placeholders(answer: str, employee: dict) -> str:
+    """Replace `{field}` placeholders with the employee's values."""
+    employee = employee or {}
+    return _PLACEHOLDER_RE.sub(lambda m: str(employee.get(m.group(1), "")), answer)
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def build_faq_index(
+    assistant_factory: Callable[[dict], object],
+    embedding_function,
+    index_path: str,
+    index_version: str,
+    questions: Optional[List[str]] = None,
+) -> FAQIndex:
+    """Run the FAQ list through the Assistant pipeline and store the answers.
+
+    Args:
+        assistant_factory: Callable (employee) -> Assistant with fresh history
+        embedding_function: Embeddings for the FAQ questions
+        index_path: FAISS index directory the FAQ belongs to
+        index_version: Version of that index
+        questions: Questions to precompute (default: FAQ_QUESTIONS)
+
+    Returns:
+        The saved FAQIndex
+    """
+    questions = questions or FAQ_QUESTIONS
+    entries = []
+    start = time.perf_counter()
+    for question in questions:
+        assistant = assistant_factory(dict(PLACEHOLDER_EMPLOYEE))
+        answer = "".join(assistant.get_response(question))
+        entries.append({"question": question, "answer": answer})
+
+    vectors = _normalize(embedding_function.embed_documents(questions))
+    faq = FAQIndex(entries, vectors, index_version, embedding_function)
+    faq.save(index_path)
+    logger.info("Built FAQ index with %d answers in %.1fs (version %s)",
+                len(entries), time.perf_counter() - start, index_version)
+    return faq
+
+
+def build_faq_for_index(
+    llm,
+    vector_store,
+    embedding_function,
+    index_path: str,
+    index_version: str,
+    questions: Optional[List[str]] = None,
+) -> Optional[FAQIndex]:
+    """Precompute FAQ answers from a freshly built index.
+
+    The FAQ is an optimisation, so a failing LLM is logged and the index is
+    published without one rather than failing the build.
+
+    Args:
+        llm: Chat model answering the FAQ questions
+        vector_store: Vector store the answers are grounded in
+        embedding_function: Embeddings for the FAQ questions
+        index_path: FAISS index directory the FAQ is stored in
+        index_version: Version of that index
+        questions: Questions to precompute (default: FAQ_QUESTIONS)
+
+    Returns:
+        The saved FAQIndex, or None if it could not be built
+    """
+    from src.models import Assistant
+    from src.utils.prompts import SYSTEM_PROMPT
+
+    def assistant_factory(employee):
+        return Assistant(system_prompt=SYSTEM_PROMPT, llm=llm, message_history=[],
+                         employee_information=employee, vector_store=vector_store)
+
+    try:
+        return build_faq_index(assistant_factory, embedding_function, index_path, index_version, questions)
+    except Exception as e:
+        logger.warning("Could not precompute FAQ answers for index version %s: %s", index_version, e)
+        return None
+
+
+def backfill_faq(registry, tenant: str, llm, questions: Optional[List[str]] = None) -> FAQIndex:
+    """Attach FAQ answers to the tenant's served index version.
+
+    Works for versions published without a FAQ and for legacy unversioned
+    indexes; a published version's manifest gets its `faq_answers` count.
+
+    Args:
+        registry: IndexRegistry the tenant is registered with
+        tenant: Tenant name
+        llm: Chat model answering the FAQ questions
+        questions: Questions to precompute (default: FAQ_QUESTIONS)
+
+    Returns:
+        The saved FAQIndex
+    """
+    from src.models import Assistant
+    from src.utils.prompts import SYSTEM_PROMPT
+
+    with registry.lease(tenant) as vector_store:
+        version = registry.index_version(tenant)
+
+        def assistant_factory(employee):
+            return Assistant(system_prompt=SYSTEM_PROMPT, llm=llm, message_history=[],
+                             employee_information=employee, vector_store=vector_store)
+
+        faq = build_faq_index(assistant_factory, registry.embedding_function, registry.index_path(tenant),
+                              version, questions)
+
+    store = registry.version_store(tenant)
+    if version in store.versions():
+        store.update_manifest(version, faq_answers=len(faq.entries))
+    return faq
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Precompute FAQ answers for an index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the FAQ index for a tenant")
+    build.add_argument("--tenant", default=None, help="Tenant name (default: settings.default_tenant)")
+    build.add_argument("--fake-llm", action="store_true", help="Use the local fake LLM instead of Groq")
+    args = parser.parse_args(argv)
+
+    from src.config import get_settings
+    from src.models import SentenceTransformersEmbeddings
+    from src.utils.index_registry import IndexRegistry
+
+    settings = get_settings()
+    tenant = args.tenant or settings.default_tenant
+    embeddings = SentenceTransformersEmbeddings(settings.embedding_model)
+    registry = IndexRegistry(embeddings, chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+                             embedding_model=settings.embedding_model, pca_dim=settings.index_pca_dim,
+                             quantization=settings.index_quantization, rescore_factor=settings.index_rescore_factor)
+    registry.register(settings.default_tenant, settings.pdf_path, settings.vectorstore_path)
+    for name, pdf_path in settings.tenants.items():
+        registry.register(name, pdf_path, os.path.join(settings.index_root, name))
+
+    if args.fake_llm:
+        from src.models.local_llm import FakeStreamingChatModel
+
+        llm = FakeStreamingChatModel(first_token_latency=0.0, token_latency=0.0)
+    else:
+        from langchain_groq import ChatGroq
+
+        llm = ChatGroq(model=settings.model_name, temperature=0.5, max_tokens=350)
+
+    faq = backfill_faq(registry, tenant, llm)
+    print(f"Stored {len(faq.entries)} FAQ answers for tenant '{tenant}' (version {faq.index_version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Per-process admission control for LLM streams, embedding work and index loads.
+
+Each kind of work gets a pool with a concurrency limit and a bounded wait
+queue. A caller that finds the queue full, or that cannot get a slot
+before its deadline, gets `Overloaded` instead of piling more work onto
+the process. Watermarks on the process's resident memory add
+back-pressure. Above the soft watermark, new work waits and pressure
+handlers (such as index eviction) run until memory drops. Above the hard
+watermark, new work is rejected outright. `status()` reports current
+usage for the UI and logs.
+"""
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from src.utils.logger import logger, log_event
+
+LLM = "llm"
+EMBEDDING = "embedding"
+INDEX_LOAD = "index_load"
+
+
+class Overloaded(RuntimeError):
+    """Work was refused because the process is at capacity."""
+
+    def __init__(self, resource: str, reason: str, retry_after: float = 2.0):
+        super().__init__(f"{resource} overloaded: {reason}")
+        self.resource = resource
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None if it cannot be measured."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class ResourcePool:
+    """Counting semaphore with a bounded queue of waiters and wait-time metrics."""
+
+    def __init__(self, name: str, limit: int, max_queue: int = 32):
+        """Initialize the pool.
+
+        Args:
+            name: Resource name used in errors and status
+            limit: Maximum concurrent holders
+            max_queue: Maximum callers waiting for a slot
+        """
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_use = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline: float) -> float:
+        """Take a slot, waiting until `deadline` (time.monotonic) at most.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            Overloaded: If the queue is full or the deadline passes
+        """
+        with self._cond:
+            if self.in_use < self.limit and not self.waiting:
+                self.in_use += 1
+                self.admitted += 1
+                return 0.0
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(self.name, f"{self.waiting} requests already queued")
+            self.waiting += 1
+            start = time.monotonic()
+            try:
+                while self.in_use >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise Overloaded(self.name, "timed out waiting for a free slot")
+                    self._cond.wait(remaining)
+                self.in_use += 1
+                self.admitted += 1
+                waited = time.monotonic() - start
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                return waited
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        """Return a slot and wake one waiter."""
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "in_use": self.in_use,
+                "limit": self.limit,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": self.total_wait / self.admitted * 1000 if self.admitted else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class ResourceGovernor:
+    """Admission control shared by every session in the process."""
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        max_queue: int = 32,
+        timeout: float = 10.0,
+        memory_soft_bytes: int = 0,
+        memory_hard_bytes: int = 0,
+        memory_probe: Callable[[], Optional[int]] = current_rss_bytes,
+        memory_check_interval: float = 0.5,
+    ):
+        """Initialize the governor.
+
+        Args:
+            limits: Resource name -> maximum concurrent holders (0 = unlimited)
+            max_queue: Callers allowed to wait per resource before new ones are rejected
+            timeout: Default seconds a caller waits for a slot or for memory to drop
+            memory_soft_bytes: RSS above which new work waits and pressure handlers run (0 = off)
+            memory_hard_bytes: RSS above which new work is rejected (0 = off)
+            memory_probe: Callable returning the current RSS in bytes
+            memory_check_interval: Seconds a memory reading is reused for
+        """
+        self.pools = {name: ResourcePool(name, limit, max_queue) for name, limit in limits.items() if limit > 0}
+        self.timeout = timeout
+        self.memory_soft_bytes = memory_soft_bytes
+        self.memory_hard_bytes = memory_hard_bytes
+        self.memory_probe = memory_probe
+        self.memory_check_interval = memory_check_interval
+        self.memory_rejections = 0
+        self.memory_deferrals = 0
+        self._pressure_handlers = []
+        self._memory = (0.0, None)  # (monotonic time, bytes)
+        self._relieved_at = 0.0
+        self._lock = threading.Lock()
+
+    def add_pressure_handler(self, handler: Callable[[], None]):
+        """Register a callable that frees memory when the soft watermark is crossed."""
+        self._pressure_handlers.append(handler)
+
+    @contextmanager
+    def admit(self, resource: str, timeout: Optional[float] = None):
+        """Hold a slot of `resource` for the duration of the block.
+
+        Args:
+            resource: Resource name, e.g. LLM, EMBEDDING or INDEX_LOAD
+            timeout: Seconds to wait before giving up (default: the governor's timeout)
+
+        Raises:
+            Overloaded: If no slot or memory headroom became available in time
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        self._wait_for_memory(resource, deadline)
+        pool = self.pools.get(resource)
+        if pool is None:
+            yield
+            return
+        waited = pool.acquire(deadline)
+        if waited > 0.1:
+            log_event("admission_wait", sampled=True, resource=resource, ms=round(waited * 1000, 1))
+        try:
+            yield
+        finally:
+            pool.release()
+
+    def stream(self, resource: str, make_stream: Callable[[], Iterable]) -> Iterator:
+        """Lazily admit a stream and hold the slot until it is exhausted or closed.
+
+        Closing the returned generator closes the underlying stream and
+        releases the slot; consumers that stop early must close it (the
+        stream coalescer does so when its own consumer goes away).
+
+        Args:
+            resource: Resource name
+            make_stream: Callable creating the stream once a slot is held
+
+        Yields:
+            Items of the stream
+        """
+        with self.admit(resource):
+            yield from make_stream()
+
+    def memory_bytes(self) -> Optional[int]:
+        """Current RSS, re-measured at most every `memory_check_interval` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            measured_at, value = self._memory
+            if value is not None and now - measured_at < self.memory_check_interval:
+                return value
+        value = self.memory_probe()
+        with self._lock:
+            self._memory = (now, value)
+        return value
+
+    def _wait_for_memory(self, resource: str, deadline: float):
+        """Reject above the hard watermark; wait for memory to drop below the soft one."""
+        if not self.memory_soft_bytes and not self.memory_hard_bytes:
+            return
+        deferred = False
+        while True:
+            rss = self.memory_bytes()
+            if rss is None:
+                return
+            if self.memory_hard_bytes and rss >= self.memory_hard_bytes:
+                self.memory_rejections += 1
+                self._relieve_pressure(rss)
+                raise Overloaded(resource, f"memory {rss / 1024 / 1024:.0f} MB above hard limit", retry_after=5.0)
+            if not self.memory_soft_bytes or rss < self.memory_soft_bytes:
+                return
+            if not deferred:
+                deferred = True
+                self.memory_deferrals += 1
+            self._relieve_pressure(rss)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.memory_rejections += 1
+                raise Overloaded(resource, f"memory {rss / 1024 / 1024:.0f} MB above soft limit", retry_after=5.0)
+            time.sleep(min(self.memory_check_interval, remaining))
+
+    def _relieve_pressure(self, rss: int):
+        """Run the pressure handlers, at most once per check interval."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._relieved_at < self.memory_check_interval:
+                return
+            self._relieved_at = now
+            self._memory = (0.0, None)  # re-measure after freeing
+        logger.warning("Memory at %.0f MB is above the soft limit; shedding caches", rss / 1024 / 1024)
+        for handler in self._pressure_handlers:
+            try:
+                handler()
+            except Exception as e:
+                logger.error("Memory pressure handler failed: %s", e)
+        gc.collect()
+
+    def status(self) -> dict:
+        """Current usage of every pool and of process memory."""
+        rss = self.memory_bytes()
+        return {
+            "memory_mb": rss / 1024 / 1024 if rss is not None else None,
+            "memory_soft_mb": self.memory_soft_bytes / 1024 / 1024,
+            "memory_hard_mb": self.memory_hard_bytes / 1024 / 1024,
+            "memory_deferrals": self.memory_deferrals,
+            "memory_rejections": self.memory_rejections,
+            "pools": {name: pool.snapshot() for name, pool in self.pools.items()},
+        }
+
+
+def create_governor(settings) -> ResourceGovernor:
+    """Build the process-wide governor from application settings."""
+    return ResourceGovernor(
+        {
+            LLM: settings.max_concurrent_llm,
+            EMBEDDING: settings.max_concurrent_embeddings,
+            INDEX_LOAD: settings.max_concurrent_index_loads,
+        },
+        max_queue=settings.admission_queue_limit,
+        timeout=settings.admission_timeout_seconds,
+        memory_soft_bytes=settings.memory_soft_limit_mb * 1024 * 1024,
+        memory_hard_bytes=settings.memory_hard_limit_mb * 1024 * 1024,
+    )
@@ -0,0 +1,428 @@
+"""
+Registry of named vector indexes for serving several knowledge bases.
+
+Each tenant (subsidiary) has its own policy PDF and index directory.
+Indexes are loaded on first use and kept resident under a memory budget;
+the least recently used ones are dropped from memory when the budget is
+exceeded and reloaded from disk on their next request.
+
+Index directories are versioned (see `src.utils.index_versions`). The
+registry re-reads a tenant's CURRENT pointer at most every
+`refresh_interval` seconds; when it has moved, the new version is loaded
+on a background thread while the old one keeps serving, and then swapped
+in between requests. Searches hold a lease on the version they started
+with, and a replaced version is released once its last lease ends.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src.utils.governor import INDEX_LOAD
+from src.utils.index_versions import IndexVersionStore, build_index_version
+from src.utils.logger import logger
+from src.utils.vectorstore import (
+    compute_index_version,
+    estimate_vectorstore_bytes,
+    index_spec,
+    load_or_build_vectorstore,
+)
+
+
+@dataclass
+class TenantIndex:
+    """Location of one tenant's knowledge base."""
+
+    name: str
+    pdf_path: str
+    index_path: str
+
+
+class IndexRegistry:
+    """Lazily loads named indexes and keeps hot ones resident under a memory budget."""
+
+    def __init__(
+        self,
+        embedding_function,
+        memory_budget_bytes: int = 512 * 1024 * 1024,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        embedding_model: str = "",
+        embedding_store=None,
+        pca_dim: int = 0,
+        quantization: str = "none",
+        rescore_factor: int = 0,
+        docstore_format: str = "compact",
+        refresh_interval: float = 5.0,
+        governor=None,
+    ):
+        """Initialize the registry.
+
+        Args:
+            embedding_function: Embedding function shared by all indexes
+            memory_budget_bytes: Approximate memory allowed for resident indexes
+            chunk_size: Chunk size used when an index has to be built
+            chunk_overlap: Chunk overlap used when an index has to be built
+            embedding_model: Embedding model name, part of each index version
+            embedding_store: Optional on-disk embedding store used for builds
+            pca_dim: PCA dimensions of stored vectors (0 = full dimension)
+            quantization: Stored vector precision: "none", "fp16" or "int8"
+            rescore_factor: Exact re-ranking of rescore_factor * k candidates (0 = off)
+            docstore_format: "compact" or "pickle" docstore for newly built indexes
+            refresh_interval: Seconds between checks for a newly published version (0 = never)
+            governor: Optional ResourceGovernor limiting concurrent index loads and builds
+        """
+        self.embedding_function = embedding_function
+        self.memory_budget_bytes = memory_budget_bytes
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embedding_model = embedding_model
+        self.embedding_store = embedding_store
+        self.pca_dim = pca_dim
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.docstore_format = docstore_format
+        self.refresh_interval = refresh_interval
+        self.governor = governor
+
+        self._tenants: Dict[str, TenantIndex] = {}
+        self._resident: OrderedDict = OrderedDict()  # name -> (vectorstore, bytes, version)
+        self._versions: Dict[str, str] = {}  # computed versions of unversioned indexes
+        self._checked: Dict[str, float] = {}  # name -> monotonic time of last CURRENT check
+        self._swapping: set = set()
+        self._leases: Dict[int, int] = {}  # id(vectorstore) -> active leases
+        self._retired: Dict[int, tuple] = {}  # id(vectorstore) -> (name, version, vectorstore)
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, pdf_path: str, index_path: str):
+        """Register a tenant without loading its index.
+
+        Args:
+            name: Tenant name
+            pdf_path: Path to the tenant's policy PDF
+            index_path: Directory for the tenant's persisted FAISS index
+        """
+        with self._lock:
+            self._tenants[name] = TenantIndex(name, pdf_path, index_path)
+            self._load_locks.setdefault(name, threading.Lock())
+        logger.info("Registered tenant index '%s' (%s)", name, index_path)
+
+    def tenants(self) -> list:
+        """Names of all registered tenants."""
+        return list(self._tenants)
+
+    def get(self, name: str):
+        """Return the tenant's vector store, loading it if it is not resident.
+
+        Callers that search repeatedly should prefer `lease`, which keeps a
+        replaced version's memory accounted for until they are done.
+
+        Args:
+            name: Tenant name
+
+        Returns:
+            FAISS vector store for the tenant
+        """
+        return self._acquire(name, lease=False)
+
+    @contextmanager
+    def lease(self, name: str):
+        """Hold the tenant's current vector store for the duration of a search.
+
+        Args:
+            name: Tenant name
+
+        Yields:
+            FAISS vector store for the tenant
+        """
+        vectorstore = self._acquire(name, lease=True)
+        try:
+            yield vectorstore
+        finally:
+            self._release(vectorstore)
+
+    def _acquire(self, name: str, lease: bool):
+        """Return the resident vector store, loading it if needed, optionally leased."""
+        with self._lock:
+            vectorstore = self._touch(name, lease)
+            if vectorstore is not None:
+                due = self._refresh_due(name)
+            elif name not in self._tenants:
+                raise KeyError(f"Unknown tenant index: {name}")
+            else:
+                tenant = self._tenants[name]
+                load_lock = self._load_locks[name]
+        if vectorstore is not None:
+            if due:
+                self._check_current(name)
+            return vectorstore
+
+        # Load outside the registry lock so other tenants keep being served
+        with load_lock:
+            with self._lock:
+                vectorstore = self._touch(name, lease)
+                if vectorstore is not None:
+                    return vectorstore
+
+            with self._admit():
+                vectorstore, version = self._load(tenant)
+            size = estimate_vectorstore_bytes(vectorstore)
+            logger.info("Loaded tenant index '%s' version %s (~%.1f MB)", name, version, size / 1024 / 1024)
+
+            with self._lock:
+                self._resident[name] = (vectorstore, size, version)
+                self._checked[name] = time.monotonic()
+                if lease:
+                    self._leases[id(vectorstore)] = self._leases.get(id(vectorstore), 0) + 1
+                self._evict(keep=name)
+            return vectorstore
+
+    def _touch(self, name: str, lease: bool):
+        """Mark a resident index as recently used; caller holds the lock."""
+        entry = self._resident.get(name)
+        if entry is None:
+            return None
+        self._resident.move_to_end(name)
+        vectorstore = entry[0]
+        if lease:
+            self._leases[id(vectorstore)] = self._leases.get(id(vectorstore), 0) + 1
+        return vectorstore
+
+    def _release(self, vectorstore):
+        """End a lease; frees a replaced version when its last lease ends."""
+        key = id(vectorstore)
+        with self._lock:
+            remaining = self._leases.get(key, 1) - 1
+            if remaining:
+                self._leases[key] = remaining
+                return
+            self._leases.pop(key, None)
+            retired = self._retired.pop(key, None)
+        if retired is not None:
+            logger.info("Released version %s of tenant index '%s'", retired[1], retired[0])
+
+    def _retire(self, name: str, entry: tuple):
+        """Drop a replaced or evicted index once no search is using it; caller holds the lock.
+
+        The vector store is not closed explicitly: callers of `get` may still
+        hold it, and its memory is reclaimed once the last reference goes.
+        """
+        vectorstore, _, version = entry
+        if self._leases.get(id(vectorstore)):
+            self._retired[id(vectorstore)] = (name, version, vectorstore)
+        else:
+            logger.info("Released version %s of tenant index '%s'", version, name)
+
+    def _refresh_due(self, name: str) -> bool:
+        """Whether the tenant's CURRENT pointer should be re-read; caller holds the lock."""
+        if not self.refresh_interval or name in self._swapping:
+            return False
+        now = time.monotonic()
+        if now - self._checked.get(name, 0.0) < self.refresh_interval:
+            return False
+        self._checked[name] = now
+        return True
+
+    def _check_current(self, name: str):
+        """Start loading a newly published version in the background."""
+        current = IndexVersionStore(self._tenants[name].index_path).current()
+        with self._lock:
+            entry = self._resident.get(name)
+            if current is None or entry is None or entry[2] == current or name in self._swapping:
+                return
+            self._swapping.add(name)
+        logger.info("Tenant index '%s' has a new version %s; loading in background", name, current)
+        ctx = contextvars.copy_context()  # keep the request ID on log records
+        threading.Thread(
+            target=ctx.run, args=(self._swap_in, name, current), daemon=True, name=f"index-swap-{name}"
+        ).start()
+
+    def _swap_in(self, name: str, version: str):
+        """Load `version` and make it the tenant's served index; the old one keeps serving until then."""
+        tenant = self._tenants[name]
+        try:
+            with self._load_locks[name]:
+                with self._admit():
+                    vectorstore = self._open(tenant, IndexVersionStore(tenant.index_path).version_path(version))
+                size = estimate_vectorstore_bytes(vectorstore)
+                with self._lock:
+                    previous = self._resident.get(name)
+                    self._resident[name] = (vectorstore, size, version)
+                    self._resident.move_to_end(name)
+                    if previous is not None:
+                        self._retire(name, previous)
+                    self._evict(keep=name)
+            logger.info("Swapped tenant index '%s' to version %s (~%.1f MB)", name, version, size / 1024 / 1024)
+        except Exception as e:
+            logger.error("Could not load version %s of tenant index '%s'; still serving the previous one: %s",
+                         version, name, e)
+        finally:
+            with self._lock:
+                self._swapping.discard(name)
+
+    def _admit(self):
+        """Hold an index-load slot from the governor, if one is configured."""
+        if self.governor is None:
+            return nullcontext()
+        return self.governor.admit(INDEX_LOAD)
+
+    def _load(self, tenant: TenantIndex):
+        """Open the tenant's served version, building the first one if there is none.
+
+        Returns:
+            Tuple of (vector store, version id)
+        """
+        store = IndexVersionStore(tenant.index_path)
+        version = store.current()
+        if version is None and not store.has_legacy_index():
+            version = self._build(tenant)
+        if version is None:
+            # Unversioned index written before versioning was introduced
+            return self._open(tenant, tenant.index_path), self._computed_version(tenant)
+        return self._open(tenant, store.version_path(version)), version
+
+    def _open(self, tenant: TenantIndex, path: str):
+        """Open a persisted index directory with the registry's search settings."""
+        if not os.path.exists(os.path.join(path, "index.faiss")):
+            raise FileNotFoundError(f"No index at {path}")
+        return load_or_build_vectorstore(
+            tenant.pdf_path,
+            path,
+            self.embedding_function,
+            embedding_store=self.embedding_store,
+            pca_dim=self.pca_dim,
+            quantization=self.quantization,
+            rescore_factor=self.rescore_factor,
+        )
+
+    def _build(self, tenant: TenantIndex) -> str:
+        """Build the tenant's PDF as a new version and point CURRENT at it."""
+        return build_index_version(
+            tenant.pdf_path,
+            tenant.index_path,
+            self.embedding_function,
+            self.embedding_model,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            embedding_store=self.embedding_store,
+            pca_dim=self.pca_dim,
+            quantization=self.quantization,
+            docstore_format=self.docstore_format,
+        )
+
+    def rebuild(self, name: str, background: bool = True) -> threading.Thread:
+        """Rebuild the tenant's index as a new version and serve it once loaded.
+
+        Requests keep using the current version while the build runs.
+
+        Args:
+            name: Tenant name
+            background: Return immediately instead of waiting for the build
+
+        Returns:
+            The build thread
+        """
+        tenant = self._tenants[name]
+
+        def run():
+            try:
+                with self._admit():
+                    version = self._build(tenant)
+            except Exception as e:
+                logger.error("Rebuild of tenant index '%s' failed: %s", name, e)
+                return
+            logger.info("Rebuilt tenant index '%s' as version %s", name, version)
+            with self._lock:
+                resident = name in self._resident
+            if resident:
+                self._check_current(name)
+
+        ctx = contextvars.copy_context()
+        thread = threading.Thread(target=ctx.run, args=(run,), daemon=True, name=f"index-rebuild-{name}")
+        thread.start()
+        if not background:
+            thread.join()
+        return thread
+
+    def version_store(self, name: str) -> IndexVersionStore:
+        """Published versions of the tenant's index."""
+        return IndexVersionStore(self._tenants[name].index_path)
+
+    def index_path(self, name: str) -> str:
+        """Directory of the tenant's served index version."""
+        tenant = self._tenants[name]
+        path = IndexVersionStore(tenant.index_path).version_path(self.index_version(name))
+        return path if os.path.isdir(path) else tenant.index_path
+
+    def index_version(self, name: str) -> str:
+        """Version id of the tenant's served index.
+
+        This is the resident version if the index is loaded, otherwise the
+        published one, so it changes as soon as a new version is swapped in.
+        """
+        with self._lock:
+            entry = self._resident.get(name)
+        if entry is not None:
+            return entry[2]
+        tenant = self._tenants[name]
+        return IndexVersionStore(tenant.index_path).current() or self._computed_version(tenant)
+
+    def _computed_version(self, tenant: TenantIndex) -> str:
+        """Version id derived from the tenant's PDF and build settings."""
+        if tenant.name not in self._versions:
+            self._versions[tenant.name] = compute_index_version(
+                tenant.pdf_path, self.embedding_model, self.chunk_size, self.chunk_overlap, self.index_spec()
+            )
+        return self._versions[tenant.name]
+
+    def index_spec(self) -> str:
+        """Storage options that change the on-disk index format ("" for a flat float32 index)."""
+        return index_spec(self.pca_dim, self.quantization)
+
+    def evict(self, name: str):
+        """Drop a tenant's index from memory; it reloads from disk on next use."""
+        with self._lock:
+            entry = self._resident.pop(name, None)
+            if entry is not None:
+                logger.info("Evicted tenant index '%s'", name)
+                self._retire(name, entry)
+
+    def trim(self, keep: int = 1):
+        """Drop all but the `keep` most recently used indexes from memory, e.g. under memory pressure."""
+        with self._lock:
+            while len(self._resident) > keep:
+                name, entry = self._resident.popitem(last=False)
+                logger.info("Evicted tenant index '%s' to relieve memory pressure", name)
+                self._retire(name, entry)
+
+    def _evict(self, keep: Optional[str] = None):
+        """Drop least recently used indexes until within the memory budget."""
+        while self.resident_bytes() > self.memory_budget_bytes and len(self._resident) > 1:
+            name = next(iter(self._resident))
+            if name == keep:
+                break
+            entry = self._resident.pop(name)
+            logger.info("Evicted tenant index '%s' to stay within memory budget", name)
+            self._retire(name, entry)
+
+    def resident_bytes(self) -> int:
+        """Estimated memory held by resident indexes."""
+        return sum(entry[1] for entry in self._resident.values())
+
+    def stats(self) -> dict:
+        """Report registered and resident tenants, their versions and memory use."""
+        with self._lock:
+            return {
+                "registered": len(self._tenants),
+                "resident": list(self._resident),
+                "versions": {name: entry[2] for name, entry in self._resident.items()},
+                "retired_pending": len(self._retired),
+                "active_leases": sum(self._leases.values()),
+                "resident_bytes": self.resident_bytes(),
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
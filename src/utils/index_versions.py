@@ -0,0 +1,301 @@
+"""
+Versioned index directories with an atomically switched CURRENT pointer.
+
+Layout of a tenant's index directory::
+
+    <index_path>/
+        CURRENT                  # id of the version being served
+        versions/<version>/      # index.faiss, docstore.bin, manifest.json, faq/
+
+A rebuild writes a complete new version next to the served one and then
+replaces CURRENT in a single rename, so readers never see a half-built
+index. Running processes notice the new pointer through `IndexRegistry`
+and swap it in between requests. Older versions stay on disk for rollback
+until pruned.
+
+Usage:
+    python -m src.utils.index_versions build [--tenant NAME] [--prune 3] [--faq-llm groq]
+    python -m src.utils.index_versions list [--tenant NAME]
+    python -m src.utils.index_versions activate VERSION [--tenant NAME]
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+from src.utils.logger import logger
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+VERSIONS_DIR = "versions"
+
+
+class IndexVersionStore:
+    """Versions of one tenant's index and the pointer to the served one."""
+
+    def __init__(self, root: str):
+        """Initialize the store.
+
+        Args:
+            root: Tenant index directory
+        """
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+
+    def current(self) -> Optional[str]:
+        """Version named by CURRENT, or None if nothing has been published."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def version_path(self, version: str) -> str:
+        """Directory of a version."""
+        return os.path.join(self.versions_dir, version)
+
+    def has_legacy_index(self) -> bool:
+        """Whether the directory holds an unversioned index from before versioning."""
+        return os.path.exists(os.path.join(self.root, "index.faiss"))
+
+    def manifest(self, version: str) -> dict:
+        """Build manifest of a version."""
+        with open(os.path.join(self.version_path(version), MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        found = []
+        for name in os.listdir(self.versions_dir):
+            if name.startswith("."):
+                continue  # build in progress
+            try:
+                found.append((self.manifest(name).get("built_at", 0), name))
+            except (OSError, ValueError):
+                continue
+        return [name for _, name in sorted(found)]
+
+    def set_current(self, version: str):
+        """Point CURRENT at `version` with an atomic rename."""
+        if not os.path.isdir(self.version_path(version)):
+            raise ValueError(f"Unknown index version: {version}")
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), version)
+        logger.info("Index %s now serves version %s", self.root, version)
+
+    def update_manifest(self, version: str, **fields) -> dict:
+        """Merge fields into a published version's manifest.
+
+        Used for artifacts attached after publishing, such as a backfilled FAQ.
+
+        Returns:
+            The updated manifest
+        """
+        manifest = self.manifest(version)
+        manifest.update(fields)
+        _write_atomic(os.path.join(self.version_path(version), MANIFEST_FILE), json.dumps(manifest, indent=2))
+        return manifest
+
+    def build(self, version: str, builder: Callable[[str], dict]) -> str:
+        """Build a version into a staging directory and publish it.
+
+        Args:
+            version: Version id
+            builder: Callable (directory) -> manifest fields; writes the index files
+
+        Returns:
+            Directory of the published version
+        """
+        final_path = self.version_path(version)
+        if os.path.isdir(final_path):
+            logger.info("Index version %s already exists", version)
+            return final_path
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.versions_dir, prefix=f".{version}.")
+        os.chmod(staging, 0o755)
+        try:
+            start = time.perf_counter()
+            manifest = {"version": version, **builder(staging)}
+            manifest.update(built_at=time.time(), build_seconds=round(time.perf_counter() - start, 2))
+            with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging, final_path)
+        except OSError:
+            if not os.path.isdir(final_path):
+                raise
+            # Another process published the same version first
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return final_path
+
+    def prune(self, keep: int = 3) -> List[str]:
+        """Delete the oldest versions beyond `keep`, never the current one.
+
+        Returns:
+            Versions removed
+        """
+        current = self.current()
+        candidates = [v for v in self.versions() if v != current]
+        removed = candidates[: max(0, len(candidates) - (keep - 1))]
+        for version in removed:
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+            logger.info("Pruned index version %s from %s", version, self.root)
+        return removed
+
+
+def _write_atomic(path: str, text: str):
+    """Replace `path` with `text` through a rename, never exposing a partial file."""
+    # Unique per call, so concurrent writers (threads or processes) never share a temp file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def build_index_version(
+    pdf_path: str,
+    index_path: str,
+    embedding_function,
+    embedding_model: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    embedding_store=None,
+    pca_dim: int = 0,
+    quantization: str = "none",
+    docstore_format: str = "compact",
+    faq_llm=None,
+    activate: bool = True,
+) -> str:
+    """Build the index for the PDF as a new version and optionally serve it.
+
+    Versions are content-addressed: rebuilding an unchanged PDF with the
+    same settings reuses the existing version.
+
+    Args:
+        pdf_path: Path to the source PDF
+        index_path: Tenant index directory
+        embedding_function: Embedding function instance to use
+        embedding_model: Embedding model name, part of the version id
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+        embedding_store: Optional on-disk store consulted before calling the model
+        pca_dim: PCA dimensions of stored vectors (0 = full dimension)
+        quantization: Stored vector precision: "none", "fp16" or "int8"
+        docstore_format: "compact" or "pickle"
+        faq_llm: Chat model precomputing the FAQ answers stored with the version (None = no
+            FAQ). This makes one LLM call per FAQ question, so only offline builds pass it;
+            `python -m src.utils.faq build` attaches a FAQ to an existing version later.
+        activate: Point CURRENT at the new version when done
+
+    Returns:
+        Version id
+    """
+    from src.utils.vectorstore import compute_index_version, index_spec, load_or_build_vectorstore
+
+    spec = index_spec(pca_dim, quantization)
+    version = compute_index_version(pdf_path, embedding_model, chunk_size, chunk_overlap, spec)
+
+    def builder(directory: str) -> dict:
+        vectorstore = load_or_build_vectorstore(
+            pdf_path, directory, embedding_function,
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, embedding_store=embedding_store,
+            pca_dim=pca_dim, quantization=quantization, docstore_format=docstore_format,
+        )
+        if not os.path.exists(os.path.join(directory, "index.faiss")):
+            raise RuntimeError(f"Index build for {pdf_path} did not produce index.faiss")
+        manifest = {
+            "pdf_path": pdf_path,
+            "embedding_model": embedding_model,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "index_spec": spec,
+            "docstore_format": docstore_format,
+            "chunks": vectorstore.index.ntotal,
+        }
+        if faq_llm is not None:
+            from src.utils.faq import build_faq_for_index
+
+            faq = build_faq_for_index(faq_llm, vectorstore, embedding_function, directory, version)
+            manifest["faq_answers"] = len(faq.entries) if faq is not None else 0
+        return manifest
+
+    store = IndexVersionStore(index_path)
+    store.build(version, builder)
+    if activate and store.current() != version:
+        store.set_current(version)
+    return version
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    from src.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Manage versioned policy indexes.")
+    parser.add_argument("--tenant", default=settings.default_tenant)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the tenant's PDF as a new version and serve it")
+    build.add_argument("--prune", type=int, default=0, help="Afterwards keep only this many versions")
+    build.add_argument("--faq-llm", choices=["groq", "fake", "none"], default="none",
+                       help="Model precomputing FAQ answers for the new version (default: no FAQ)")
+    sub.add_parser("list", help="List versions")
+    activate = sub.add_parser("activate", help="Serve an existing version (e.g. roll back)")
+    activate.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.tenant == settings.default_tenant:
+        pdf_path, index_path = settings.pdf_path, settings.vectorstore_path
+    else:
+        pdf_path, index_path = settings.tenants[args.tenant], os.path.join(settings.index_root, args.tenant)
+    store = IndexVersionStore(index_path)
+
+    if args.command == "build":
+        from src.models import SentenceTransformersEmbeddings
+        from src.utils.embedding_store import EmbeddingStore
+
+        faq_llm = None
+        if args.faq_llm == "fake":
+            from src.models.local_llm import FakeStreamingChatModel
+
+            faq_llm = FakeStreamingChatModel()
+        elif args.faq_llm == "groq":
+            from langchain_groq import ChatGroq
+
+            faq_llm = ChatGroq(model=settings.model_name, api_key=settings.groq_api_key, temperature=0.5, max_tokens=350)
+        version = build_index_version(
+            pdf_path, index_path, SentenceTransformersEmbeddings(settings.embedding_model), settings.embedding_model,
+            chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+            embedding_store=EmbeddingStore.for_model(settings.embedding_store_path, settings.embedding_model),
+            pca_dim=settings.index_pca_dim, quantization=settings.index_quantization,
+            docstore_format=settings.docstore_format, faq_llm=faq_llm,
+        )
+        print(f"Serving version {version} for tenant '{args.tenant}'")
+        if args.prune:
+            store.prune(args.prune)
+    elif args.command == "activate":
+        store.set_current(args.version)
+        print(f"Serving version {args.version} for tenant '{args.tenant}'")
+    else:
+        current = store.current()
+        for version in store.versions():
+            manifest = store.manifest(version)
+            built = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest.get("built_at", 0)))
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {built}  {manifest.get('chunks', '?'):>6} chunks  {manifest.get('index_spec') or 'flat'}")
+
+
+if __name__ == "__main__":
+    main()
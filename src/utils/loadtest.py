@@ -0,0 +1,248 @@
+"""
+Load generator simulating many concurrent onboarding sessions.
+
+Drives `Assistant.get_response` with synthetic employees, a scripted
+question mix and a local fake LLM, stepping up concurrency and reporting
+throughput, latency percentiles, memory growth and error rate per level.
+
+Usage:
+    python -m src.utils.loadtest --levels 1,10,50,100,250,500 --questions 3
+"""
+import argparse
+import os
+import random
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+
+from src.utils.logger import logger
+
+# Scripted question mix with relative weights
+QUESTION_MIX = [
+    ("Hey! How's my first day going to look?", 3),
+    ("What's the dress code policy?", 4),
+    ("What are the password requirements?", 3),
+    ("How do I report a security incident?", 2),
+    ("What are my responsibilities in my position?", 3),
+    ("Tell me about the company history", 1),
+    ("What happens if I break the code of conduct?", 2),
+    ("How do I handle confidential information?", 2),
+    ("What's the weather today?", 1),
+]
+
+
+@dataclass
+class LevelResult:
+    """Measurements for one concurrency level."""
+
+    concurrency: int
+    requests: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    first_token: List[float] = field(default_factory=list)
+    rss_start_mb: float = 0.0
+    rss_end_mb: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return (self.requests - self.errors) / self.seconds if self.seconds else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentile(self, values: List[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        # Peak RSS is the best portable fallback (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def pick_questions(count: int, rng: random.Random) -> List[str]:
+    """Draw questions from the weighted mix."""
+    questions, weights = zip(*QUESTION_MIX)
+    return rng.choices(questions, weights=weights, k=count)
+
+
+def run_session(assistant_factory, employee: dict, questions: List[str], result: LevelResult, lock):
+    """Run one onboarding session: ask each question and record timings."""
+    from src.utils.prompts import WELCOME_MESSAGE
+
+    messages = [{"role": "ai", "content": WELCOME_MESSAGE}]
+    try:
+        assistant = assistant_factory(employee, messages)
+    except Exception as e:
+        logger.debug("Load test session could not start: %s", e)
+        with lock:
+            result.requests += len(questions)
+            result.errors += len(questions)
+        return
+    for question in questions:
+        start = time.perf_counter()
+        first = None
+        try:
+            parts = []
+            for chunk in assistant.get_response(question):
+                if first is None:
+                    first = time.perf_counter() - start
+                parts.append(chunk)
+            elapsed = time.perf_counter() - start
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "ai", "content": "".join(parts)})
+            with lock:
+                result.requests += 1
+                result.latencies.append(elapsed)
+                result.first_token.append(first if first is not None else elapsed)
+        except Exception as e:
+            logger.debug("Load test request failed: %s", e)
+            with lock:
+                result.requests += 1
+                result.errors += 1
+
+
+def run_level(assistant_factory, employees: List[dict], concurrency: int, questions_per_session: int, seed: int = 0) -> LevelResult:
+    """Run `concurrency` simultaneous sessions and collect measurements.
+
+    Args:
+        assistant_factory: Callable (employee, message_history) -> Assistant
+        employees: Synthetic employee records to draw sessions from
+        concurrency: Number of sessions running at once
+        questions_per_session: Questions asked in each session
+        seed: Seed for the question mix
+
+    Returns:
+        LevelResult for this level
+    """
+    import threading
+
+    rng = random.Random(seed + concurrency)
+    result = LevelResult(concurrency=concurrency, rss_start_mb=current_rss_mb())
+    lock = threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for i in range(concurrency):
+            employee = employees[i % len(employees)]
+            questions = pick_questions(questions_per_session, rng)
+            futures.append((pool.submit(run_session, assistant_factory, employee, questions, result, lock), questions))
+        for future, questions in futures:
+            error = future.exception()
+            if error is not None:
+                # run_session records its own failures; anything reaching here is a harness bug
+                logger.error("Load test session crashed: %s", error)
+                with lock:
+                    result.requests += len(questions)
+                    result.errors += len(questions)
+    result.seconds = time.perf_counter() - start
+    result.rss_end_mb = current_rss_mb()
+    return result
+
+
+def format_report(results: List[LevelResult]) -> str:
+    """Render level results as a text table and name the saturation point."""
+    header = (
+        f"{'conc':>6} {'reqs':>6} {'req/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+        f"{'ttft p95':>9} {'err %':>6} {'rss MB':>8} {'Δrss MB':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.concurrency:>6} {r.requests:>6} {r.throughput:>8.2f} "
+            f"{r.percentile(r.latencies, 50):>7.2f} {r.percentile(r.latencies, 95):>7.2f} "
+            f"{r.percentile(r.latencies, 99):>7.2f} {r.percentile(r.first_token, 95):>9.2f} "
+            f"{r.error_rate * 100:>6.1f} {r.rss_end_mb:>8.1f} {r.rss_end_mb - r.rss_start_mb:>8.1f}"
+        )
+
+    saturation = find_saturation(results)
+    if saturation is not None:
+        lines.append(f"\nSaturation point: ~{saturation.concurrency} concurrent sessions "
+                     f"({saturation.throughput:.2f} req/s)")
+    return "\n".join(lines)
+
+
+def find_saturation(results: List[LevelResult], min_gain: float = 0.05, max_error_rate: float = 0.01):
+    """Return the last level before throughput stops growing or errors appear."""
+    best = None
+    for r in results:
+        if r.error_rate > max_error_rate:
+            break
+        if best is not None and r.throughput < best.throughput * (1 + min_gain):
+            break
+        best = r
+    return best
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Simulate concurrent onboarding sessions.")
+    parser.add_argument("--levels", default="1,10,50,100", help="Comma-separated concurrency levels")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per session")
+    parser.add_argument("--employees", type=int, default=500, help="Synthetic employees to generate")
+    parser.add_argument("--first-token-ms", type=float, default=200.0, help="Fake LLM time to first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="Fake LLM latency per token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake LLM failure probability")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from src.config import get_settings
+    from src.data import generate_employee_data
+    from src.models import Assistant, SentenceTransformersEmbeddings
+    from src.models.local_llm import FakeStreamingChatModel
+    from src.utils.prompts import SYSTEM_PROMPT
+    from src.utils.vectorstore import load_or_build_vectorstore
+
+    settings = get_settings()
+    embeddings = SentenceTransformersEmbeddings(
+        model_name=settings.embedding_model,
+        batch_window_ms=settings.embedding_batch_window_ms,
+        max_batch=settings.embedding_max_batch,
+        queue_depth=settings.embedding_queue_depth,
+    )
+    vector_store = load_or_build_vectorstore(
+        settings.pdf_path, settings.vectorstore_path, embeddings,
+        chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+    )
+    llm = FakeStreamingChatModel(
+        first_token_latency=args.first_token_ms / 1000,
+        token_latency=args.token_ms / 1000,
+        error_rate=args.error_rate,
+    )
+    employees = generate_employee_data(args.employees)
+
+    def assistant_factory(employee, messages):
+        return Assistant(
+            system_prompt=SYSTEM_PROMPT,
+            llm=llm,
+            message_history=messages,
+            employee_information=employee,
+            vector_store=vector_store,
+        )
+
+    results = []
+    for level in (int(x) for x in args.levels.split(",")):
+        result = run_level(assistant_factory, employees, level, args.questions, seed=args.seed)
+        logger.info("Load level %d: %.2f req/s, p95 %.2fs, errors %.1f%%", level, result.throughput,
+                    result.percentile(result.latencies, 95), result.error_rate * 100)
+        results.append(result)
+
+    print(format_report(results))
+    if embeddings.query_batcher is not None:
+        print(f"\nEmbedding micro-batching: {embeddings.batching_metrics()}")
+
+
+if __name__ == "__main__":
+    main()
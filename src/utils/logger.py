@@ -6,13 +6,103 @@ Provides professional logging with:
 - Console output with color coding
 - Structured format with timestamps, levels, module names, and line numbers
 - Automatic log rotation to prevent large files
+- Non-blocking writes: records are queued and written by a background thread
+- Optional JSON records carrying the current request ID
+- Level-guarded, sampled event logging for high-volume hot-path lines
 """
 
+import atexit
+import contextvars
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import uuid
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import sys
 
+# Request ID of the query currently being handled (per thread / async task)
+_request_id = contextvars.ContextVar("request_id", default="-")
+
+# Fraction of sampled hot-path INFO events that are actually emitted
+_sample_rate = 1.0
+
+_listeners = []
+
+# Renders tracebacks on the logging thread before records are queued
+_exception_formatter = logging.Formatter()
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request ID to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves most formatting to the listener thread.
+    
+    The stock QueueHandler runs the full formatter on the calling thread.
+    Here only what cannot safely wait is rendered before queueing: %-args
+    (which may be mutated after the call) and exception info (whose
+    traceback would keep every frame alive). Line layout, timestamps and
+    JSON encoding happen off the request path.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not record.args and not record.exc_info:
+            return record
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "func": record.funcName,
+            "line": record.lineno,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class _EventMessage:
+    """Message object rendered only when a handler formats the record."""
+
+    def __init__(self, event: str, fields: dict):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        if not self.fields:
+            return self.event
+        return self.event + " " + " ".join(f"{k}={v}" for k, v in self.fields.items())
+
 
 def setup_logger(
     name: str = "ClientOnboarding",
@@ -20,6 +110,8 @@ def setup_logger(
     level: int = logging.INFO,
     max_bytes: int = 10 * 1024 * 1024,  # 10MB
     backup_count: int = 5,
+    json_format: bool = False,
+    use_queue: bool = True,
 ) -> logging.Logger:
     """
     Configure and return a logger with file and console handlers.
@@ -30,6 +122,8 @@ def setup_logger(
         level: Logging level (default: INFO)
         max_bytes: Max size per log file before rotation (default: 10MB)
         backup_count: Number of backup log files to keep (default: 5)
+        json_format: Write one JSON object per record (default: False)
+        use_queue: Hand records to a background writer thread (default: True)
     
     Returns:
         Configured logger instance
@@ -49,9 +143,11 @@ def setup_logger(
     
     # Professional format with timestamp, level, module, function, line number, and message
     file_formatter = logging.Formatter(
-        fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(module)s:%(funcName)s:%(lineno)d | %(message)s',
+        fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(module)s:%(funcName)s:%(lineno)d | %(request_id)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
+    if json_format:
+        file_formatter = JsonFormatter()
     
     # Console format (slightly cleaner for readability)
     console_formatter = logging.Formatter(
@@ -68,7 +164,19 @@ def setup_logger(
     )
     file_handler.setLevel(level)
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    
+    if use_queue:
+        # Request threads only enqueue; file I/O happens on the listener thread
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+        logger.addHandler(queue_handler)
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+    else:
+        file_handler.addFilter(RequestContextFilter())
+        logger.addHandler(file_handler)
     
     # Prevent propagation to root logger
     logger.propagate = False
@@ -76,10 +184,79 @@ def setup_logger(
     return logger
 
 
+@atexit.register
+def _stop_listeners():
+    """Flush queued records before the interpreter exits."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
 # Create singleton logger instance for the application
 logger = setup_logger()
 
 
+def new_request_id() -> str:
+    """Generate a short random request ID."""
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def request_context(request_id: str = None):
+    """Tag every record logged inside the block with a request ID.
+    
+    Args:
+        request_id: ID to use (a new one is generated if omitted)
+    
+    Yields:
+        The request ID in effect
+    """
+    token = _request_id.set(request_id or new_request_id())
+    try:
+        yield _request_id.get()
+    finally:
+        _request_id.reset(token)
+
+
+def configure_sampling(rate: float):
+    """Set the fraction of sampled hot-path events that are emitted (0.0 - 1.0)."""
+    global _sample_rate
+    _sample_rate = max(0.0, min(1.0, rate))
+
+
+def use_json_format():
+    """Switch the application's file output to JSON records."""
+    for listener in _listeners:
+        for handler in listener.handlers:
+            handler.setFormatter(JsonFormatter())
+    for handler in logger.handlers:
+        if not isinstance(handler, QueueHandler):
+            handler.setFormatter(JsonFormatter())
+
+
+def log_event(event: str, level: int = logging.INFO, sampled: bool = False, log: logging.Logger = None, **fields):
+    """Log a structured event without paying for it when it is filtered out.
+    
+    The level check and sampling decision happen before any field is
+    evaluated; callables in `fields` are only called once the event is
+    known to be emitted, and the message itself is rendered by the
+    handler thread.
+    
+    Args:
+        event: Short event name
+        level: Logging level (default: INFO)
+        sampled: Apply the configured hot-path sample rate
+        log: Logger to use (default: application logger)
+        **fields: Structured fields; values may be zero-argument callables
+    """
+    log = log or logger
+    if not log.isEnabledFor(level):
+        return
+    if sampled and _sample_rate < 1.0 and random.random() >= _sample_rate:
+        return
+    fields = {k: (v() if callable(v) else v) for k, v in fields.items()}
+    log.log(level, _EventMessage(event, fields), extra={"fields": fields}, stacklevel=2)
+
+
 def get_logger(module_name: str = None) -> logging.Logger:
     """
     Get a logger instance for a specific module.
@@ -0,0 +1,216 @@
+"""
+Measure how much of each prompt a prefix (KV) cache can reuse under each prompt layout.
+
+Scripted multi-turn conversations for several employees run through the
+Assistant with real retrieval. Turns are interleaved across employees the
+way concurrent users arrive. The LLM is a local stand-in that tokenizes
+every prompt, matches it against the prompts it has seen (one cache slot
+per recent prompt, like a serving engine's prefix cache), and delays the
+first token by a prefill cost for each token it could not reuse. The
+report shows prompt tokens, reusable prefix tokens and time to first
+token for the "inline" and "prefix" layouts.
+
+Tokens come from tiktoken's cl100k_base when it is installed, otherwise
+from a word/punctuation approximation.
+
+Usage:
+    python -m src.utils.prompt_cache [--employees 4] [--prefill-us 150] [--slots 16]
+"""
+import argparse
+import re
+import statistics
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+from pydantic import PrivateAttr
+
+from src.models.local_llm import FakeStreamingChatModel
+from src.utils.logger import logger
+
+# Follow-up conversations, one per simulated employee (cycled)
+CONVERSATIONS = [
+    ["How many vacation days do I get?", "What about sick leave?", "Who approves it?"],
+    ["What's the dress code in the labs?", "Do I need PPE?", "Where do I pick it up?"],
+    ["How do I report a security incident?", "What counts as an incident?", "Is it anonymous?"],
+    ["When is payday?", "How do I set up direct deposit?", "Who do I ask about my payslip?"],
+]
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s+")
+
+
+def tokenize(text: str) -> list:
+    """Split text into tokens (tiktoken ids, or approximate word/punctuation tokens)."""
+    if _ENCODING is not None:
+        return _ENCODING.encode(text)
+    return _TOKEN_PATTERN.findall(text)
+
+
+def render_messages(messages: List[BaseMessage]) -> str:
+    """Flatten chat messages the way a chat template concatenates them."""
+    return "".join(f"<|{message.type}|>\n{message.content}\n" for message in messages)
+
+
+def common_prefix(a: list, b: list) -> int:
+    """Length of the common prefix of two token sequences."""
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+class PrefixCachingChatModel(FakeStreamingChatModel):
+    """Fake chat model whose first-token latency depends on the uncached prompt tokens.
+
+    Keeps the token sequences of the last `slots` prompts; each new prompt
+    reuses its longest common prefix with any of them and pays
+    `prefill_per_token` seconds for every remaining token.
+    """
+
+    prefill_per_token: float = 0.00015
+    slots: int = 16
+
+    _cache: list = PrivateAttr(default_factory=list)
+    _requests: list = PrivateAttr(default_factory=list)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "prefix-caching-fake-chat-model"
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = tokenize(render_messages(messages))
+        with self._lock:
+            reused = max((common_prefix(tokens, cached) for cached in self._cache), default=0)
+            self._cache.append(tokens)
+            del self._cache[:-self.slots]
+            self._requests.append((len(tokens), reused))
+        time.sleep(self.first_token_latency + (len(tokens) - reused) * self.prefill_per_token)
+        for i, token in enumerate(self._tokens()):
+            if i:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def requests(self) -> list:
+        """(prompt tokens, reused prefix tokens) per request so far."""
+        with self._lock:
+            return list(self._requests)
+
+
+def measure_layout(layout: str, vector_store, employees: List[dict], prefill_per_token: float, slots: int) -> dict:
+    """Run the scripted conversations with one prompt layout.
+
+    Args:
+        layout: "inline" or "prefix"
+        vector_store: Vector store used for retrieval
+        employees: Employee records, one conversation each
+        prefill_per_token: Simulated prefill seconds per uncached prompt token
+        slots: Prompts kept by the simulated prefix cache
+
+    Returns:
+        Token, reuse and time-to-first-token figures
+    """
+    from src.models import Assistant
+    from src.utils.prompts import system_prompt_for
+
+    llm = PrefixCachingChatModel(first_token_latency=0.0, token_latency=0.0,
+                                 prefill_per_token=prefill_per_token, slots=slots)
+    sessions = []
+    for i, employee in enumerate(employees):
+        history = []
+        assistant = Assistant(system_prompt=system_prompt_for(layout), llm=llm, message_history=history,
+                              employee_information=employee, vector_store=vector_store, prompt_layout=layout)
+        sessions.append((assistant, history, CONVERSATIONS[i % len(CONVERSATIONS)]))
+
+    ttfts = []
+    for turn in range(max(len(questions) for _, _, questions in sessions)):
+        for assistant, history, questions in sessions:
+            if turn >= len(questions):
+                continue
+            start = time.perf_counter()
+            stream = assistant.get_response(questions[turn])
+            first = next(stream)
+            ttfts.append(time.perf_counter() - start)
+            answer = first + "".join(stream)
+            history.append({"role": "user", "content": questions[turn]})
+            history.append({"role": "ai", "content": answer})
+
+    requests = llm.requests()
+    prompt_tokens = sum(total for total, _ in requests)
+    reused_tokens = sum(reused for _, reused in requests)
+    return {
+        "layout": layout,
+        "requests": len(requests),
+        "avg_prompt_tokens": prompt_tokens / len(requests),
+        "avg_reused_tokens": reused_tokens / len(requests),
+        "reuse_ratio": reused_tokens / prompt_tokens if prompt_tokens else 0.0,
+        "avg_ttft_ms": statistics.mean(ttfts) * 1000,
+        "p50_ttft_ms": statistics.median(ttfts) * 1000,
+    }
+
+
+def format_report(results: List[dict]) -> str:
+    """Render layout results as a table, with TTFT change relative to the first layout."""
+    header = f"{'layout':<8} {'requests':>8} {'prompt tok':>11} {'reused tok':>11} {'reuse':>7} {'avg TTFT':>10} {'p50 TTFT':>10} {'dTTFT':>7}"
+    lines = [header, "-" * len(header)]
+    baseline = results[0]["avg_ttft_ms"]
+    for r in results:
+        change = (r["avg_ttft_ms"] - baseline) / baseline if baseline else 0.0
+        lines.append(
+            f"{r['layout']:<8} {r['requests']:>8} {r['avg_prompt_tokens']:>11.0f} {r['avg_reused_tokens']:>11.0f} "
+            f"{r['reuse_ratio']:>6.0%} {r['avg_ttft_ms']:>8.1f}ms {r['p50_ttft_ms']:>8.1f}ms {change:>+6.0%}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Compare prompt layouts for prefix-cache reuse and TTFT.")
+    parser.add_argument("--employees", type=int, default=4, help="Concurrent conversations")
+    parser.add_argument("--prefill-us", type=float, default=150.0, help="Simulated prefill cost per uncached token (µs)")
+    parser.add_argument("--slots", type=int, default=16, help="Prompts kept by the simulated prefix cache")
+    parser.add_argument("--layouts", default="inline,prefix")
+    args = parser.parse_args(argv)
+
+    from src.config import get_settings
+    from src.data import generate_employee_data
+    from src.models import SentenceTransformersEmbeddings
+    from src.utils.vectorstore import load_or_build_vectorstore
+
+    settings = get_settings()
+    embeddings = SentenceTransformersEmbeddings(settings.embedding_model)
+    vector_store = load_or_build_vectorstore(
+        settings.pdf_path, settings.vectorstore_path, embeddings,
+        chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+    )
+    employees = generate_employee_data(args.employees)
+
+    logger.info("Prompt tokens counted with %s", "tiktoken cl100k_base" if _ENCODING else "approximate tokenizer")
+    results = [
+        measure_layout(layout, vector_store, employees, args.prefill_us / 1e6, args.slots)
+        for layout in args.layouts.split(",")
+    ]
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
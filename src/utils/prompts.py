@@ -1,11 +1,8 @@
 """Prompts and system messages for the AI assistant."""
 
-SYSTEM_PROMPT = """You are OnBoard AI, the onboarding assistant for Umbrella Corporation. Help new employees with company policies and their role.
+_INTRODUCTION = "You are OnBoard AI, the onboarding assistant for Umbrella Corporation. Help new employees with company policies and their role."
 
-**Employee:** {employee_information}
-**Policies:** {retrieved_policy_information}
-
-**Guidelines:**
+_GUIDELINES = """**Guidelines:**
 - Be warm and professional. Greet casually ("Hey [Name]! 👋") if they greet you
 - ONLY answer questions about company policies, employee role, benefits, schedules, security, facilities
 - NEVER answer: personal advice, medical/legal topics, politics, general knowledge, non-work matters
@@ -46,6 +43,41 @@ If unsure whether something is in scope, default to redirecting to company resou
 Help employees feel confident, informed, and supported as they begin their journey with Umbrella Corporation. You're their trusted guide through the onboarding process - and ONLY the onboarding process.
 """
 
+# Per-request fields of the prompt, filled for every question
+CONTEXT_TEMPLATE = """**Employee:** {employee_information}
+**Policies:** {retrieved_policy_information}"""
+
+# "inline" layout: per-request fields near the top of the system message
+SYSTEM_PROMPT = _INTRODUCTION + "\n\n" + CONTEXT_TEMPLATE + "\n\n" + _GUIDELINES
+
+# "prefix" layout: a system message identical for every request, so provider or
+# local KV prefix caches can reuse it; the context travels with each question
+PREFIX_SYSTEM_PROMPT = (
+    _INTRODUCTION
+    + "\n\n"
+    + _GUIDELINES
+    + "\nEach question arrives together with the employee's details and the relevant policy excerpts.\n"
+)
+
+# Final human message of the "prefix" layout
+PREFIX_QUESTION_TEMPLATE = CONTEXT_TEMPLATE + "\n\n**Question:** {user_input}"
+
+
+def system_prompt_for(layout: str) -> str:
+    """System prompt matching a prompt layout ("inline" or "prefix")."""
+    if layout == "prefix":
+        return PREFIX_SYSTEM_PROMPT
+    if layout == "inline":
+        return SYSTEM_PROMPT
+    raise ValueError(f"Unknown prompt layout: {layout}")
+
+
+OUT_OF_SCOPE_MESSAGE = """Hey {name}! I'm here for onboarding and company questions at Umbrella Corporation. For {topic}, I'd recommend {resource}.
+
+Is there anything about your role, our policies or your first days I can help with?"""
+
+BUSY_MESSAGE = "⏳ I'm helping a lot of colleagues right now. Please ask again in {seconds} seconds."
+
 WELCOME_MESSAGE = """
 👋 **Welcome to OnBoard AI!**
 
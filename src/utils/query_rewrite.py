@@ -0,0 +1,290 @@
+"""
+Local rewriting of follow-up questions into standalone retrieval queries.
+
+A follow-up such as "what about for my department?" embeds poorly on its
+own. Before retrieval, the rewriter resolves "my department/role/office/
+manager" from the employee record, and adds the topic of the previous
+user turn when the question leans on it ("what about...", "and...",
+pronouns). The rewrite is heuristic and takes microseconds. An optional
+local chat model can refine it within a latency budget; if the model is
+late, the heuristic query is used and the model's answer is cached for
+next time. Rewrites are cached on (history tail, question).
+
+Usage:
+    python -m src.utils.query_rewrite    # show rewrites and timings for the sample follow-ups
+"""
+import argparse
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from src.utils.logger import logger, log_event
+
+# Openers that make a question lean on the previous turn. "So ..." and "Or ..." also
+# open plenty of standalone questions, so they are not on the list.
+FOLLOW_UP_OPENERS = re.compile(
+    r"^\s*(and|also|but|then|what about|how about|what if|same for|is that|does that|do they|"
+    r"can i also|and if)\b[\s,]*",
+    re.I,
+)
+REFERRING_WORDS = re.compile(r"\b(it|its|that|this|those|these|they|them|there|same)\b", re.I)
+# "Is there a gym?" introduces a topic rather than pointing back at one
+EXISTENTIAL_THERE = re.compile(
+    r"\b(is|are|was|were|isn't|aren't|will)\s+there\b|\bthere\s*(is|are|was|were|'s|isn't|aren't|will)\b", re.I
+)
+
+# Possessive employee references resolved from the employee record
+EMPLOYEE_REFERENCES: List[Tuple[re.Pattern, str, str]] = [
+    (re.compile(r"\bmy (department|dept|division|team|group)\b", re.I), "department", "the {} department"),
+    (re.compile(r"\bmy (role|position|job|job title|title)\b", re.I), "position", "a {}"),
+    (re.compile(r"\bmy (location|office|site|building|facility)\b", re.I), "location", "the {} office"),
+    (re.compile(r"\bmy (manager|supervisor|boss|lead)\b", re.I), "supervisor", "my supervisor {}"),
+]
+
+STOPWORDS = frozenset(
+    "a an the and or but if of to in on at for with from by about as is are was were be been am do does did "
+    "i me my we our you your he she it its they them their this that these those there here what which who "
+    "whom when where why how can could should would will shall may might must have has had get got any some "
+    "all more most much many tell know need want please thanks thank hi hello hey also just really ok okay".split()
+)
+
+# (history, follow-up) pairs for the CLI
+SAMPLE_FOLLOW_UPS = [
+    (["How many vacation days do I get?"], "What about for my department?"),
+    (["What is the dress code in the labs?"], "And in my office?"),
+    (["How do I report a security incident?"], "Who do I send it to?"),
+    (["When is payday?"], "Is that the same for contractors?"),
+    (["What PPE is required in the lab?"], "Where do I get it?"),
+    (["What training do new hires complete?"], "What about for my role?"),
+    (["Tell me about remote work"], "How many days per week?"),
+    (["What's the password policy?"], "What are the security clearance levels?"),
+]
+
+REWRITE_PROMPT = (
+    "Rewrite the employee's last question as one standalone search query for the company policy handbook. "
+    "Use the earlier questions only to fill in what the last question refers to. "
+    "Reply with the query only.\n\nEarlier questions:\n{history}\n\nEmployee: {employee}\n\nLast question: {question}"
+)
+
+
+@dataclass
+class RewriteMetrics:
+    """Counters for the rewrite stage."""
+
+    calls: int = 0
+    rewritten: int = 0
+    cache_hits: int = 0
+    model_used: int = 0
+    over_budget: int = 0
+    model_skipped: int = 0
+    total_ms: float = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "rewritten": self.rewritten,
+            "cache_hits": self.cache_hits,
+            "model_used": self.model_used,
+            "over_budget": self.over_budget,
+            "model_skipped": self.model_skipped,
+            "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+        }
+
+
+def _keywords(text: str) -> List[str]:
+    """Content words of a text in order, without duplicates."""
+    seen = []
+    for word in re.findall(r"[A-Za-z][A-Za-z\-']+", text.lower()):
+        if word not in STOPWORDS and word not in seen and len(word) > 2:
+            seen.append(word)
+    return seen
+
+
+class QueryRewriter:
+    """Expands follow-up questions into standalone queries, with caching and a latency budget."""
+
+    def __init__(
+        self,
+        llm=None,
+        budget_ms: float = 150.0,
+        history_turns: int = 2,
+        cache_size: int = 4096,
+        model_workers: int = 2,
+    ):
+        """Initialize the rewriter.
+
+        Args:
+            llm: Optional local chat model refining heuristic rewrites
+            budget_ms: Longest the model may take before the heuristic query is used
+            history_turns: Previous user questions considered
+            cache_size: Rewrites kept in the LRU cache
+            model_workers: Concurrent model calls; when all are busy the heuristic query is used
+        """
+        self.llm = llm
+        self.budget = budget_ms / 1000
+        self.history_turns = history_turns
+        self.cache_size = cache_size
+        self.metrics = RewriteMetrics()
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        if llm is not None:
+            self._pool = ThreadPoolExecutor(max_workers=model_workers, thread_name_prefix="query-rewrite")
+        # Calls beyond the workers would queue without bound behind a slow model
+        self._model_slots = threading.BoundedSemaphore(model_workers)
+
+    def rewrite(self, question: str, messages: List[dict], employee_information: Optional[dict] = None) -> str:
+        """Return a standalone retrieval query for `question`.
+
+        Args:
+            question: The user's question
+            messages: Conversation so far, not including `question`
+            employee_information: Employee record used for "my department"-style references
+
+        Returns:
+            Rewritten query, or `question` unchanged when it already stands alone
+        """
+        start = time.perf_counter()
+        history = [m["content"] for m in messages if m.get("role") == "user"][-self.history_turns:]
+        key = self._key(history, question, employee_information)
+        with self._lock:
+            self.metrics.calls += 1
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.metrics.cache_hits += 1
+        if cached is not None:
+            self._record(start)
+            return cached
+
+        query = self._heuristic(question, history, employee_information or {})
+        if self.llm is not None and history and query != question:
+            query = self._refine(key, query, question, history, employee_information or {})
+        else:
+            self._store(key, query)
+
+        if query != question:
+            with self._lock:
+                self.metrics.rewritten += 1
+            log_event("query_rewritten", sampled=True, chars_in=len(question), chars_out=len(query))
+        self._record(start)
+        return query
+
+    def _heuristic(self, question: str, history: List[str], employee: dict) -> str:
+        """Resolve employee references and add the previous topic to follow-ups."""
+        query = question.strip()
+        for pattern, field_name, template in EMPLOYEE_REFERENCES:
+            value = employee.get(field_name)
+            if value:
+                query = pattern.sub(template.format(value), query)
+
+        if not history or not self._is_follow_up(question):
+            return query
+        remainder = FOLLOW_UP_OPENERS.sub("", query).strip()
+        present = set(_keywords(remainder))
+        topic = [word for word in _keywords(history[-1]) if word not in present]
+        if not topic:
+            return query
+        return f"{remainder.rstrip('?.! ')} ({' '.join(topic)})"
+
+    @staticmethod
+    def _is_follow_up(question: str) -> bool:
+        """Whether a question depends on the previous turn to be understood."""
+        if FOLLOW_UP_OPENERS.match(question):
+            return True
+        if not REFERRING_WORDS.search(EXISTENTIAL_THERE.sub(" ", question)):
+            return False
+        return len(_keywords(question)) <= 3
+
+    def _refine(self, key: str, heuristic: str, question: str, history: List[str], employee: dict) -> str:
+        """Ask the local model for a rewrite, falling back to `heuristic` past the budget."""
+        prompt = REWRITE_PROMPT.format(
+            history="\n".join(f"- {h}" for h in history),
+            employee=", ".join(f"{k}: {employee[k]}" for k in ("position", "department", "location") if employee.get(k)),
+            question=question,
+        )
+        if not self._model_slots.acquire(blocking=False):
+            with self._lock:
+                self.metrics.model_skipped += 1
+            return heuristic
+        try:
+            future = self._pool.submit(self.llm.invoke, prompt)
+        except RuntimeError:
+            self._model_slots.release()
+            raise
+        future.add_done_callback(lambda f: self._model_slots.release())
+        try:
+            refined = self._clean(future.result(timeout=self.budget))
+        except FutureTimeout:
+            with self._lock:
+                self.metrics.over_budget += 1
+            # Keep the model's answer for the next time this follow-up comes up
+            future.add_done_callback(lambda f: self._store_late(key, f))
+            return heuristic
+        except Exception as e:
+            logger.warning("Query rewrite model failed: %s", e)
+            return heuristic
+        if not refined:
+            return heuristic
+        with self._lock:
+            self.metrics.model_used += 1
+        self._store(key, refined)
+        return refined
+
+    def _store_late(self, key: str, future):
+        try:
+            refined = self._clean(future.result())
+        except Exception:
+            return
+        if refined:
+            self._store(key, refined)
+
+    @staticmethod
+    def _clean(message) -> str:
+        text = str(getattr(message, "content", message)).strip()
+        return text.splitlines()[0].strip().strip('"').strip() if text else ""
+
+    def _key(self, history: List[str], question: str, employee: Optional[dict]) -> str:
+        employee = employee or {}
+        fields = [str(employee.get(f)) for f in ("department", "position", "location", "supervisor")]
+        parts = history + [question.strip().lower()] + fields
+        return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _store(self, key: str, query: str):
+        with self._lock:
+            self._cache[key] = query
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _record(self, start: float):
+        with self._lock:
+            self.metrics.total_ms += (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    """Print heuristic rewrites of the sample follow-ups with timings."""
+    parser = argparse.ArgumentParser(description="Show follow-up query rewrites.")
+    parser.add_argument("--department", default="Research & Development")
+    parser.add_argument("--position", default="Research Scientist")
+    parser.add_argument("--location", default="Raccoon City")
+    args = parser.parse_args(argv)
+
+    employee = {"department": args.department, "position": args.position, "location": args.location}
+    rewriter = QueryRewriter()
+    for history, question in SAMPLE_FOLLOW_UPS:
+        messages = [{"role": "user", "content": h} for h in history]
+        start = time.perf_counter()
+        query = rewriter.rewrite(question, messages, employee)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print(f"{question!r:45} -> {query!r}  ({elapsed:.0f} µs)")
+    print(rewriter.metrics.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Retrieval quality and latency evaluation against a golden question set.
+
+Each golden question lists the zero-based PDF pages (PyPDFLoader `page`
+metadata) holding the policy section that answers it. For every
+configuration in a sweep the policy PDF is split with `split_documents`,
+indexed with `create_vectorstore`, and queried with every golden
+question; recall@k, MRR, index size, build time and query latency are
+reported side by side.
+
+Usage:
+    python -m src.utils.retrieval_eval
+    python -m src.utils.retrieval_eval --chunk-sizes 500,1000,2000 --overlaps 50,100 --k 1,2,4
+    python -m src.utils.retrieval_eval --pca-dims 0,128,64 --quantization none,fp16,int8 --rescore 0,4
+"""
+import argparse
+import itertools
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.logger import logger
+from src.utils.vectorstore import (
+    create_vectorstore,
+    estimate_vectorstore_bytes,
+    load_pdf,
+    search_vectors,
+    split_documents,
+)
+
+# (question, expected pages, section)
+GOLDEN_SET: List[Tuple[str, List[int], str]] = [
+    ("What is the company's mission statement?", [1, 2], "1.1"),
+    ("Who founded the Umbrella Corporation and when?", [2], "1.2"),
+    ("Who are the key people on the leadership team?", [2, 3], "1.3"),
+    ("What is the annual Monster Mash party?", [3, 4], "1.4"),
+    ("What cultural norms guide our behaviour?", [3, 4], "1.4"),
+    ("What do I have to keep confidential under the NDA?", [4, 5], "1.5"),
+    ("What is the dress code?", [6], "2.2"),
+    ("When do I have to disclose a conflict of interest?", [6, 7], "2.3"),
+    ("Can I post about my work on social media?", [7, 8], "2.4"),
+    ("How do I report misconduct anonymously?", [8, 9], "2.5"),
+    ("What are the data classification levels?", [9, 10], "3.1"),
+    ("How long must my password be?", [10, 11], "3.2"),
+    ("What is UmbraNet used for?", [11, 12], "3.3"),
+    ("How are security incidents classified and contained?", [12, 13], "3.4"),
+    ("How should classified information be communicated?", [13, 14], "3.5"),
+    ("Which compliance training and certifications are required?", [15, 16], "4.2"),
+    ("How are internal audits and inspections conducted?", [16], "4.3"),
+    ("What happens if I don't comply with regulations?", [17, 18], "4.5"),
+    ("What must I do before starting a laboratory experiment?", [18, 19], "5.1"),
+    ("How do I dispose of hazardous materials?", [19, 20], "5.2"),
+    ("What are the BSL-3 containment requirements?", [20, 21], "5.3"),
+    ("What are the response levels for a laboratory accident?", [21, 22], "5.4"),
+    ("Am I allowed to feed the laboratory specimens?", [22, 23], "5.5"),
+    ("How do clearance levels and badge access work?", [23, 24], "6.1"),
+    ("What are the rules for the secret underground facility?", [24, 25], "6.2"),
+    ("Are employees monitored by surveillance cameras?", [25, 26], "6.3"),
+    ("Do visitors need an escort?", [27, 28], "6.5"),
+    ("When do I get a written warning?", [28, 29], "7.1"),
+    ("How does suspension and probation work?", [29], "7.2"),
+    ("What is the Basement Cleaning Duty punishment?", [30, 31], "7.4"),
+    ("How do I appeal a disciplinary action?", [31, 32], "7.5"),
+    ("What counts as a doomsday scenario?", [32, 33], "8.1"),
+    ("How are outbreaks contained and quarantined?", [34, 35], "8.3"),
+    ("Who communicates with employees during a crisis?", [35, 36], "8.4"),
+    ("What support does the Employee Assistance Program offer?", [38, 39], "9.2"),
+    ("What mental health resources are available?", [39], "9.3"),
+    ("How are employees recognised and rewarded?", [39, 40], "9.4"),
+    ("What does ERP stand for?", [41, 42], "10.1"),
+    ("Which regulations govern recombinant DNA research?", [42, 43], "10.2"),
+    ("What do I confirm on the acknowledgement and sign-off form?", [44, 45], "10.4"),
+]
+
+
+@dataclass
+class EvalConfig:
+    """One point in the configuration sweep."""
+
+    chunk_size: int
+    chunk_overlap: int
+    embedding_model: str
+    pca_dim: int = 0
+    quantization: str = "none"
+    rescore_factor: int = 0
+
+    @property
+    def storage(self) -> str:
+        """Short label for the vector storage options."""
+        label = f"pca{self.pca_dim}/" if self.pca_dim else ""
+        label += {"none": "f32"}.get(self.quantization, self.quantization)
+        return label + (f"+r{self.rescore_factor}" if self.rescore_factor else "")
+
+
+@dataclass
+class EvalResult:
+    """Quality and cost of one configuration."""
+
+    chunk_size: int
+    chunk_overlap: int
+    embedding_model: str
+    storage: str
+    chunks: int
+    vector_bytes_per_1k: int
+    recall: Dict[int, float]
+    mrr: float
+    index_bytes: int
+    build_seconds: float
+    query_ms_mean: float
+    query_ms_p95: float
+    per_query_qps: float
+    batched_qps: float
+
+
+def evaluate_vectorstore(vectorstore, golden: Sequence[Tuple[str, List[int], str]], ks: Sequence[int]) -> dict:
+    """Score a built index on the golden set.
+
+    A question counts as found at rank r when the r-th retrieved chunk comes
+    from one of its expected pages.
+
+    Args:
+        vectorstore: FAISS vector store to query
+        golden: (question, expected pages, section) entries
+        ks: Cut-offs for recall@k
+
+    Returns:
+        recall per k, MRR over the top max(ks) results, per-query latencies in
+        ms, and throughput of the per-query and batched (`search_vectors`) paths
+    """
+    depth = max(ks)
+    hits = {k: 0 for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    for question, pages, _ in golden:
+        start = time.perf_counter()
+        documents = vectorstore.similarity_search(question, k=depth)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        expected = set(pages)
+        rank = next((i + 1 for i, doc in enumerate(documents) if doc.metadata.get("page") in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        for k in ks:
+            if rank is not None and rank <= k:
+                hits[k] += 1
+
+    start = time.perf_counter()
+    vectors = vectorstore.embedding_function.embed_documents([question for question, _, _ in golden])
+    search_vectors(vectorstore, vectors, k=depth).all_documents()
+    batched_seconds = time.perf_counter() - start
+
+    return {
+        "recall": {k: hits[k] / len(golden) for k in ks},
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "query_ms_mean": float(np.mean(latencies)),
+        "query_ms_p95": float(np.percentile(latencies, 95)),
+        "per_query_qps": len(golden) / (sum(latencies) / 1000),
+        "batched_qps": len(golden) / batched_seconds,
+    }
+
+
+def run_sweep(
+    pdf_path: str,
+    configs: Sequence[EvalConfig],
+    ks: Sequence[int] = (1, 2, 4),
+    golden: Optional[Sequence[Tuple[str, List[int], str]]] = None,
+) -> List[EvalResult]:
+    """Build an index per configuration and evaluate it.
+
+    Args:
+        pdf_path: Policy PDF to index
+        configs: Configurations to compare
+        ks: Cut-offs for recall@k
+        golden: Golden set (default: GOLDEN_SET)
+
+    Returns:
+        One EvalResult per configuration, in order
+    """
+    from src.models import SentenceTransformersEmbeddings
+
+    golden = golden or GOLDEN_SET
+    pages = load_pdf(pdf_path)
+    models: Dict[str, SentenceTransformersEmbeddings] = {}
+    results = []
+    for config in configs:
+        if config.embedding_model not in models:
+            # Queries are issued one at a time here, so a batching window would only add latency
+            models[config.embedding_model] = SentenceTransformersEmbeddings(config.embedding_model, batch_window_ms=0)
+        embedding_function = models[config.embedding_model]
+
+        start = time.perf_counter()
+        splits = split_documents(pages, chunk_size=config.chunk_size, chunk_overlap=config.chunk_overlap)
+        vectorstore = create_vectorstore(
+            splits,
+            embedding_function,
+            pca_dim=config.pca_dim,
+            quantization=config.quantization,
+            rescore_factor=config.rescore_factor,
+        )
+        build_seconds = time.perf_counter() - start
+
+        scores = evaluate_vectorstore(vectorstore, golden, ks)
+        results.append(EvalResult(
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            embedding_model=config.embedding_model,
+            storage=config.storage,
+            chunks=len(splits),
+            vector_bytes_per_1k=vectorstore.index.sa_code_size() * 1000,
+            index_bytes=estimate_vectorstore_bytes(vectorstore),
+            build_seconds=build_seconds,
+            **scores,
+        ))
+        logger.info("Evaluated %s: MRR %.3f", config, scores["mrr"])
+    return results
+
+
+def format_table(results: Sequence[EvalResult]) -> str:
+    """Render sweep results as a fixed-width table.
+
+    `dMRR` is the MRR change against the full-precision flat index with the
+    same chunking and model, when that configuration is part of the sweep.
+    """
+    ks = sorted(results[0].recall) if results else []
+    baselines = {(r.embedding_model, r.chunk_size, r.chunk_overlap): r.mrr for r in results if r.storage == "f32"}
+    header = (f"{'model':<24} {'size':>5} {'overlap':>7} {'storage':>14} {'chunks':>6} "
+              + " ".join(f"{'R@' + str(k):>6}" for k in ks)
+              + f" {'MRR':>6} {'dMRR':>6} {'KB/1k':>7} {'index KB':>9} {'build s':>8} {'q ms':>6} {'q p95':>6}"
+              f" {'q/s':>7} {'batch q/s':>9}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        baseline = baselines.get((r.embedding_model, r.chunk_size, r.chunk_overlap))
+        delta = f"{r.mrr - baseline:>+6.3f}" if baseline is not None else f"{'-':>6}"
+        lines.append(
+            f"{r.embedding_model[-24:]:<24} {r.chunk_size:>5} {r.chunk_overlap:>7} {r.storage:>14} {r.chunks:>6} "
+            + " ".join(f"{r.recall[k]:>6.3f}" for k in ks)
+            + f" {r.mrr:>6.3f} {delta} {r.vector_bytes_per_1k / 1024:>7.1f} {r.index_bytes / 1024:>9.1f}"
+            f" {r.build_seconds:>8.2f} {r.query_ms_mean:>6.2f} {r.query_ms_p95:>6.2f}"
+            f" {r.per_query_qps:>7.0f} {r.batched_qps:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def load_golden(path: str) -> List[Tuple[str, List[int], str]]:
+    """Load a golden set from a JSON list of {"question", "pages", "section"} objects."""
+    with open(path, encoding="utf-8") as f:
+        return [(item["question"], item["pages"], item.get("section", "")) for item in json.load(f)]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    from src.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency.")
+    parser.add_argument("--pdf", default=settings.pdf_path)
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[settings.chunk_size])
+    parser.add_argument("--overlaps", type=_int_list, default=[settings.chunk_overlap])
+    parser.add_argument("--models", default=settings.embedding_model, help="Comma-separated embedding models")
+    parser.add_argument("--pca-dims", type=_int_list, default=[settings.index_pca_dim])
+    parser.add_argument("--quantization", default=settings.index_quantization, help="Comma-separated: none,fp16,int8")
+    parser.add_argument("--rescore", type=_int_list, default=[settings.index_rescore_factor])
+    parser.add_argument("--k", type=_int_list, default=[1, 2, 4])
+    parser.add_argument("--golden", help="JSON golden set (default: built-in GOLDEN_SET)")
+    parser.add_argument("--json", dest="json_out", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    configs = [
+        EvalConfig(size, overlap, model, pca_dim, quantization, rescore)
+        for model, size, overlap, pca_dim, quantization, rescore in itertools.product(
+            args.models.split(","), args.chunk_sizes, args.overlaps,
+            args.pca_dims, args.quantization.split(","), args.rescore,
+        )
+        if overlap < size
+    ]
+    golden = load_golden(args.golden) if args.golden else None
+    results = run_sweep(args.pdf, configs, ks=args.k, golden=golden)
+    print(format_table(results))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Fast local scope classifier run before retrieval and the LLM call.
+
+Clearly out-of-scope questions (weather, investing, coding help...) are
+answered immediately with the templated redirect from SYSTEM_PROMPT,
+skipping query embedding, FAISS search and the Groq round trip. Anything
+ambiguous is passed through so the LLM keeps the final say.
+
+Usage:
+    python -m src.utils.scope            # evaluate on the held-out and development question sets
+    python -m src.utils.scope --measure  # also time the real embed + search path the rejections skip
+"""
+import argparse
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+# Company/onboarding cues; any hit keeps the question in scope
+IN_SCOPE_PATTERN = re.compile(
+    r"\b(polic|company|umbrella|onboard|benefit|salary|pay|paid|payroll|vacation|pto|leave|"
+    r"dress code|security|password|badge|lab|laborator|supervisor|manager|department|role|"
+    r"position|team|office|facilit|hr\b|human resources|training|complian|conduct|confidential|"
+    r"incident|first day|schedule|shift|hours|remote|expense|umbranet|employee|colleague|"
+    r"hire|job|work|career|handbook|safety|ppe|hazard|clearance|access|report|whistleblow|"
+    r"time off|days? off|sick|absen|reimburs|insurance|health plan|dental|claim|appointment|"
+    r"laptop|computer|log ?in|account|vpn|it support|help ?desk|it department|"
+    r"cafeteria|canteen|break room|kitchen|lunch|nearby|parking|gym|performance|review)",
+    re.I,
+)
+
+# Out-of-scope topics with the topic/resource used in the redirect
+OUT_OF_SCOPE_RULES: List[Tuple[re.Pattern, str, str]] = [
+    (re.compile(r"\b(weather|forecast|temperature outside|rain(ing)? today)", re.I),
+     "the weather", "a local weather service"),
+    (re.compile(r"\b(invest|stocks?|crypto|bitcoin|portfolio|trading|mortgage)", re.I),
+     "financial advice", "a licensed financial advisor"),
+    (re.compile(r"\b(diagnos|symptom|medicine|medication|headache|illness|disease)", re.I),
+     "medical questions", "a healthcare professional"),
+    (re.compile(r"\b(lawsuit|sue|divorce|legal advice|immigration)", re.I),
+     "legal questions", "a qualified legal professional"),
+    (re.compile(r"\b(debug|javascript|python code|write (a|some) (function|script|code)|stack ?trace|compile error)", re.I),
+     "programming help", "your team's engineering documentation"),
+    (re.compile(r"\b(politic|election|president|democrat|republican|religio|god\b|church)", re.I),
+     "politics and religion", "trusted independent sources"),
+    (re.compile(r"\b(recipe|cook|restaurant|movie|song|lyrics|football|soccer|basketball|score|"
+                r"celebrity|vacation destination|travel tips)", re.I),
+     "that topic", "a general search engine"),
+    (re.compile(r"\b(joke|poem|riddle|homework|essay|translate|capital of|who won|"
+                r"equation|integral)", re.I),
+     "general questions", "a general-purpose assistant"),
+    (re.compile(r"\b(dating|girlfriend|boyfriend|relationship advice|horoscope)", re.I),
+     "personal advice", "a trusted friend or counsellor"),
+]
+
+# Development set used to write the rules and build the embedding centroids: (question, in_scope)
+LABELLED_QUESTIONS: List[Tuple[str, bool]] = [
+    ("Hey! How's my first day going to look?", True),
+    ("What's the dress code policy?", True),
+    ("When do I get paid?", True),
+    ("What are my responsibilities as a Software Engineer?", True),
+    ("Tell me about vacation days", True),
+    ("What are the password requirements?", True),
+    ("How do I report a security incident?", True),
+    ("Who is the head of security?", True),
+    ("What is the company mission statement?", True),
+    ("How do I request PTO?", True),
+    ("What PPE do I need in the lab?", True),
+    ("What happens if I violate the code of conduct?", True),
+    ("Can I post about my work on social media?", True),
+    ("What is UmbraNet?", True),
+    ("How do I handle confidential documents?", True),
+    ("Hi there!", True),
+    ("Thanks, that helps!", True),
+    ("What training do new hires need to complete?", True),
+    ("Who do I contact in HR?", True),
+    ("What is the Monster Mash party?", True),
+    ("What should I do in a chemical spill?", True),
+    ("How do I get my badge?", True),
+    ("What's the weather today?", False),
+    ("Give me investment advice", False),
+    ("Should I buy bitcoin?", False),
+    ("Help me debug Python code", False),
+    ("Write a function that reverses a string in JavaScript", False),
+    ("Who won the football game last night?", False),
+    ("Tell me a joke", False),
+    ("What is the capital of France?", False),
+    ("Can you recommend a good movie?", False),
+    ("I have a headache, what medicine should I take?", False),
+    ("What do you think about the election?", False),
+    ("Give me a recipe for lasagna", False),
+    ("Write me a poem about the sea", False),
+    ("Solve this equation: 2x + 3 = 7", False),
+    ("Can you give me relationship advice?", False),
+    ("Should I sue my landlord?", False),
+    ("What's my horoscope today?", False),
+    ("Translate this sentence into Spanish", False),
+]
+
+# Held-out set for evaluation; never used to tune rules or build centroids.
+# Mostly realistic onboarding questions that share words with off-topic rules.
+HELD_OUT_QUESTIONS: List[Tuple[str, bool]] = [
+    ("I need to see a doctor, can I take time off?", True),
+    ("How do I get reimbursed for a doctor visit?", True),
+    ("How do I solve a login problem with my laptop?", True),
+    ("Is there a cafeteria or restaurant nearby?", True),
+    ("Does our health insurance cover medication?", True),
+    ("What happens if I'm sick on my first week?", True),
+    ("Can I expense a team dinner at a restaurant?", True),
+    ("Who do I call when my computer won't start?", True),
+    ("Where can I eat lunch?", True),
+    ("Is there a gym on site?", True),
+    ("How does the performance review score work?", True),
+    ("Can I bring my own coffee machine?", True),
+    ("What's the story behind the company logo?", True),
+    ("Do we get a day off for the election?", True),
+    ("How do I book a meeting room?", True),
+    ("Where do I park on my first day?", True),
+    ("What time does the building open?", True),
+    ("Is there a quiet room for prayer?", True),
+    ("Will it rain this weekend?", False),
+    ("Is it a good time to buy Tesla stock?", False),
+    ("What are the symptoms of the flu?", False),
+    ("Can you write a bash script to rename files?", False),
+    ("Who won the basketball finals?", False),
+    ("Tell me a riddle", False),
+    ("What is the capital of Japan?", False),
+    ("Recommend a song for a road trip", False),
+    ("How do I cook risotto?", False),
+    ("What's the best crypto wallet?", False),
+    ("Help me with my math homework", False),
+    ("Who should I vote for in the election?", False),
+]
+
+
+@dataclass
+class ScopeDecision:
+    """Outcome of scope classification for one question."""
+
+    in_scope: bool
+    topic: str = ""
+    resource: str = ""
+    method: str = "lexical"
+
+
+class ScopeClassifier:
+    """Lexical scope rules, optionally backed by embedding centroids.
+
+    A question is rejected only when an out-of-scope rule (or the embedding
+    centroid margin) fires and no company cue is present.
+    """
+
+    def __init__(self, embedding_function=None, labelled: Optional[List[Tuple[str, bool]]] = None, margin: float = 0.1):
+        """Initialize the classifier.
+
+        Args:
+            embedding_function: Optional embeddings used for centroid classification
+            labelled: Labelled questions used to build centroids (default: LABELLED_QUESTIONS)
+            margin: Required similarity lead of the out-of-scope centroid
+        """
+        self.embedding_function = embedding_function
+        self.margin = margin
+        self._centroids = None
+        if embedding_function is not None:
+            self._centroids = self._build_centroids(labelled or LABELLED_QUESTIONS)
+
+    def _build_centroids(self, labelled: List[Tuple[str, bool]]):
+        import numpy as np
+
+        vectors = np.asarray(self.embedding_function.embed_documents([q for q, _ in labelled]), dtype="float32")
+        labels = np.array([in_scope for _, in_scope in labelled])
+        centroids = {}
+        for label in (True, False):
+            centroid = vectors[labels == label].mean(axis=0)
+            centroids[label] = centroid / (np.linalg.norm(centroid) or 1.0)
+        return centroids
+
+    def classify(self, question: str) -> ScopeDecision:
+        """Decide whether a question is clearly out of scope.
+
+        Args:
+            question: User question
+
+        Returns:
+            ScopeDecision; `in_scope` is False only for clear rejections
+        """
+        if IN_SCOPE_PATTERN.search(question):
+            return ScopeDecision(True)
+
+        for pattern, topic, resource in OUT_OF_SCOPE_RULES:
+            if pattern.search(question):
+                return ScopeDecision(False, topic, resource)
+
+        if self._centroids is not None:
+            import numpy as np
+
+            vector = np.asarray(self.embedding_function.embed_query(question), dtype="float32")
+            vector /= np.linalg.norm(vector) or 1.0
+            if float(vector @ self._centroids[False]) - float(vector @ self._centroids[True]) > self.margin:
+                return ScopeDecision(False, "that topic", "a general search engine", method="embedding")
+
+        return ScopeDecision(True)
+
+
+def evaluate(
+    classifier: ScopeClassifier,
+    labelled: Optional[List[Tuple[str, bool]]] = None,
+    pipeline: Optional[Callable[[str], object]] = None,
+    pipeline_seconds: float = 3.0,
+) -> dict:
+    """Measure out-of-scope precision/recall and the latency saved by early exit.
+
+    With `pipeline`, the work skipped by early exit is timed for every
+    correctly rejected question and reported as `seconds_saved`. Without
+    it, only an estimate from the assumed `pipeline_seconds` is reported.
+
+    Args:
+        classifier: Classifier to evaluate
+        labelled: (question, in_scope) pairs (default: HELD_OUT_QUESTIONS)
+        pipeline: Callable (question) -> anything running the path an early exit skips
+        pipeline_seconds: Assumed embed + search + LLM time per early exit, used without `pipeline`
+
+    Returns:
+        Precision, recall, accuracy, mean classification latency and seconds saved
+    """
+    labelled = labelled or HELD_OUT_QUESTIONS
+    tp = fp = fn = tn = 0
+    elapsed = skipped = 0.0
+    for question, in_scope in labelled:
+        start = time.perf_counter()
+        decision = classifier.classify(question)
+        elapsed += time.perf_counter() - start
+        rejected, should_reject = not decision.in_scope, not in_scope
+        if rejected and should_reject:
+            tp += 1
+            if pipeline is not None:
+                start = time.perf_counter()
+                pipeline(question)
+                skipped += time.perf_counter() - start
+        elif rejected:
+            fp += 1
+        elif should_reject:
+            fn += 1
+        else:
+            tn += 1
+    report = {
+        "questions": len(labelled),
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        "accuracy": (tp + tn) / len(labelled),
+        "false_rejections": fp,
+        "classify_ms": elapsed / len(labelled) * 1000,
+    }
+    if pipeline is not None:
+        report["pipeline_ms"] = skipped / tp * 1000 if tp else 0.0
+        report["seconds_saved"] = skipped - elapsed
+    else:
+        report["assumed_pipeline_seconds"] = pipeline_seconds
+        report["estimated_seconds_saved"] = tp * pipeline_seconds - elapsed
+    return report
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Evaluate the scope classifier.")
+    parser.add_argument("--embeddings", action="store_true", help="Also use embedding centroids")
+    parser.add_argument("--measure", action="store_true",
+                        help="Time query embedding + FAISS search for each rejected question (no LLM call)")
+    parser.add_argument("--pipeline-seconds", type=float, default=3.0,
+                        help="Assumed time saved per rejection when not measuring")
+    args = parser.parse_args(argv)
+
+    from src.config import get_settings
+
+    settings = get_settings()
+    embedding_function = None
+    if args.embeddings or args.measure:
+        from src.models import SentenceTransformersEmbeddings
+
+        embedding_function = SentenceTransformersEmbeddings(settings.embedding_model)
+
+    pipeline = None
+    if args.measure:
+        from src.utils.index_registry import IndexRegistry
+
+        registry = IndexRegistry(embedding_function, chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+                                 embedding_model=settings.embedding_model, pca_dim=settings.index_pca_dim,
+                                 quantization=settings.index_quantization, rescore_factor=settings.index_rescore_factor,
+                                 refresh_interval=0)
+        registry.register(settings.default_tenant, settings.pdf_path, settings.vectorstore_path)
+        vector_store = registry.get(settings.default_tenant)
+
+        def pipeline(question):
+            return vector_store.similarity_search(question, k=2)  # same retrieval as the Assistant
+
+    classifier = ScopeClassifier(embedding_function if args.embeddings else None)
+    for name, labelled in (("held-out", HELD_OUT_QUESTIONS), ("development", LABELLED_QUESTIONS)):
+        print(f"{name} set:")
+        report = evaluate(classifier, labelled, pipeline=pipeline, pipeline_seconds=args.pipeline_seconds)
+        for key, value in report.items():
+            print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Conversation history storage kept outside Streamlit session state.
+
+Each chat session has an append-only message log. Pages load only the
+recent messages they render, a session expires `ttl` seconds after its
+last message, and every log is capped in messages and bytes with the
+oldest entries dropped first. The in-memory backend serves one process,
+the SQLite backend survives restarts and is shared by processes on one
+host, and the Redis-protocol backend is shared by replicas.
+
+Conversation IDs travel in URLs, so the app stores a conversation under
+`owned_session_key(employee, session_id)`: a link opened by someone else
+addresses their own, empty conversation.
+"""
+import abc
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import List, Optional
+
+from src.utils.logger import logger
+
+# Redis key suffix of a session's parallel list of message sizes
+SIZES_SUFFIX = ":sizes"
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(raw: bytes) -> dict:
+    return json.loads(raw)
+
+
+def new_session_id() -> str:
+    """Random, unguessable conversation ID."""
+    return uuid.uuid4().hex
+
+
+def is_session_id(value) -> bool:
+    """Whether `value` looks like an ID from `new_session_id`."""
+    try:
+        return isinstance(value, str) and uuid.UUID(hex=value).hex == value
+    except ValueError:
+        return False
+
+
+def owned_session_key(owner: str, session_id: str) -> str:
+    """Store key of a conversation, scoped to the employee it belongs to.
+
+    Args:
+        owner: Authenticated employee ID or email
+        session_id: Conversation ID from `new_session_id`
+
+    Returns:
+        Key that only `owner` can reach with this `session_id`
+    """
+    digest = hashlib.sha256(owner.encode("utf-8")).hexdigest()[:24]
+    return f"{digest}:{session_id}"
+
+
+class SessionStore(abc.ABC):
+    """Append-only message logs keyed by session ID."""
+
+    @abc.abstractmethod
+    def append(self, session_id: str, *messages: dict):
+        """Append messages to a session's log and refresh its expiry."""
+
+    @abc.abstractmethod
+    def recent(self, session_id: str, limit: int) -> List[dict]:
+        """Return up to `limit` of the session's latest messages, oldest first."""
+
+    @abc.abstractmethod
+    def count(self, session_id: str) -> int:
+        """Number of messages retained for a session (0 if unknown or expired)."""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str):
+        """Forget a session."""
+
+
+@dataclass
+class _SessionLog:
+    messages: deque = field(default_factory=deque)
+    size: int = 0
+    expires_at: Optional[float] = None
+
+
+class MemorySessionStore(SessionStore):
+    """In-process session logs with TTL, per-session caps and a session limit."""
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_messages: int = 500,
+        max_bytes: int = 256 * 1024,
+        max_sessions: int = 10000,
+    ):
+        """Initialize the store.
+
+        Args:
+            ttl: Seconds after the last message before a session expires (None = never)
+            max_messages: Messages kept per session
+            max_bytes: Encoded bytes kept per session
+            max_sessions: Sessions kept; the least recently active are dropped
+        """
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, session_id: str, *messages: dict):
+        with self._lock:
+            log = self._live(session_id) or _SessionLog()
+            for message in messages:
+                raw = _encode(message)
+                log.messages.append(raw)
+                log.size += len(raw)
+            while len(log.messages) > 1 and (len(log.messages) > self.max_messages or log.size > self.max_bytes):
+                log.size -= len(log.messages.popleft())
+            log.expires_at = time.time() + self.ttl if self.ttl else None
+            self._sessions[session_id] = log
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def recent(self, session_id: str, limit: int) -> List[dict]:
+        with self._lock:
+            log = self._live(session_id)
+            if log is None:
+                return []
+            raws = list(islice(reversed(log.messages), limit))
+        return [_decode(raw) for raw in reversed(raws)]
+
+    def count(self, session_id: str) -> int:
+        with self._lock:
+            log = self._live(session_id)
+            return len(log.messages) if log is not None else 0
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _live(self, session_id: str) -> Optional[_SessionLog]:
+        """Return the session's log unless it has expired; caller holds the lock."""
+        log = self._sessions.get(session_id)
+        if log is not None and log.expires_at is not None and log.expires_at < time.time():
+            del self._sessions[session_id]
+            return None
+        return log
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session logs in a local SQLite file, shared by processes on one host."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        max_messages: int = 500,
+        max_bytes: int = 256 * 1024,
+        purge_interval: float = 60.0,
+    ):
+        """Open or create the session database.
+
+        Args:
+            path: Path to the SQLite database file
+            ttl: Seconds after the last message before a session expires (None = never)
+            max_messages: Messages kept per session
+            max_bytes: Encoded bytes kept per session
+            purge_interval: Minimum seconds between sweeps deleting expired sessions
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, messages INTEGER NOT NULL, size INTEGER NOT NULL,"
+            " next_seq INTEGER NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " session_id TEXT NOT NULL, seq INTEGER NOT NULL, data BLOB NOT NULL, size INTEGER NOT NULL,"
+            " PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+
+    def append(self, session_id: str, *messages: dict):
+        now = time.time()
+        raws = [_encode(message) for message in messages]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT messages, size, next_seq, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None or (row[3] is not None and row[3] < now):
+                    self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                    count, size, seq = 0, 0, 0
+                else:
+                    count, size, seq = row[:3]
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, data, size) VALUES (?, ?, ?, ?)",
+                    [(session_id, seq + i, sqlite3.Binary(raw), len(raw)) for i, raw in enumerate(raws)],
+                )
+                count += len(raws)
+                size += sum(len(raw) for raw in raws)
+                seq += len(raws)
+                if count > self.max_messages or size > self.max_bytes:
+                    count, size = self._trim(session_id, count, size)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, messages, size, next_seq, expires_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (session_id, count, size, seq, now + self.ttl if self.ttl else None),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            if now - self._purged_at >= self.purge_interval:
+                self._purge(now)
+
+    def recent(self, session_id: str, limit: int) -> List[dict]:
+        if limit <= 0:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.data FROM messages m JOIN sessions s ON s.session_id = m.session_id"
+                " WHERE m.session_id = ? AND (s.expires_at IS NULL OR s.expires_at >= ?)"
+                " ORDER BY m.seq DESC LIMIT ?",
+                (session_id, time.time(), limit),
+            ).fetchall()
+        return [_decode(bytes(row[0])) for row in reversed(rows)]
+
+    def count(self, session_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages FROM sessions WHERE session_id = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (session_id, time.time()),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _trim(self, session_id: str, count: int, size: int):
+        """Drop the session's oldest messages until within the caps; caller holds the transaction."""
+        cutoff = None
+        for seq, message_size in self._conn.execute(
+            "SELECT seq, size FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ):
+            if count <= 1 or (count <= self.max_messages and size <= self.max_bytes):
+                break
+            cutoff = seq
+            count -= 1
+            size -= message_size
+        if cutoff is not None:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?", (session_id, cutoff))
+        return count, size
+
+    def _purge(self, now: float):
+        """Delete expired sessions and their messages; caller holds the lock."""
+        self._purged_at = now
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id IN"
+            " (SELECT session_id FROM sessions WHERE expires_at IS NOT NULL AND expires_at < ?)",
+            (now,),
+        )
+        removed = self._conn.execute(
+            "DELETE FROM sessions WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        ).rowcount
+        if removed:
+            logger.debug("Purged %d expired chat sessions", removed)
+
+
+class RedisSessionStore(SessionStore):
+    """Session logs as Redis lists, shared by replicas.
+
+    Each log has a parallel list of message sizes, so the count and byte
+    caps are enforced with LTRIM without reading the messages back. Both
+    lists expire with the session's TTL.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        client=None,
+        prefix: str = "onboard:session:",
+        ttl: Optional[float] = None,
+        max_messages: int = 500,
+        max_bytes: int = 256 * 1024,
+    ):
+        """Connect to the server.
+
+        Args:
+            url: Redis URL, used when no client is given
+            client: Existing client exposing pipeline/rpush/ltrim/pexpire/lrange/llen/delete
+            prefix: Namespace prepended to every session ID
+            ttl: Seconds after the last message before a session expires (None = never)
+            max_messages: Messages kept per session
+            max_bytes: Encoded bytes kept per session
+        """
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+
+    def append(self, session_id: str, *messages: dict):
+        key = self.prefix + session_id
+        sizes_key = key + SIZES_SUFFIX
+        raws = [_encode(message) for message in messages]
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *raws)
+        pipe.rpush(sizes_key, *[len(raw) for raw in raws])
+        pipe.lrange(sizes_key, 0, -1)
+        if self.ttl:
+            pipe.pexpire(key, int(self.ttl * 1000))
+            pipe.pexpire(sizes_key, int(self.ttl * 1000))
+        sizes = [int(size) for size in pipe.execute()[2]]
+
+        # Same rule as the other backends: drop the oldest, but keep the newest message
+        drop, size = max(0, len(sizes) - self.max_messages), sum(sizes)
+        size -= sum(sizes[:drop])
+        while len(sizes) - drop > 1 and size > self.max_bytes:
+            size -= sizes[drop]
+            drop += 1
+        if drop:
+            pipe = self.client.pipeline()
+            pipe.ltrim(key, drop, -1)
+            pipe.ltrim(sizes_key, drop, -1)
+            pipe.execute()
+
+    def recent(self, session_id: str, limit: int) -> List[dict]:
+        if limit <= 0:
+            return []
+        return [_decode(raw) for raw in self.client.lrange(self.prefix + session_id, -limit, -1)]
+
+    def count(self, session_id: str) -> int:
+        return self.client.llen(self.prefix + session_id)
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id, self.prefix + session_id + SIZES_SUFFIX)
+
+
+def create_session_store(settings) -> SessionStore:
+    """Build the session store selected by `settings.session_backend`.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Session store
+    """
+    kind = settings.session_backend
+    ttl = settings.session_ttl_seconds or None
+    if kind == "memory":
+        return MemorySessionStore(ttl, settings.session_max_messages, settings.session_max_bytes,
+                                  settings.session_max_sessions)
+    if kind == "sqlite":
+        return SQLiteSessionStore(settings.session_path, ttl, settings.session_max_messages, settings.session_max_bytes)
+    if kind == "redis":
+        return RedisSessionStore(settings.session_url, ttl=ttl, max_messages=settings.session_max_messages,
+                                 max_bytes=settings.session_max_bytes)
+    raise ValueError(f"Unknown session backend: {kind}")
@@ -0,0 +1,163 @@
+"""
+Coalescing adapter for token streams sent to the browser.
+
+`st.write_stream` redraws the markdown element for every chunk it
+receives, so a token-per-chunk LLM stream turns into hundreds of redraws
+and websocket messages per answer. The coalescer passes the first chunk
+through untouched (time to first token is unchanged) and then groups
+tokens into flushes bounded by size and by time. Closing the coalesced
+stream (the browser went away) closes the source too, so an abandoned
+answer stops consuming LLM tokens.
+"""
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from src.utils.logger import logger
+
+_DONE = object()
+
+
+@dataclass
+class StreamMetrics:
+    """Counters for coalesced streams."""
+
+    streams: int = 0
+    chunks_in: int = 0
+    flushes: int = 0
+    bytes_sent: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, chunks: int, text: str):
+        with self._lock:
+            self.chunks_in += chunks
+            self.flushes += 1
+            self.bytes_sent += len(text.encode("utf-8"))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "chunks_in": self.chunks_in,
+                "flushes": self.flushes,
+                "bytes_sent": self.bytes_sent,
+                "chunks_per_flush": self.chunks_in / self.flushes if self.flushes else 0.0,
+            }
+
+
+class StreamCoalescer:
+    """Buffers streamed text into size- or time-bounded flushes."""
+
+    def __init__(self, max_chars: int = 64, max_interval_ms: float = 50.0, max_pending: int = 256):
+        """Initialize the coalescer.
+
+        Args:
+            max_chars: Flush once this many characters are buffered
+            max_interval_ms: Flush buffered text at least this often
+            max_pending: Chunks read ahead of a slow consumer before the reader waits
+        """
+        self.max_chars = max_chars
+        self.max_interval = max_interval_ms / 1000
+        self.max_pending = max_pending
+        self.metrics = StreamMetrics()
+
+    def wrap(self, source: Iterable[str]) -> Iterator[str]:
+        """Coalesce a text stream.
+
+        The source is read on a helper thread so a stalled LLM cannot hold
+        back text that is already buffered past its flush interval. When
+        the returned generator is closed early, the reader stops after its
+        current chunk and closes the source on its own thread.
+
+        Args:
+            source: Iterable of text chunks
+
+        Yields:
+            The first chunk as-is, then coalesced chunks
+        """
+        with self.metrics._lock:
+            self.metrics.streams += 1
+        chunks: queue.Queue = queue.Queue(maxsize=self.max_pending)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            """Wait for room in the queue; give up once the consumer is gone."""
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read():
+            iterator = iter(source)
+            try:
+                for chunk in iterator:
+                    if not put(chunk):
+                        break
+                else:
+                    put(_DONE)
+            except BaseException as exc:  # re-raised on the consuming side
+                put(exc)
+            finally:
+                if stop.is_set():
+                    close = getattr(iterator, "close", None)
+                    try:
+                        if close is not None:
+                            close()
+                    except Exception as e:
+                        logger.warning("Closing an abandoned stream failed: %s", e)
+
+        ctx = contextvars.copy_context()  # keep the request ID on log records
+        threading.Thread(target=ctx.run, args=(read,), daemon=True, name="stream-coalescer").start()
+        try:
+            yield from self._coalesce(chunks)
+        finally:
+            stop.set()
+
+    def _coalesce(self, chunks: queue.Queue) -> Iterator[str]:
+        """Yield the first queued chunk, then size- and time-bounded groups of the rest."""
+        first = chunks.get()
+        if first is _DONE:
+            return
+        if isinstance(first, BaseException):
+            raise first
+        self.metrics.record(1, first)
+        yield first
+
+        buffer, pending, size = [], 0, 0
+        flushed_at = time.monotonic()
+        while True:
+            timeout = None
+            if buffer:
+                timeout = max(0.0, flushed_at + self.max_interval - time.monotonic())
+            try:
+                item = chunks.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _DONE:
+                if isinstance(item, BaseException):
+                    if buffer:
+                        text = "".join(buffer)
+                        self.metrics.record(pending, text)
+                        yield text
+                    raise item
+                buffer.append(item)
+                pending += 1
+                size += len(item)
+                if size < self.max_chars and time.monotonic() - flushed_at < self.max_interval:
+                    continue
+
+            if buffer:
+                text = "".join(buffer)
+                self.metrics.record(pending, text)
+                yield text
+                buffer, pending, size = [], 0, 0
+                flushed_at = time.monotonic()
+            if item is _DONE:
+                return
@@ -1,10 +1,17 @@
 """
 Vector store utilities for managing document embeddings.
 """
+import hashlib
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 
+from src.utils.docstore import DOCSTORE_FILE, CompactDocstore
+from src.utils.embedding_store import EmbeddingStore, embed_with_store, stores_real_vectors
 from src.utils.logger import logger
 
 
@@ -44,16 +51,369 @@ def split_documents(docs: list, chunk_size: int = 2000, chunk_overlap: int = 200
     return splits
 
 
-def create_vectorstore(documents: list, embedding_function) -> FAISS:
+QUANTIZATION_SPECS = {"none": "Flat", "fp16": "SQfp16", "int8": "SQ8"}
+
+
+class CompressedFAISS(FAISS):
+    """FAISS store over a PCA-reduced and/or scalar-quantized index.
+
+    With `rescore_factor` > 0, `rescore_factor * k` candidates are fetched
+    from the compressed index and re-ranked by exact L2 distance using the
+    full-precision vectors from the embedding store (or re-embedded text
+    when no store is available).
+    """
+
+    rescore_factor: int = 0
+    exact_store: EmbeddingStore = None
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, filter=None, fetch_k: int = 20, **kwargs):
+        if not self.rescore_factor:
+            return super().similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+        candidates = super().similarity_search_with_score_by_vector(
+            embedding, k * self.rescore_factor, filter=filter, fetch_k=max(fetch_k, k * self.rescore_factor), **kwargs
+        )
+        return self.rescore(embedding, candidates, k)
+
+    def rescore(self, embedding, candidates: list, k: int) -> list:
+        """Re-rank (Document, score) candidates by exact L2 distance and keep the top k."""
+        if not candidates:
+            return candidates
+        texts = [doc.page_content for doc, _ in candidates]
+        vectors = self.exact_store.get_many(texts) if self.exact_store is not None else [None] * len(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            for i, vector in zip(missing, self.embedding_function.embed_documents([texts[i] for i in missing])):
+                vectors[i] = vector
+        exact = np.asarray(vectors, dtype="float32")
+        distances = ((exact - np.asarray(embedding, dtype="float32")) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:k]
+        return [(candidates[i][0], float(distances[i])) for i in order]
+
+
+def build_faiss_index(vectors, pca_dim: int = 0, quantization: str = "none"):
+    """Build a trained FAISS index over `vectors`.
+    
+    Args:
+        vectors: Embedding matrix (n, d)
+        pca_dim: Reduce vectors to this many dimensions with PCA (0 = keep all)
+        quantization: "none" (float32), "fp16" or "int8" scalar quantization
+        
+    Returns:
+        FAISS index accepting full-dimension query vectors
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    dim = vectors.shape[1]
+    if quantization not in QUANTIZATION_SPECS:
+        raise ValueError(f"Unknown quantization '{quantization}'; expected one of {sorted(QUANTIZATION_SPECS)}")
+    spec = QUANTIZATION_SPECS[quantization]
+    if pca_dim and pca_dim > len(vectors):
+        # PCA cannot produce more components than there are training vectors
+        logger.warning("Reducing PCA from %d to %d dimensions for %d vectors", pca_dim, len(vectors), len(vectors))
+        pca_dim = len(vectors)
+    if pca_dim and pca_dim < dim:
+        spec = f"PCA{pca_dim},{spec}"
+    index = faiss.index_factory(dim, spec)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def create_vectorstore(
+    documents: list,
+    embedding_function,
+    embedding_store: EmbeddingStore = None,
+    pca_dim: int = 0,
+    quantization: str = "none",
+    rescore_factor: int = 0,
+) -> FAISS:
     """Create FAISS vector store from documents.
     
     Args:
         documents: List of document chunks
         embedding_function: Embedding function instance to use
+        embedding_store: Optional on-disk store consulted before calling the model
+        pca_dim: Reduce stored vectors to this many dimensions (0 = full dimension)
+        quantization: Stored vector precision: "none" (float32), "fp16" or "int8"
+        rescore_factor: Re-rank this many candidates per result with exact vectors (0 = off)
         
     Returns:
         FAISS vector store
     """
-    vectorstore = FAISS.from_documents(documents=documents, embedding=embedding_function)
+    compressed = bool(pca_dim) or quantization != "none" or rescore_factor > 0
+    if embedding_store is not None and not stores_real_vectors(embedding_function):
+        logger.warning("Embedding model is not loaded; building without embedding store %s", embedding_store.path)
+        embedding_store = None
+    if embedding_store is None and not compressed:
+        vectorstore = FAISS.from_documents(documents=documents, embedding=embedding_function)
+    else:
+        texts = [doc.page_content for doc in documents]
+        if embedding_store is not None:
+            vectors = embed_with_store(texts, embedding_function, embedding_store)
+        else:
+            vectors = embedding_function.embed_documents(texts)
+        store_class = CompressedFAISS if compressed else FAISS
+        vectorstore = store_class.from_embeddings(
+            text_embeddings=list(zip(texts, vectors)),
+            embedding=embedding_function,
+            metadatas=[doc.metadata for doc in documents],
+        )
+        if compressed:
+            # Same insertion order, so docstore ids still line up with index positions
+            vectorstore.index = build_faiss_index(vectors, pca_dim=pca_dim, quantization=quantization)
+            vectorstore.rescore_factor = rescore_factor
+            vectorstore.exact_store = embedding_store
     logger.info("Created FAISS vector store")
     return vectorstore
+
+
+@dataclass
+class SearchResults:
+    """Ids and scores of a multi-query search; Documents are resolved on demand."""
+
+    positions: np.ndarray  # (n, k) FAISS row numbers, -1 where fewer than k hits
+    scores: np.ndarray  # (n, k) L2 distances, best first
+    vectorstore: FAISS = field(repr=False)
+    _resolved: dict = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def ids(self, row: int) -> list:
+        """Docstore ids of one query's hits."""
+        mapping = self.vectorstore.index_to_docstore_id
+        return [mapping[int(p)] for p in self.positions[row] if p != -1]
+
+    def documents(self, row: int) -> list:
+        """Documents of one query's hits, decoded on first access."""
+        docs = []
+        for position in self.positions[row]:
+            if position == -1:
+                continue
+            position = int(position)
+            if position not in self._resolved:
+                doc_id = self.vectorstore.index_to_docstore_id[position]
+                self._resolved[position] = self.vectorstore.docstore.search(doc_id)
+            docs.append(self._resolved[position])
+        return docs
+
+    def all_documents(self) -> list:
+        """Documents for every query."""
+        return [self.documents(row) for row in range(len(self))]
+
+
+def search_vectors(vectorstore: FAISS, query_vectors, k: int = 2) -> SearchResults:
+    """Search a matrix of query vectors with a single FAISS call.
+    
+    Unlike `FAISS.similarity_search`, nothing is embedded and no Document is
+    built until a caller asks for it; ids and scores come back as arrays.
+    Stores with exact re-scoring fetch `rescore_factor * k` candidates and
+    re-rank them in one vectorized pass.
+    
+    Args:
+        vectorstore: FAISS vector store
+        query_vectors: Query embeddings (n, d)
+        k: Results per query
+        
+    Returns:
+        SearchResults with (n, k) positions and scores
+    """
+    matrix = np.ascontiguousarray(query_vectors, dtype="float32")
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    rescore_factor = getattr(vectorstore, "rescore_factor", 0)
+    scores, positions = vectorstore.index.search(matrix, k * rescore_factor if rescore_factor else k)
+    if rescore_factor:
+        positions, scores = _rescore_positions(vectorstore, matrix, positions, k)
+    return SearchResults(positions, scores, vectorstore)
+
+
+def _rescore_positions(vectorstore, matrix: np.ndarray, positions: np.ndarray, k: int):
+    """Re-rank candidate positions by exact L2 distance to full-precision vectors."""
+    unique = np.unique(positions[positions != -1])
+    texts = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(p)]).page_content for p in unique]
+    store = getattr(vectorstore, "exact_store", None)
+    vectors = store.get_many(texts) if store is not None else [None] * len(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        for i, vector in zip(missing, vectorstore.embedding_function.embed_documents([texts[i] for i in missing])):
+            vectors[i] = vector
+    exact = np.zeros((len(unique) + 1, matrix.shape[1]), dtype="float32")
+    if len(unique):
+        exact[:-1] = np.asarray(vectors, dtype="float32")
+    # Map positions to rows of `exact`; -1 goes to the padding row and is pushed to the end
+    rows = np.where(positions == -1, len(unique), np.searchsorted(unique, positions))
+    distances = ((exact[rows] - matrix[:, None, :]) ** 2).sum(axis=2)
+    distances[positions == -1] = np.inf
+    order = np.argsort(distances, axis=1)[:, :k]
+    return np.take_along_axis(positions, order, axis=1), np.take_along_axis(distances, order, axis=1)
+
+
+def index_spec(pca_dim: int = 0, quantization: str = "none") -> str:
+    """Storage options that change the on-disk index format ("" for a flat float32 index)."""
+    if not pca_dim and quantization == "none":
+        return ""
+    return f"pca{pca_dim}-{quantization}"
+
+
+def compute_index_version(
+    pdf_path: str,
+    embedding_model: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    index_spec: str = "",
+) -> str:
+    """Derive a short version id from the source PDF and index build settings.
+    
+    Args:
+        pdf_path: Path to the source PDF
+        embedding_model: Name of the embedding model
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+        index_spec: Storage options (PCA/quantization); empty for the default flat index
+        
+    Returns:
+        Hex digest identifying this index build
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(f"|{embedding_model}|{chunk_size}|{chunk_overlap}".encode("utf-8"))
+    if index_spec:
+        digest.update(f"|{index_spec}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_or_build_vectorstore(
+    pdf_path: str,
+    index_path: str,
+    embedding_function,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    embedding_store: EmbeddingStore = None,
+    pca_dim: int = 0,
+    quantization: str = "none",
+    rescore_factor: int = 0,
+    docstore_format: str = "compact",
+) -> FAISS:
+    """Load a persisted FAISS index, or build it from the PDF and save it.
+    
+    Args:
+        pdf_path: Path to the source PDF
+        index_path: Directory holding index.faiss plus docstore.bin or index.pkl
+        embedding_function: Embedding function instance to use
+        chunk_size: Size of text chunks for a fresh build
+        chunk_overlap: Overlap between chunks for a fresh build
+        embedding_store: Optional on-disk store consulted before calling the model
+        pca_dim: PCA dimensions for a fresh build (0 = full dimension)
+        quantization: Stored vector precision for a fresh build: "none", "fp16" or "int8"
+        rescore_factor: Exact re-ranking of rescore_factor * k candidates (0 = off)
+        docstore_format: "compact" (compressed docstore.bin) or "pickle" (LangChain index.pkl) for a fresh build
+        
+    Returns:
+        FAISS vector store
+    """
+    compressed = bool(pca_dim) or quantization != "none" or rescore_factor > 0
+    store_class = CompressedFAISS if compressed else FAISS
+    if os.path.exists(os.path.join(index_path, "index.faiss")):
+        logger.info("Loading existing FAISS index from %s", index_path)
+        if os.path.exists(os.path.join(index_path, DOCSTORE_FILE)):
+            vectorstore = load_compact_vectorstore(index_path, embedding_function, store_class)
+        else:
+            vectorstore = store_class.load_local(index_path, embedding_function, allow_dangerous_deserialization=True)
+        if compressed:
+            vectorstore.rescore_factor = rescore_factor
+            vectorstore.exact_store = embedding_store if stores_real_vectors(embedding_function) else None
+        return vectorstore
+
+    logger.info("No cached vector store found at %s. Building from PDF: %s", index_path, pdf_path)
+    pages = load_pdf(pdf_path)
+    splits = split_documents(pages, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    vectorstore = create_vectorstore(
+        splits,
+        embedding_function,
+        embedding_store=embedding_store,
+        pca_dim=pca_dim,
+        quantization=quantization,
+        rescore_factor=rescore_factor,
+    )
+    try:
+        os.makedirs(index_path, exist_ok=True)
+        if docstore_format == "compact":
+            save_compact_vectorstore(vectorstore, index_path, pages=pages)
+        else:
+            vectorstore.save_local(index_path)
+        logger.info("Saved FAISS index to %s", index_path)
+    except Exception as e:
+        logger.warning("Could not persist FAISS index: %s", e)
+    return vectorstore
+
+
+def save_compact_vectorstore(vectorstore: FAISS, index_path: str, pages: list = None):
+    """Persist a vector store with the compact docstore instead of index.pkl.
+    
+    The store's in-memory docstore is replaced by the written file, so the
+    chunk Documents can be garbage collected.
+    
+    Args:
+        vectorstore: FAISS vector store to save
+        index_path: Target directory
+        pages: Unsplit page documents, so chunk text is stored as page offsets
+    """
+    import faiss
+
+    os.makedirs(index_path, exist_ok=True)
+    ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+    documents = [vectorstore.docstore.search(doc_id) for doc_id in ids]
+    vectorstore.docstore = CompactDocstore.write(os.path.join(index_path, DOCSTORE_FILE), ids, documents, pages=pages)
+    faiss.write_index(vectorstore.index, os.path.join(index_path, "index.faiss"))
+    stale_pickle = os.path.join(index_path, "index.pkl")
+    if os.path.exists(stale_pickle):
+        os.remove(stale_pickle)
+
+
+def load_compact_vectorstore(index_path: str, embedding_function, store_class=FAISS) -> FAISS:
+    """Open a vector store saved by `save_compact_vectorstore`.
+    
+    Only the FAISS index, the docstore header and the chunk table are read;
+    chunk text is decompressed when a search returns it.
+    
+    Args:
+        index_path: Directory holding index.faiss and docstore.bin
+        embedding_function: Embedding function instance to use
+        store_class: FAISS or CompressedFAISS
+        
+    Returns:
+        FAISS vector store
+    """
+    import faiss
+
+    index = faiss.read_index(os.path.join(index_path, "index.faiss"))
+    docstore = CompactDocstore(os.path.join(index_path, DOCSTORE_FILE))
+    return store_class(embedding_function, index, docstore, dict(enumerate(docstore.ids)))
+
+
+def estimate_vectorstore_bytes(vectorstore: FAISS) -> int:
+    """Estimate the resident memory of a FAISS vector store.
+    
+    Counts the serialized FAISS index (vector codes plus any PCA matrix or
+    quantizer tables) and docstore text with a fixed per-document overhead
+    for the Document objects; compact docstores report their own footprint.
+    
+    Args:
+        vectorstore: FAISS vector store
+        
+    Returns:
+        Approximate size in bytes
+    """
+    import faiss
+
+    vector_bytes = len(faiss.serialize_index(vectorstore.index))
+    if hasattr(vectorstore.docstore, "resident_bytes"):
+        return vector_bytes + vectorstore.docstore.resident_bytes()
+    docs = getattr(vectorstore.docstore, "_dict", {})
+    text_bytes = sum(len(doc.page_content) + 512 for doc in docs.values())
+    return vector_bytes + text_bytes
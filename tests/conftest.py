@@ -0,0 +1,75 @@
+"""Shared pytest fixtures."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POLICY_PAGES = [
+    "Vacation policy. Full-time employees receive 20 vacation days per year. "
+    "Vacation requests are approved by your supervisor at least two weeks in advance.",
+    "Sick leave. Employees receive 10 paid sick days per year. A doctor's note is required "
+    "for absences longer than three consecutive days.",
+    "Dress code. Laboratory staff must wear protective equipment (PPE) at all times in the labs. "
+    "PPE is issued by the facility safety office.",
+    "Security incidents. Report any security incident to the security office within one hour. "
+    "Reports can be filed anonymously through the incident hotline.",
+    "Payroll. Employees are paid on the last business day of each month. "
+    "Direct deposit is set up through the HR portal.",
+    "Remote work. Eligible employees may work remotely up to two days per week with supervisor approval.",
+]
+
+
+def write_pdf(path: str, pages: list):
+    """Write a minimal text-only PDF, one page per string."""
+
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        words, lines, line = text.split(), [], ""
+        for word in words:
+            if len(line) + len(word) > 80:
+                lines.append(line)
+                line = ""
+            line = f"{line} {word}".strip()
+        lines.append(line)
+        body = "BT /F1 11 Tf 14 TL 50 750 Td " + " ".join(f"({escape(l)}) '" for l in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+@pytest.fixture
+def policy_pdf(tmp_path):
+    """Path of a small policy PDF."""
+    path = tmp_path / "policies.pdf"
+    write_pdf(str(path), POLICY_PAGES)
+    return str(path)
+
+
+@pytest.fixture
+def embeddings():
+    """Embedding function that works without downloading a model."""
+    from src.models import SentenceTransformersEmbeddings
+
+    return SentenceTransformersEmbeddings("all-MiniLM-L6-v2", batch_window_ms=0)
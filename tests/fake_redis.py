@@ -0,0 +1,137 @@
+"""In-process stand-in for the subset of the redis-py client used by the backends."""
+import fnmatch
+import threading
+import time
+
+
+class FakeRedis:
+    """Single-process imitation of a Redis server with key expiry.
+
+    Values are stored as bytes (lists as lists of bytes) and expire like
+    `PX`/`PEXPIRE`. `clock` can be replaced to move time forward in tests.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _live(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= self.clock():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    @staticmethod
+    def _bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    # strings
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key, value, px=None):
+        with self._lock:
+            self._data[key] = self._bytes(value)
+            self._expires.pop(key, None)
+            if px:
+                self._expires[key] = self.clock() + px / 1000
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._live(key) is not None:
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            keys = [key for key in list(self._data) if self._live(key) is not None]
+        return iter([key for key in keys if fnmatch.fnmatchcase(key, match)])
+
+    def pttl(self, key):
+        with self._lock:
+            if self._live(key) is None:
+                return -2
+            expires_at = self._expires.get(key)
+            return -1 if expires_at is None else int((expires_at - self.clock()) * 1000)
+
+    def pexpire(self, key, ms):
+        with self._lock:
+            if self._live(key) is None:
+                return False
+            self._expires[key] = self.clock() + ms / 1000
+            return True
+
+    # lists
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._live(key)
+            if items is None:
+                items = self._data[key] = []
+            items.extend(self._bytes(value) for value in values)
+            return len(items)
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            items = self._live(key)
+            if items is not None:
+                kept = items[self._slice(len(items), start, end)]
+                if kept:
+                    self._data[key] = kept
+                else:
+                    self.delete(key)
+            return True
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._live(key) or []
+            return list(items[self._slice(len(items), start, end)])
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._live(key) or [])
+
+    @staticmethod
+    def _slice(length, start, end):
+        """Python slice for Redis' inclusive, possibly negative, range."""
+        start = max(start + length, 0) if start < 0 else start
+        end = end + length if end < 0 else end
+        return slice(start, end + 1)
+
+    # pipelines
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them together on `execute`, like a MULTI/EXEC pipeline."""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return results
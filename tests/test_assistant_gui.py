@@ -0,0 +1,24 @@
+"""Tests for the chat GUI helpers that do not need a running Streamlit app."""
+import pytest
+
+pytest.importorskip("streamlit")
+
+from src.ui.assistant_gui import AssistantGUI  # noqa: E402
+
+
+def test_message_text_keeps_content_verbatim():
+    code = "```python\nx = 1\n\n\n\ny = 2\n```\n"
+    assert AssistantGUI._message_text({"role": "ai", "content": code}) == code
+    assert AssistantGUI._message_text({"role": "ai", "content": ["Hel", "lo"]}) == "Hello"
+
+
+def test_load_summary():
+    status = {
+        "memory_mb": 512.4,
+        "memory_rejections": 1,
+        "pools": {
+            "llm": {"in_use": 2, "limit": 8, "waiting": 3, "rejected": 1, "timed_out": 0},
+            "embedding": {"in_use": 0, "limit": 2, "waiting": 0, "rejected": 0, "timed_out": 0},
+        },
+    }
+    assert AssistantGUI._load_summary(status) == "Load: llm 2/8 (+3 queued) · embedding 0/2 · RSS 512 MB · 2 shed"
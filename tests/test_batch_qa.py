@@ -0,0 +1,129 @@
+"""Tests for bulk question answering."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import batch_qa
+from src.utils.batch_qa import BatchItem, BatchRunner, call_with_backoff, completed_keys, read_questions
+from src.utils.vectorstore import create_vectorstore, load_pdf, split_documents
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class StubAssistant:
+    def __init__(self, employee_id, fail=False):
+        self.employee_information = {"name": f"Employee {employee_id}"}
+        self.fail = fail
+
+    def answer_with_documents(self, question, documents):
+        if self.fail:
+            raise RuntimeError("model down")
+        return f"{question} -> {len(documents)} docs"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch_qa.time, "sleep", calls.append)
+    return calls
+
+
+@pytest.fixture
+def vector_store(policy_pdf, embeddings):
+    return create_vectorstore(split_documents(load_pdf(policy_pdf), chunk_size=200, chunk_overlap=20), embeddings)
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_questions_from_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "survey.csv"
+    csv_path.write_text("employee_id,question\nE1, When is payday? \nE2,\nE3,Do I need PPE?\n")
+    jsonl_path = tmp_path / "survey.jsonl"
+    jsonl_path.write_text('{"employee_id": 7, "question": "When is payday?"}\n\n{"question": "Do I need PPE?"}\n')
+
+    assert read_questions(str(csv_path)) == [BatchItem(0, "E1", "When is payday?"), BatchItem(2, "E3", "Do I need PPE?")]
+    assert read_questions(str(jsonl_path)) == [BatchItem(0, "7", "When is payday?"), BatchItem(1, "", "Do I need PPE?")]
+
+
+def test_completed_keys_ignore_errors_and_partial_lines(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    path.write_text('{"key": "a", "status": "ok"}\n{"key": "b", "status": "error"}\n{"key": "c", "sta')
+
+    assert completed_keys(str(path)) == {"a"}
+    assert completed_keys(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_rate_limits_are_retried_with_backoff(sleeps):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited(retry_after="7")
+        return "answer"
+
+    assert call_with_backoff(flaky, base_delay=0.01) == "answer"
+    assert len(attempts) == 3
+    assert sleeps == [7.0, 7.0]
+
+
+def test_other_errors_and_exhausted_retries_raise(sleeps):
+    with pytest.raises(ValueError):
+        call_with_backoff(lambda: (_ for _ in ()).throw(ValueError("bad request")))
+    assert sleeps == []
+
+    with pytest.raises(RateLimited):
+        call_with_backoff(lambda: (_ for _ in ()).throw(RateLimited()), max_retries=2, base_delay=0.01)
+    assert len(sleeps) == 2
+
+
+def test_run_answers_every_row_and_records_failures(tmp_path, embeddings, vector_store):
+    items = [BatchItem(0, "E1", "When is payday?"), BatchItem(1, "bad", "Do I need PPE?"),
+             BatchItem(2, "E3", "How do I report a security incident?")]
+    runner = BatchRunner(lambda employee_id: StubAssistant(employee_id, fail=employee_id == "bad"),
+                         embeddings, vector_store, k=2, concurrency=2, max_retries=0)
+    out = str(tmp_path / "answers.jsonl")
+
+    summary = runner.run(items, out)
+
+    assert (summary["ok"], summary["error"], summary["skipped"]) == (2, 1, 0)
+    records = {r["row"]: r for r in read_records(out)}
+    assert records[0]["answer"] == "When is payday? -> 2 docs" and len(records[0]["pages"]) == 2
+    assert records[1] == dict(records[1], status="error", error="model down")
+
+
+def test_rerun_resumes_after_an_interrupted_write(tmp_path, embeddings, vector_store):
+    items = [BatchItem(0, "E1", "When is payday?"), BatchItem(1, "E2", "Do I need PPE?")]
+    out = tmp_path / "answers.jsonl"
+    out.write_text(json.dumps({"key": items[0].key, "status": "ok"}) + '\n{"key": "cut off')
+    runner = BatchRunner(StubAssistant, embeddings, vector_store)
+
+    summary = runner.run(items, str(out))
+
+    assert (summary["ok"], summary["skipped"]) == (1, 1)
+    assert completed_keys(str(out)) == {items[0].key, items[1].key}
+    assert runner.run(items, str(out))["skipped"] == 2
+
+
+def test_out_of_scope_rows_skip_the_model(tmp_path, embeddings, vector_store):
+    class OffTopic:
+        def classify(self, question):
+            return SimpleNamespace(in_scope=False, topic="sports", resource="the internet")
+
+    runner = BatchRunner(lambda employee_id: StubAssistant(employee_id, fail=True), embeddings, vector_store,
+                         scope_classifier=OffTopic())
+    out = str(tmp_path / "answers.jsonl")
+
+    assert runner.run([BatchItem(0, "E1", "Who won the match?")], out)["ok"] == 1
+    record = read_records(out)[0]
+    assert "Employee E1" in record["answer"] and record["pages"] == []
@@ -0,0 +1,103 @@
+"""Tests for the embedding micro-batcher."""
+import threading
+import time
+
+import pytest
+
+from src.models.batching import MicroBatcher
+
+
+def test_lone_request_skips_batch_window():
+    batcher = MicroBatcher(lambda texts: [t.upper() for t in texts], batch_window_ms=500)
+    batcher.submit("warm-up")
+
+    start = time.perf_counter()
+    assert batcher.submit("hello") == "HELLO"
+    assert time.perf_counter() - start < 0.25
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+    gate = threading.Event()
+
+    def encode(texts):
+        calls.append(list(texts))
+        if len(calls) == 1:
+            gate.wait(1)  # hold the worker so the others queue up behind it
+        return [len(t) for t in texts]
+
+    batcher = MicroBatcher(encode, batch_window_ms=50, max_batch=8)
+    results = {}
+    threads = [threading.Thread(target=lambda t=t: results.__setitem__(t, batcher.submit(t)))
+               for t in ["a", "bb", "ccc", "dddd", "eeeee"]]
+    threads[0].start()
+    time.sleep(0.05)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert results == {"a": 1, "bb": 2, "ccc": 3, "dddd": 4, "eeeee": 5}
+    assert len(calls) == 2
+    assert sorted(calls[1]) == ["bb", "ccc", "dddd", "eeeee"]
+    assert batcher.metrics.snapshot()["batches"] == 2
+
+
+def test_short_results_fail_the_remaining_callers():
+    gate = threading.Event()
+
+    def encode(texts):
+        gate.wait(1)
+        return [0] * (len(texts) - 1)
+
+    batcher = MicroBatcher(encode, batch_window_ms=50)
+    outcomes = []
+
+    def call(text):
+        try:
+            outcomes.append(batcher.submit(text))
+        except RuntimeError as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call, args=(t,)) for t in ["a", "b", "c"]]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(outcomes) == 3
+    assert any(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_encode_error_is_raised_to_callers():
+    def encode(texts):
+        raise ValueError("model unavailable")
+
+    batcher = MicroBatcher(encode, batch_window_ms=0)
+    with pytest.raises(ValueError):
+        batcher.submit("x")
+
+
+def test_full_queue_encodes_inline():
+    gate = threading.Event()
+
+    def encode(texts):
+        if "first" in texts:
+            gate.wait(1)
+        return texts
+
+    batcher = MicroBatcher(encode, batch_window_ms=0, queue_depth=1)
+    threading.Thread(target=batcher.submit, args=("first",), daemon=True).start()
+    time.sleep(0.05)
+    threading.Thread(target=batcher.submit, args=("queued",), daemon=True).start()
+    time.sleep(0.05)
+    try:
+        assert batcher.submit("inline") == "inline"
+        assert batcher.metrics.inline_fallbacks == 1
+    finally:
+        gate.set()
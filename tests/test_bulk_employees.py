@@ -0,0 +1,56 @@
+"""Tests for the seedable bulk employee generator."""
+import csv
+import re
+import uuid
+
+import numpy as np
+
+from src.data.bulk_employees import FIELDS, batch_to_records, generate_employee_batch, iter_employee_batches, write_csv
+from src.data.employees import DEPARTMENTS, POSITIONS, SKILLS, generate_employee_data
+
+
+def collect(batches):
+    return [record for batch in batches for record in batch_to_records(batch)]
+
+
+def test_records_match_the_generate_employee_data_format():
+    record = batch_to_records(generate_employee_batch(5, seed=1, reference_date="2025-01-01"))[0]
+    legacy = generate_employee_data(1)[0]
+
+    assert list(record) == FIELDS == list(legacy)
+    assert uuid.UUID(record["employee_id"]).version == 4
+    assert re.fullmatch(r"[2-9]\d{2}-\d{3}-\d{4}", record["phone_number"])
+    assert record["position"] in POSITIONS and record["department"] in DEPARTMENTS
+    assert 2 <= len(record["skills"]) <= 5 and set(record["skills"]) <= set(SKILLS)
+    assert "2015-01-01" <= record["hire_date"] < "2025-01-01"
+    assert isinstance(record["salary"], float) and 40000 <= record["salary"] <= 120000
+
+
+def test_seeded_output_is_independent_of_batching_and_workers():
+    one = collect(iter_employee_batches(30, batch_size=30, seed=7, reference_date="2025-01-01"))
+    same = collect(iter_employee_batches(30, batch_size=30, seed=7, reference_date="2025-01-01", workers=2))
+    assert one == same
+    other = collect(iter_employee_batches(30, batch_size=30, seed=8, reference_date="2025-01-01"))
+    assert one != other
+
+
+def test_emails_are_unique_across_batches():
+    records = collect(iter_employee_batches(250, batch_size=100, seed=3, reference_date="2025-01-01"))
+    assert len(records) == 250
+    assert len({r["email"] for r in records}) == 250
+    assert len({r["employee_id"] for r in records}) == 250
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / "employees.csv"
+    rows = write_csv(str(path), iter_employee_batches(20, batch_size=8, seed=5, reference_date="2025-01-01"))
+    with open(path, newline="", encoding="utf-8") as f:
+        read = list(csv.DictReader(f))
+    assert rows == len(read) == 20
+    assert read[0]["skills"].count(";") >= 1
+
+
+def test_uuid_columns_are_plain_strings():
+    batch = generate_employee_batch(3, seed=2)
+    assert batch["employee_id"].dtype.kind == "U"
+    assert np.all(np.char.str_len(batch["employee_id"]) == 36)
@@ -0,0 +1,129 @@
+"""Tests for the cache backends and the response cache."""
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from src.utils.cache import CacheBackend, MemoryCache, RedisCache, ResponseCache, SQLiteCache, normalize_query
+from tests.fake_redis import FakeRedis
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache(max_entries=3)
+    if request.param == "sqlite":
+        return SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=3)
+    return RedisCache(client=FakeRedis())
+
+
+def test_backend_round_trip(backend):
+    backend.set("k", b"value")
+    assert backend.get("k") == b"value"
+    backend.delete("k")
+    assert backend.get("k") is None
+    backend.set("a", b"1")
+    backend.clear()
+    assert backend.get("a") is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+
+
+def test_memory_cache_byte_limit():
+    cache = MemoryCache(max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.set("c", b"12345")
+    assert cache.get("a") is None
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+
+
+def test_ttl_expiry(monkeypatch, tmp_path):
+    clock = Clock()
+    monkeypatch.setattr("src.utils.cache.time.time", clock)
+    memory = MemoryCache(default_ttl=10)
+    sqlite = SQLiteCache(str(tmp_path / "c.sqlite3"), default_ttl=10)
+    redis = RedisCache(client=FakeRedis(clock=clock), default_ttl=10)
+    for cache in (memory, sqlite, redis):
+        cache.set("k", b"v")
+        cache.set("forever", b"v", ttl=0)
+    clock.now += 11
+    for cache in (memory, sqlite, redis):
+        assert cache.get("k") is None
+        assert cache.get("forever") == b"v"
+
+
+def test_redis_cache_namespaces_and_skips_large_values():
+    client = FakeRedis()
+    cache = RedisCache(client=client, prefix="t:", max_value_bytes=4)
+    cache.set("k", b"1234")
+    cache.set("big", b"12345")
+    assert client.get("t:k") == b"1234"
+    assert client.get("t:big") is None
+    client.set("other:k", b"x")
+    cache.clear()
+    assert client.get("other:k") == b"x"
+
+
+def test_response_cache_round_trip_and_counters():
+    cache = ResponseCache(MemoryCache(), "v1")
+    assert cache.get_answer("What is PPE?", "scope") is None
+    cache.set_answer("What is PPE?", "scope", "Protective equipment.")
+    assert cache.get_answer("  what is ppe ", "scope") == "Protective equipment."
+    cache.set_retrieval("q", [Document(page_content="text", metadata={"page": 1})])
+    assert cache.get_retrieval("Q?")[0].metadata == {"page": 1}
+    assert cache.stats() == {"index_version": "v1", "hits": 2, "misses": 1}
+
+
+def test_response_cache_keys_include_index_version():
+    backend = MemoryCache()
+    ResponseCache(backend, "v1").set_answer("q", "s", "old")
+    assert ResponseCache(backend, "v2").get_answer("q", "s") is None
+
+
+def test_response_cache_counters_are_thread_safe():
+    cache = ResponseCache(MemoryCache(), "v1")
+    cache.set_answer("hit", "s", "a")
+
+    def worker():
+        for _ in range(500):
+            cache.get_answer("hit", "s")
+            cache.get_answer("miss", "s")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["hits"] == 4000
+    assert cache.stats()["misses"] == 4000
+
+
+def test_normalize_query():
+    assert normalize_query("  How   many days?? ") == "how many days"
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
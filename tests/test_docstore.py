@@ -0,0 +1,134 @@
+"""Tests for the compact on-disk docstore."""
+import importlib
+import pickle
+
+import pytest
+from langchain_core.documents import Document
+
+from src.utils.docstore import CompactDocstore, benchmark
+from src.utils.vectorstore import load_or_build_vectorstore, load_pdf, split_documents
+
+docstore_module = importlib.import_module("src.utils.docstore")
+
+
+@pytest.fixture
+def corpus(policy_pdf):
+    pages = load_pdf(policy_pdf)
+    chunks = split_documents(pages, chunk_size=60, chunk_overlap=15)
+    return pages, chunks, [f"id-{i}" for i in range(len(chunks))]
+
+
+@pytest.fixture
+def store(tmp_path, corpus):
+    pages, chunks, ids = corpus
+    store = CompactDocstore.write(str(tmp_path / "docstore.bin"), ids, chunks, pages=pages, block_size=200)
+    yield store
+    store.close()
+
+
+def test_round_trip(store, corpus):
+    _, chunks, ids = corpus
+
+    for doc_id, chunk in zip(ids, chunks):
+        doc = store.search(doc_id)
+        assert doc.page_content == chunk.page_content
+        assert doc.metadata == chunk.metadata
+        assert doc.id == doc_id
+    assert len(store) == len(chunks)
+    assert store.search("missing") == "ID missing not found."
+
+
+def test_page_text_and_metadata_are_stored_once(store, corpus, tmp_path):
+    pages, chunks, ids = corpus
+
+    assert len(store.metadata) == len(pages)
+    assert len(store._segments) == len(pages)
+    without_pages = CompactDocstore.write(str(tmp_path / "chunks.bin"), ids, chunks)
+    assert len(without_pages._segments) == len(chunks)
+    assert without_pages.search(ids[3]).page_content == chunks[3].page_content
+    without_pages.close()
+
+
+def test_blocks_are_decoded_lazily_and_cached(tmp_path, corpus):
+    pages, chunks, ids = corpus
+    store = CompactDocstore.write(str(tmp_path / "docstore.bin"), ids, chunks, pages=pages,
+                                  block_size=200, codec="zlib")
+    store.block_cache_size = 2
+    assert len(store._blocks) > 2
+    assert store.blocks_decoded == 0
+
+    store.search(ids[0])
+    store.search(ids[0])
+    assert store.blocks_decoded == 1
+
+    for doc_id in ids:
+        store.search(doc_id)
+    assert len(store._block_cache) == 2
+    store.close()
+
+
+def test_added_documents_are_kept_until_rewrite(store, tmp_path):
+    store.add({"extra": Document(page_content="Added later.", metadata={"page": 99})})
+    with pytest.raises(ValueError, match="already exist"):
+        store.add({"extra": Document(page_content="Again.")})
+    with pytest.raises(ValueError, match="Cannot delete stored document"):
+        store.delete(["id-0"])
+
+    rewritten = store.rewrite(str(tmp_path / "rewritten.bin"))
+
+    assert rewritten.search("extra").page_content == "Added later."
+    assert rewritten.search("id-0").page_content == store.search("id-0").page_content
+    assert len(rewritten) == len(store)
+    store.delete(["extra"])
+    assert store.search("extra") == "ID extra not found."
+    rewritten.close()
+
+
+def test_rejects_other_files_and_pickling(tmp_path, store):
+    path = tmp_path / "index.pkl"
+    path.write_bytes(b"not a docstore")
+
+    with pytest.raises(ValueError, match="not a compact docstore"):
+        CompactDocstore(str(path))
+    with pytest.raises(TypeError):
+        pickle.dumps(store)
+
+
+def test_zstd_blocks_need_zstandard(monkeypatch):
+    monkeypatch.setattr(docstore_module, "zstandard", None)
+
+    with pytest.raises(ImportError, match="zstandard"):
+        docstore_module._decompress(b"", "zstd")
+
+
+def test_zstd_round_trip(tmp_path, corpus):
+    pytest.importorskip("zstandard")
+    pages, chunks, ids = corpus
+
+    store = CompactDocstore.write(str(tmp_path / "docstore.bin"), ids, chunks, pages=pages, codec="zstd")
+
+    assert store.codec == "zstd"
+    assert store.search(ids[-1]).page_content == chunks[-1].page_content
+    store.close()
+
+
+def test_compact_index_reloads_with_the_same_documents(tmp_path, policy_pdf, embeddings):
+    index_path = str(tmp_path / "index")
+    built = load_or_build_vectorstore(policy_pdf, index_path, embeddings, chunk_size=60, chunk_overlap=15,
+                                      docstore_format="compact")
+
+    loaded = load_or_build_vectorstore(policy_pdf, index_path, embeddings, chunk_size=60, chunk_overlap=15,
+                                       docstore_format="compact")
+
+    assert isinstance(loaded.docstore, CompactDocstore)
+    question = "Direct deposit is set up through the HR portal."
+    assert ([d.page_content for d in loaded.similarity_search(question, k=2)]
+            == [d.page_content for d in built.similarity_search(question, k=2)])
+
+
+def test_benchmark_reports_both_formats(policy_pdf):
+    result = benchmark(policy_pdf, copies=3, chunk_size=60, chunk_overlap=15)
+
+    assert result["chunks"] > 0
+    assert result["compact_file_kb"] < result["pickle_file_kb"]
+    assert result["compact_lookup_us"] > 0
@@ -0,0 +1,130 @@
+"""Tests for the content-addressed embedding store."""
+import threading
+
+import numpy as np
+import pytest
+
+from src.models import SentenceTransformersEmbeddings
+from src.utils.embedding_store import EmbeddingStore, embed_with_store
+
+
+class CountingEmbeddings:
+    """Deterministic embeddings that record which texts were encoded."""
+
+    model = "loaded"
+
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.encoded = []
+
+    def embed_documents(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0, 0.5][: self.dim] for t in texts]
+
+
+def test_vectors_survive_reopen(tmp_path):
+    path = str(tmp_path / "model.emb")
+    store = EmbeddingStore(path, "model-a")
+    assert store.put_many(["alpha", "beta"], [[1, 2, 3], [4, 5, 6]]) == 2
+    assert store.put_many(["alpha"], [[9, 9, 9]]) == 0
+
+    reopened = EmbeddingStore(path, "model-a")
+    alpha, missing = reopened.get_many(["alpha", "gamma"])
+    np.testing.assert_array_equal(alpha, np.array([1, 2, 3], dtype="float32"))
+    assert missing is None
+    assert len(reopened) == 2
+
+
+def test_store_rejects_other_model(tmp_path):
+    path = str(tmp_path / "model.emb")
+    EmbeddingStore(path, "model-a").put_many(["x"], [[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        EmbeddingStore(path, "model-b")
+
+
+def test_torn_trailing_record_is_ignored(tmp_path):
+    path = str(tmp_path / "model.emb")
+    EmbeddingStore(path, "m").put_many(["x", "y"], [[1.0, 2.0], [3.0, 4.0]])
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 7)
+    store = EmbeddingStore(path, "m")
+    assert len(store) == 2
+    assert store.get_many(["y"])[0].tolist() == [3.0, 4.0]
+
+
+def test_compact_keeps_only_wanted_texts(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "m.emb"), "m")
+    store.put_many(["a", "b", "c"], [[1.0], [2.0], [3.0]])
+    assert store.compact(keep_texts=["b"]) == 2
+    assert store.get_many(["a", "b"])[0] is None
+    assert store.stats()["records"] == 1
+
+
+def test_embed_with_store_only_encodes_misses(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "m.emb"), "m")
+    embeddings = CountingEmbeddings()
+    first = embed_with_store(["a", "bb"], embeddings, store)
+    second = embed_with_store(["bb", "ccc", "a"], embeddings, store)
+
+    assert embeddings.encoded == ["a", "bb", "ccc"]
+    assert second[0] == first[1] and second[2] == first[0]
+
+
+def test_fallback_embeddings_are_never_stored(tmp_path):
+    embeddings = SentenceTransformersEmbeddings("not-a-real-model", batch_window_ms=0)
+    if embeddings.model is not None:
+        pytest.skip("sentence-transformers model loaded; no fallback to test")
+    store = EmbeddingStore(str(tmp_path / "m.emb"), "not-a-real-model")
+
+    vectors = embed_with_store(["policy text"], embeddings, store)
+
+    assert len(vectors) == 1
+    assert len(store) == 0
+    assert not (tmp_path / "m.emb").exists()
+
+
+def test_two_writers_on_one_path_keep_their_rows(tmp_path):
+    path = str(tmp_path / "m.emb")
+    first = EmbeddingStore(path, "m")
+    second = EmbeddingStore(path, "m")
+
+    first.put_many(["a"], [[2.0, 2.0, 2.0, 2.0]])
+    second.put_many(["b"], [[3.0, 3.0, 3.0, 3.0]])
+    first.put_many(["c", "b"], [[4.0, 4.0, 4.0, 4.0], [9.0, 9.0, 9.0, 9.0]])
+
+    for store in (first, second, EmbeddingStore(path, "m")):
+        a, b, c = store.get_many(["a", "b", "c"])
+        assert (a.tolist(), b.tolist(), c.tolist()) == ([2.0] * 4, [3.0] * 4, [4.0] * 4)
+    assert EmbeddingStore(path, "m").stats()["records"] == 3
+
+
+def test_concurrent_writers_never_mix_up_vectors(tmp_path):
+    path = str(tmp_path / "m.emb")
+    stores = [EmbeddingStore(path, "m") for _ in range(4)]
+
+    def write(n, store):
+        for i in range(25):
+            store.put_many([f"{n}-{i}"], [[float(n), float(i)]])
+
+    threads = [threading.Thread(target=write, args=(n, store)) for n, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reopened = EmbeddingStore(path, "m")
+    assert len(reopened) == 100
+    for n in range(4):
+        vectors = reopened.get_many([f"{n}-{i}" for i in range(25)])
+        assert [v.tolist() for v in vectors] == [[float(n), float(i)] for i in range(25)]
+
+
+def test_compaction_by_another_store_is_picked_up(tmp_path):
+    path = str(tmp_path / "m.emb")
+    reader = EmbeddingStore(path, "m")
+    reader.put_many(["a", "b"], [[1.0], [2.0]])
+
+    EmbeddingStore(path, "m").compact(keep_texts=["b"])
+
+    assert reader.get_many(["a", "b"])[0] is None
+    assert reader.get_many(["b"])[0].tolist() == [2.0]
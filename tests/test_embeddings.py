@@ -0,0 +1,89 @@
+"""Tests for adaptive ingestion batching in the embeddings wrapper."""
+import numpy as np
+
+from src.models import SentenceTransformersEmbeddings
+from src.models.batching import IngestionStats, plan_token_batches
+
+
+def test_token_batches_are_length_sorted_and_within_budget():
+    lengths = [50, 3, 400, 12, 7, 120, 3, 60]
+    batches = plan_token_batches(lengths, token_budget=256, max_batch=4)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    flat = [lengths[i] for batch in batches for i in batch]
+    assert flat == sorted(flat)
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 256
+
+
+def test_oversized_text_gets_its_own_batch():
+    assert plan_token_batches([1000, 5], token_budget=100) == [[1], [0]]
+
+
+def test_adaptive_mode_matches_fixed_mode_in_input_order():
+    texts = [("word " * n).strip() for n in (40, 2, 300, 15, 2, 90)]
+    fixed = SentenceTransformersEmbeddings(batch_window_ms=0)
+    adaptive = SentenceTransformersEmbeddings(batch_window_ms=0, ingestion_mode="adaptive", token_budget=128)
+
+    assert adaptive.embed_documents(texts) == fixed.embed_documents(texts)
+    stats = adaptive.last_ingestion_stats
+    assert stats.chunks == len(texts)
+    assert stats.batches > 1
+    assert 0.0 <= stats.padding_ratio < 1.0
+
+
+def test_ingestion_stats_derived_figures():
+    stats = IngestionStats(chunks=10, batches=2, padded_tokens=200, real_tokens=150, seconds=2.0)
+    assert stats.chunks_per_second == 5.0
+    assert stats.padding_ratio == 0.25
+
+
+class RecordingModel:
+    """Stands in for a loaded SentenceTransformer and records encode batch sizes."""
+
+    tokenizer = None
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.batch_sizes.append((len(texts), batch_size))
+        return np.ones((len(texts), 4), dtype="float32")
+
+
+def test_adaptive_batches_are_not_split_again_by_count():
+    embeddings = SentenceTransformersEmbeddings(batch_window_ms=0, ingestion_mode="adaptive", token_budget=4096)
+    embeddings.model = RecordingModel()
+
+    embeddings.embed_documents(["short text"] * 100)
+
+    assert embeddings.model.batch_sizes == [(100, 100)]
+
+
+def test_ingestion_pool_is_started_once(monkeypatch):
+    started = []
+
+    class InlinePool:
+        def __init__(self, **kwargs):
+            started.append(self)
+            self.shut_down = False
+
+        def map(self, fn, batches):
+            return [np.ones((len(batch), 4), dtype="float32") for batch in batches]
+
+        def shutdown(self, wait=True):
+            self.shut_down = True
+
+    monkeypatch.setattr("src.models.embeddings.ProcessPoolExecutor", InlinePool)
+    embeddings = SentenceTransformersEmbeddings(batch_window_ms=0, ingestion_mode="adaptive", token_budget=16,
+                                                ingestion_workers=2)
+    embeddings.model = RecordingModel()
+    texts = [("word " * n).strip() for n in (2, 3, 9, 11)]
+
+    embeddings.embed_documents(texts)
+    embeddings.embed_documents(texts)
+    assert len(started) == 1
+
+    embeddings.close()
+    assert started[0].shut_down
@@ -0,0 +1,65 @@
+"""Tests for the compact employee context projector."""
+from src.utils.employee_context import EmployeeContextProjector, classify_question, report_token_savings
+
+EMPLOYEE = {
+    "employee_id": "e-1",
+    "name": "Jane",
+    "lastname": "Doe",
+    "email": "jane@example.com",
+    "phone_number": "555-123-4567",
+    "position": "Research Scientist",
+    "department": "Research & Development",
+    "skills": ["Python", "Biochemistry", "Leadership", "Public Speaking"],
+    "location": "Raccoon City HQ",
+    "hire_date": "2024-03-01",
+    "supervisor": "Albert Wesker",
+    "salary": 85000.0,
+}
+
+
+def test_question_types():
+    assert classify_question("When is my next paycheck?") == "compensation"
+    assert classify_question("How do I contact my supervisor?") == "contact"
+    assert classify_question("How much vacation do I have?") == "tenure"
+    assert classify_question("Where is parking?") == "location"
+    assert classify_question("What are my duties?") == "role"
+    assert classify_question("Hello!") == "general"
+
+
+def test_only_relevant_fields_are_rendered():
+    projector = EmployeeContextProjector()
+    general = projector.render(EMPLOYEE, "Hi there")
+    pay = projector.render(EMPLOYEE, "What is my salary?")
+    role = projector.render(EMPLOYEE, "What does my role involve?")
+
+    assert general == "Name: Jane Doe | Position: Research Scientist | Dept: Research & Development | Location: Raccoon City HQ"
+    assert "Salary: $85,000" in pay and "Salary" not in general
+    assert "Skills: Python, Biochemistry, Leadership" in role and "Public Speaking" not in role
+    for text in (general, pay, role):
+        assert "555-123-4567" not in text and "e-1" not in text
+
+
+def test_renderings_are_cached_until_invalidated():
+    projector = EmployeeContextProjector()
+    employee = dict(EMPLOYEE)
+    projector.render(employee)
+    employee["position"] = "Security Officer"
+    assert "Research Scientist" in projector.render(employee)
+
+    projector.invalidate("e-1")
+    assert "Security Officer" in projector.render(employee)
+
+
+def test_token_savings_are_reported():
+    projector = EmployeeContextProjector()
+    projector.render(EMPLOYEE, "hello")
+    savings = projector.savings()
+    assert savings["compact_tokens"] < savings["raw_tokens"]
+    assert savings["saved_pct"] > 50
+
+    report = report_token_savings(EMPLOYEE)
+    assert all(report[name] < report["raw"] for name in report if name != "raw")
+
+
+def test_missing_employee():
+    assert EmployeeContextProjector().render({}, "hi") == "Unknown employee"
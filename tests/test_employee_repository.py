@@ -0,0 +1,56 @@
+"""Tests for the SQLite employee directory."""
+import pytest
+
+from src.data.bulk_employees import iter_employee_batches, write_csv
+from src.data.employee_repository import EmployeeRepository
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repo = EmployeeRepository(str(tmp_path / "employees.sqlite3"), cache_size=2)
+    repo.bulk_import([
+        {"employee_id": "e-1", "email": "Jane.Doe@Example.com", "name": "Jane", "skills": ["Python"]},
+        {"employee_id": "e-2", "email": "john@example.com", "name": "John"},
+        {"employee_id": "e-3", "email": None, "name": "No Email"},
+    ])
+    return repo
+
+
+def test_lookup_by_id_and_case_insensitive_email(repository):
+    assert repository.count() == 3
+    assert repository.get("e-1")["skills"] == ["Python"]
+    assert repository.get(" jane.doe@example.COM ")["employee_id"] == "e-1"
+    assert repository.get("e-3")["name"] == "No Email"
+    assert repository.get("missing@example.com") is None
+    assert repository.get("e-404") is None
+
+
+def test_cache_serves_copies_and_stays_bounded(repository):
+    record = repository.get("e-1")
+    record["name"] = "changed"
+    assert repository.get("e-1")["name"] == "Jane"
+    assert repository.hits == 1
+
+    repository.get("e-2")
+    repository.get("e-3")
+    assert len(repository._cache) == 2
+
+
+def test_reimport_replaces_records_and_clears_cache(repository):
+    repository.get("e-2")
+    repository.bulk_import([{"employee_id": "e-2", "email": "john@example.com", "name": "Johnny"}])
+    assert repository.count() == 3
+    assert repository.get("e-2")["name"] == "Johnny"
+
+
+def test_csv_import_parses_skills_and_salary(tmp_path):
+    path = str(tmp_path / "export.csv")
+    write_csv(path, iter_employee_batches(12, batch_size=5, seed=1, reference_date="2025-01-01"))
+    repo = EmployeeRepository(str(tmp_path / "dir.sqlite3"))
+
+    assert repo.import_file(path) == 12
+    with open(path, encoding="utf-8") as f:
+        employee_id = f.readlines()[1].split(",")[0]
+    record = repo.get(employee_id)
+    assert isinstance(record["skills"], list) and len(record["skills"]) >= 2
+    assert isinstance(record["salary"], float)
@@ -0,0 +1,116 @@
+"""Tests for precomputed FAQ answers."""
+import os
+
+import numpy as np
+import pytest
+
+from src.models.local_llm import FakeStreamingChatModel
+from src.utils.faq import FAQ_QUESTIONS, FAQIndex, backfill_faq, fill_placeholders
+from src.utils.index_registry import IndexRegistry
+from src.utils.index_versions import IndexVersionStore, build_index_version
+from src.utils.vectorstore import load_or_build_vectorstore
+
+
+@pytest.fixture
+def llm():
+    return FakeStreamingChatModel(first_token_latency=0.0, token_latency=0.0)
+
+
+def build(policy_pdf, index_path, embeddings, **kwargs):
+    return build_index_version(policy_pdf, index_path, embeddings, "test-model",
+                               chunk_size=200, chunk_overlap=20, **kwargs)
+
+
+def test_every_built_version_ships_its_faq(tmp_path, policy_pdf, embeddings, llm):
+    index_path = str(tmp_path / "index")
+
+    version = build(policy_pdf, index_path, embeddings, faq_llm=llm)
+
+    store = IndexVersionStore(index_path)
+    version_path = store.version_path(version)
+    assert os.path.exists(os.path.join(FAQIndex.directory(version_path), FAQIndex.ANSWERS_FILE))
+    assert store.manifest(version)["faq_answers"] == len(FAQ_QUESTIONS)
+    faq = FAQIndex.load(version_path, version, embeddings)
+    assert faq is not None and len(faq.entries) == len(FAQ_QUESTIONS)
+
+
+def test_version_without_faq_llm_has_no_faq(tmp_path, policy_pdf, embeddings):
+    index_path = str(tmp_path / "index")
+
+    version = build(policy_pdf, index_path, embeddings)
+
+    assert FAQIndex.load(IndexVersionStore(index_path).version_path(version), version, embeddings) is None
+
+
+def test_failing_faq_model_does_not_block_the_index(tmp_path, policy_pdf, embeddings):
+    index_path = str(tmp_path / "index")
+
+    version = build(policy_pdf, index_path, embeddings, faq_llm=FakeStreamingChatModel(error_rate=1.0))
+
+    store = IndexVersionStore(index_path)
+    assert store.current() == version
+    assert store.manifest(version)["faq_answers"] == 0
+
+
+@pytest.fixture
+def registry(embeddings):
+    return IndexRegistry(embeddings, embedding_model="test-model", chunk_size=200, chunk_overlap=20,
+                         refresh_interval=0)
+
+
+def test_serving_builds_no_faq(tmp_path, policy_pdf, embeddings, registry):
+    registry.register("alpha", policy_pdf, str(tmp_path / "alpha"))
+    registry.get("alpha")
+
+    version = registry.index_version("alpha")
+    assert FAQIndex.load(registry.index_path("alpha"), version, embeddings) is None
+    assert "faq_answers" not in registry.version_store("alpha").manifest(version)
+
+
+def test_backfill_attaches_a_faq_to_the_served_version(tmp_path, policy_pdf, embeddings, registry, llm):
+    version = build(policy_pdf, str(tmp_path / "alpha"), embeddings)
+    registry.register("alpha", policy_pdf, str(tmp_path / "alpha"))
+    before = FAQIndex.stamp(registry.index_path("alpha"))
+
+    faq = backfill_faq(registry, "alpha", llm, questions=FAQ_QUESTIONS[:3])
+
+    assert faq.index_version == version
+    assert FAQIndex.load(registry.index_path("alpha"), version, embeddings) is not None
+    assert FAQIndex.stamp(registry.index_path("alpha")) > before == 0.0
+    manifest = registry.version_store("alpha").manifest(version)
+    assert manifest["faq_answers"] == 3 and manifest["chunks"] > 0
+
+
+def test_backfill_works_for_a_legacy_index(tmp_path, policy_pdf, embeddings, registry, llm):
+    legacy_path = str(tmp_path / "legacy")
+    load_or_build_vectorstore(policy_pdf, legacy_path, embeddings, chunk_size=200, chunk_overlap=20)
+    registry.register("legacy", policy_pdf, legacy_path)
+
+    backfill_faq(registry, "legacy", llm, questions=FAQ_QUESTIONS[:2])
+
+    assert registry.index_path("legacy") == legacy_path
+    faq = FAQIndex.load(legacy_path, registry.index_version("legacy"), embeddings)
+    assert faq is not None and len(faq.entries) == 2
+
+
+def test_match_and_stale_version(tmp_path, embeddings):
+    questions = ["How many vacation days do I get?", "When is payday?"]
+    vectors = np.asarray(embeddings.embed_documents(questions), dtype="float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    entries = [{"question": q, "answer": f"Answer for {{name}}: {q}"} for q in questions]
+    FAQIndex(entries, vectors, "v1", embeddings).save(str(tmp_path))
+
+    faq = FAQIndex.load(str(tmp_path), "v1", embeddings, threshold=0.99)
+    entry, score = faq.match("When is payday?")
+
+    assert entry["question"] == "When is payday?" and score >= 0.99
+    assert faq.match("Where can I park my bicycle overnight?") is None
+    assert (faq.hits, faq.misses) == (1, 1)
+    assert FAQIndex.load(str(tmp_path), "v2", embeddings) is None
+
+
+def test_fill_placeholders():
+    answer = "Hi {name}, as a {position} in {department} you get 20 days. {unknown} stays."
+    employee = {"name": "Ada", "position": "Engineer", "department": "R&D"}
+
+    assert fill_placeholders(answer, employee) == "Hi Ada, as a Engineer in R&D you get 20 days. {unknown} stays."
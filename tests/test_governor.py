@@ -0,0 +1,180 @@
+"""Tests for admission control."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.assistant import Assistant
+from src.utils.governor import EMBEDDING, LLM, Overloaded, ResourceGovernor
+from src.utils.streaming import StreamCoalescer
+
+MB = 1024 * 1024
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def in_use(governor, resource=LLM):
+    return governor.status()["pools"][resource]["in_use"]
+
+
+def hold(governor, resource=LLM):
+    """Take a slot on a helper thread; returns the event that releases it."""
+    release, held = threading.Event(), threading.Event()
+
+    def run():
+        with governor.admit(resource):
+            held.set()
+            release.wait()
+
+    threading.Thread(target=run, daemon=True).start()
+    assert held.wait(1.0)
+    return release
+
+
+def test_unlimited_resources_are_not_pooled():
+    governor = ResourceGovernor({LLM: 1, EMBEDDING: 0})
+
+    with governor.admit(EMBEDDING):
+        with governor.admit(EMBEDDING):
+            pass
+    assert list(governor.status()["pools"]) == [LLM]
+
+
+def test_full_queue_rejects_immediately():
+    governor = ResourceGovernor({LLM: 1}, max_queue=1, timeout=5.0)
+    release = hold(governor)
+    def queued():
+        with governor.admit(LLM):
+            pass
+
+    threading.Thread(target=queued, daemon=True).start()
+    assert wait_for(lambda: governor.status()["pools"][LLM]["waiting"] == 1)
+
+    start = time.monotonic()
+    with pytest.raises(Overloaded, match="already queued"):
+        with governor.admit(LLM):
+            pass
+
+    assert time.monotonic() - start < 0.5
+    assert governor.status()["pools"][LLM]["rejected"] == 1
+    release.set()
+
+
+def test_waiters_give_up_at_their_deadline():
+    governor = ResourceGovernor({LLM: 1})
+    release = hold(governor)
+
+    start = time.monotonic()
+    with pytest.raises(Overloaded, match="timed out"):
+        with governor.admit(LLM, timeout=0.05):
+            pass
+
+    assert 0.04 < time.monotonic() - start < 0.5
+    assert governor.status()["pools"][LLM]["timed_out"] == 1
+    release.set()
+
+
+def test_released_slot_goes_to_a_waiter():
+    governor = ResourceGovernor({LLM: 1})
+    release = hold(governor)
+    threading.Timer(0.05, release.set).start()
+
+    with governor.admit(LLM, timeout=2.0):
+        assert in_use(governor) == 1
+
+    pool = governor.status()["pools"][LLM]
+    assert (pool["in_use"], pool["admitted"]) == (0, 2)
+    assert pool["max_wait_ms"] > 0
+
+
+def test_hard_watermark_rejects_new_work():
+    governor = ResourceGovernor({LLM: 1}, memory_soft_bytes=100 * MB, memory_hard_bytes=200 * MB,
+                                memory_probe=lambda: 250 * MB)
+
+    with pytest.raises(Overloaded, match="hard limit"):
+        with governor.admit(LLM):
+            pass
+    assert governor.status()["memory_rejections"] == 1
+    assert in_use(governor) == 0
+
+
+def test_soft_watermark_sheds_caches_and_waits_for_memory():
+    memory = {"rss": 150 * MB}
+    governor = ResourceGovernor({LLM: 1}, memory_soft_bytes=100 * MB, memory_probe=lambda: memory["rss"],
+                                memory_check_interval=0.01)
+    governor.add_pressure_handler(lambda: memory.update(rss=80 * MB))
+
+    with governor.admit(LLM, timeout=1.0):
+        pass
+
+    assert memory["rss"] == 80 * MB
+    assert governor.status()["memory_deferrals"] == 1
+    assert governor.status()["memory_rejections"] == 0
+
+
+def test_soft_watermark_rejects_when_memory_stays_high():
+    governor = ResourceGovernor({LLM: 1}, memory_soft_bytes=100 * MB, memory_probe=lambda: 150 * MB,
+                                memory_check_interval=0.01)
+    governor.add_pressure_handler(lambda: None)
+
+    with pytest.raises(Overloaded, match="soft limit"):
+        with governor.admit(LLM, timeout=0.05):
+            pass
+    assert governor.status()["memory_rejections"] == 1
+
+
+def test_stream_holds_its_slot_until_exhausted():
+    governor = ResourceGovernor({LLM: 1})
+    stream = governor.stream(LLM, lambda: iter(["a", "b"]))
+
+    assert in_use(governor) == 0  # admitted lazily
+    assert next(stream) == "a"
+    assert in_use(governor) == 1
+    assert list(stream) == ["b"]
+    assert in_use(governor) == 0
+
+
+def test_abandoned_coalesced_stream_frees_its_slot():
+    governor = ResourceGovernor({LLM: 1})
+    closed = threading.Event()
+
+    def llm_tokens():
+        try:
+            while True:
+                time.sleep(0.001)
+                yield "token "
+        finally:
+            closed.set()
+
+    stream = StreamCoalescer(max_pending=4).wrap(governor.stream(LLM, llm_tokens))
+    assert next(stream) == "token "
+    assert in_use(governor) == 1
+
+    stream.close()
+
+    assert closed.wait(2.0)
+    assert wait_for(lambda: in_use(governor) == 0)
+    with governor.admit(LLM, timeout=0.1):
+        pass
+
+
+def test_abandoned_cached_answer_releases_its_slot_and_is_not_stored():
+    governor = ResourceGovernor({LLM: 1})
+    stored = []
+    assistant = SimpleNamespace(response_cache=SimpleNamespace(set_answer=lambda *args: stored.append(args)),
+                                _employee_scope=lambda: "E1")
+
+    stream = Assistant._cache_answer(assistant, governor.stream(LLM, lambda: iter(["a", "b", "c"])), "q")
+    assert next(stream) == "a"
+    stream.close()
+
+    assert in_use(governor) == 0
+    assert stored == []
@@ -0,0 +1,60 @@
+"""Tests for the multi-tenant index registry."""
+import pytest
+
+from src.utils.index_registry import IndexRegistry
+
+
+@pytest.fixture
+def registry(tmp_path, policy_pdf, embeddings):
+    registry = IndexRegistry(embeddings, embedding_model="test-model", chunk_size=200, chunk_overlap=20,
+                             refresh_interval=0)
+    registry.register("alpha", policy_pdf, str(tmp_path / "alpha"))
+    registry.register("beta", policy_pdf, str(tmp_path / "beta"))
+    return registry
+
+
+def test_indexes_load_lazily(registry):
+    assert registry.tenants() == ["alpha", "beta"]
+    assert registry.stats()["resident"] == []
+
+    vectorstore = registry.get("alpha")
+
+    assert vectorstore.index.ntotal > 1
+    assert registry.get("alpha") is vectorstore
+    assert registry.stats()["resident"] == ["alpha"]
+
+
+def test_unknown_tenant_raises(registry):
+    with pytest.raises(KeyError):
+        registry.get("gamma")
+
+
+def test_least_recently_used_index_is_evicted_over_budget(registry):
+    registry.get("alpha")
+    registry.memory_budget_bytes = registry.resident_bytes() + 1
+
+    registry.get("beta")
+
+    assert registry.stats()["resident"] == ["beta"]
+    assert registry.get("alpha").index.ntotal > 1
+    assert registry.stats()["resident"] == ["alpha"]
+
+
+def test_evicted_index_reloads_from_disk(registry):
+    first = registry.get("alpha")
+    version = registry.index_version("alpha")
+    registry.evict("alpha")
+
+    second = registry.get("alpha")
+
+    assert second is not first
+    assert second.index.ntotal == first.index.ntotal
+    assert registry.index_version("alpha") == version
+
+
+def test_trim_keeps_most_recently_used(registry):
+    registry.get("alpha")
+    registry.get("beta")
+    registry.get("alpha")
+    registry.trim(keep=1)
+    assert registry.stats()["resident"] == ["alpha"]
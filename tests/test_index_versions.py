@@ -0,0 +1,176 @@
+"""Tests for versioned index publishing and hot-swapping."""
+import os
+import threading
+import time
+
+import pytest
+
+from src.utils.index_registry import IndexRegistry
+from src.utils.index_versions import CURRENT_FILE, IndexVersionStore, build_index_version
+
+
+def build(policy_pdf, index_path, embeddings, model="test-model", **kwargs):
+    return build_index_version(policy_pdf, index_path, embeddings, model, chunk_size=200, chunk_overlap=20, **kwargs)
+
+
+def leftovers(root):
+    """Temp files and staging directories left behind by publishing."""
+    found = [name for name in os.listdir(root) if name.startswith(".")]
+    versions_dir = os.path.join(root, "versions")
+    if os.path.isdir(versions_dir):
+        found += [name for name in os.listdir(versions_dir) if name.startswith(".")]
+    return found
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def registry(tmp_path, policy_pdf, embeddings):
+    registry = IndexRegistry(embeddings, embedding_model="test-model", chunk_size=200, chunk_overlap=20,
+                             refresh_interval=0.01)
+    registry.register("alpha", policy_pdf, str(tmp_path / "alpha"))
+    return registry
+
+
+def test_publish_writes_a_complete_version_and_points_current_at_it(tmp_path, policy_pdf, embeddings):
+    root = str(tmp_path / "index")
+
+    version = build(policy_pdf, root, embeddings)
+
+    store = IndexVersionStore(root)
+    assert store.current() == version
+    assert store.versions() == [version]
+    assert os.path.exists(os.path.join(store.version_path(version), "index.faiss"))
+    manifest = store.manifest(version)
+    assert manifest["version"] == version and manifest["chunks"] > 0
+    assert leftovers(root) == []
+
+
+def test_rebuilding_unchanged_input_reuses_the_version(tmp_path, policy_pdf, embeddings):
+    root = str(tmp_path / "index")
+    first = build(policy_pdf, root, embeddings)
+    built_at = IndexVersionStore(root).manifest(first)["built_at"]
+
+    assert build(policy_pdf, root, embeddings) == first
+    assert IndexVersionStore(root).manifest(first)["built_at"] == built_at
+
+
+def test_failed_build_publishes_nothing(tmp_path):
+    store = IndexVersionStore(str(tmp_path))
+
+    def failing(directory):
+        open(os.path.join(directory, "index.faiss"), "w").close()
+        raise RuntimeError("embedding failed")
+
+    with pytest.raises(RuntimeError):
+        store.build("v1", failing)
+    assert store.versions() == []
+    assert leftovers(str(tmp_path)) == []
+
+
+def test_concurrent_builds_of_one_version_publish_once(tmp_path):
+    store = IndexVersionStore(str(tmp_path))
+    started = threading.Barrier(4)
+    results = []
+
+    def builder(directory):
+        started.wait()
+        with open(os.path.join(directory, "index.faiss"), "w") as f:
+            f.write(directory)
+        return {"chunks": 1}
+
+    threads = [threading.Thread(target=lambda: results.append(store.build("v1", builder))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [store.version_path("v1")] * 4
+    assert store.versions() == ["v1"]
+    assert leftovers(str(tmp_path)) == []
+
+
+def test_concurrent_pointer_switches_leave_a_valid_current(tmp_path):
+    store = IndexVersionStore(str(tmp_path))
+    for version in ("v1", "v2"):
+        store.build(version, lambda directory: {})
+
+    threads = [threading.Thread(target=store.set_current, args=(v,)) for v in ("v1", "v2") * 8]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.current() in ("v1", "v2")
+    assert sorted(os.listdir(str(tmp_path))) == [CURRENT_FILE, "versions"]
+    with pytest.raises(ValueError, match="Unknown index version"):
+        store.set_current("v3")
+
+
+def test_prune_never_removes_the_served_version(tmp_path):
+    store = IndexVersionStore(str(tmp_path))
+    for version in ("v1", "v2", "v3", "v4"):
+        store.build(version, lambda directory: {})
+        time.sleep(0.01)
+    store.set_current("v1")
+
+    removed = store.prune(keep=2)
+
+    assert removed == ["v2", "v3"]
+    assert store.versions() == ["v1", "v4"]
+
+
+def test_new_version_is_swapped_in_without_blocking_requests(tmp_path, policy_pdf, embeddings, registry):
+    first = registry.get("alpha")
+    old_version = registry.index_version("alpha")
+
+    new_version = build(policy_pdf, str(tmp_path / "alpha"), embeddings, model="other-model")
+    time.sleep(0.02)
+
+    assert registry.get("alpha") is first  # still serving while the new version loads
+    assert wait_for(lambda: registry.index_version("alpha") == new_version)
+    assert new_version != old_version
+    assert registry.get("alpha") is not first
+    assert registry.stats()["retired_pending"] == 0
+
+
+def test_leased_version_is_retired_after_the_last_lease(tmp_path, policy_pdf, embeddings, registry):
+    registry.get("alpha")
+    with registry.lease("alpha") as leased:
+        build(policy_pdf, str(tmp_path / "alpha"), embeddings, model="other-model")
+        time.sleep(0.02)
+        registry.get("alpha")
+        assert wait_for(lambda: registry.get("alpha") is not leased)
+        assert registry.stats()["retired_pending"] == 1
+        assert registry.stats()["active_leases"] == 1
+        assert leased.similarity_search("vacation days", k=1)
+
+    stats = registry.stats()
+    assert (stats["retired_pending"], stats["active_leases"]) == (0, 0)
+
+
+def test_evicting_a_leased_index_waits_for_the_lease(registry):
+    with registry.lease("alpha"):
+        registry.evict("alpha")
+        assert registry.stats()["retired_pending"] == 1
+
+    assert registry.stats()["retired_pending"] == 0
+    assert registry.stats()["resident"] == []
+
+
+def test_update_manifest_merges_fields(tmp_path):
+    store = IndexVersionStore(str(tmp_path))
+    store.build("v1", lambda directory: {"chunks": 3})
+
+    store.update_manifest("v1", faq_answers=5)
+
+    manifest = store.manifest("v1")
+    assert (manifest["chunks"], manifest["faq_answers"]) == (3, 5)
+    assert leftovers(str(tmp_path)) == [] and os.listdir(store.version_path("v1")) == ["manifest.json"]
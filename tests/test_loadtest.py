@@ -0,0 +1,65 @@
+"""Tests for the load-test harness and the fake streaming LLM."""
+from langchain_core.messages import HumanMessage
+
+from src.models.local_llm import FakeStreamingChatModel
+from src.utils.loadtest import LevelResult, find_saturation, format_report, run_level
+
+
+class EchoAssistant:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def get_response(self, question):
+        if question == self.fail_on:
+            raise RuntimeError("simulated failure")
+        yield "answer to "
+        yield question
+
+
+def test_run_level_counts_requests():
+    result = run_level(lambda employee, messages: EchoAssistant(), [{"name": "a"}], concurrency=4,
+                       questions_per_session=3)
+    assert result.requests == 12
+    assert result.errors == 0
+    assert len(result.latencies) == 12
+    assert result.throughput > 0
+
+
+def test_failed_requests_are_counted():
+    fail_on = "What's the dress code policy?"
+    result = run_level(lambda employee, messages: EchoAssistant(fail_on), [{}], concurrency=3,
+                       questions_per_session=5)
+    assert result.requests == 15
+    assert 0 < result.errors < 15
+
+
+def test_factory_failures_are_counted_as_errors():
+    def factory(employee, messages):
+        raise RuntimeError("index not loaded")
+
+    result = run_level(factory, [{}], concurrency=5, questions_per_session=2)
+    assert result.requests == 10
+    assert result.errors == 10
+    assert result.error_rate == 1.0
+
+
+def test_saturation_is_last_level_with_throughput_gain():
+    levels = []
+    for concurrency, requests, errors in [(1, 10, 0), (10, 50, 0), (50, 52, 0), (100, 60, 30)]:
+        levels.append(LevelResult(concurrency, requests=requests, errors=errors, seconds=1.0, latencies=[0.1]))
+    assert find_saturation(levels).concurrency == 10
+    assert "Saturation point: ~10" in format_report(levels)
+
+
+def test_percentile():
+    result = LevelResult(1)
+    assert result.percentile([], 95) == 0.0
+    assert result.percentile([3.0, 1.0, 2.0, 4.0], 50) in (2.0, 3.0)
+    assert result.percentile([3.0, 1.0, 2.0, 4.0], 100) == 4.0
+
+
+def test_fake_llm_streams_canned_response():
+    llm = FakeStreamingChatModel(response="one two three", first_token_latency=0, token_latency=0)
+    chunks = [chunk.content for chunk in llm.stream([HumanMessage(content="hi")])]
+    assert chunks == ["one", " two", " three"]
+    assert llm.invoke("hi").content == "one two three"
@@ -0,0 +1,74 @@
+"""Tests for queued logging and sampled structured events."""
+import importlib
+import json
+import logging
+import queue
+
+from src.utils.logger import DeferredQueueHandler, JsonFormatter, RequestContextFilter, log_event, request_context
+
+# `src.utils` re-exports the logger object under the module's name
+logger_module = importlib.import_module("src.utils.logger")
+
+
+def queued_logger(name):
+    records = queue.SimpleQueue()
+    log = logging.getLogger(name)
+    log.handlers = []
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(DeferredQueueHandler(records))
+    return log, records
+
+
+def test_args_are_rendered_before_queueing():
+    log, records = queued_logger("test.args")
+    items = ["a"]
+    log.info("items=%s", items)
+    items.append("b")
+
+    record = records.get_nowait()
+    assert record.getMessage() == "items=['a']"
+    assert record.args is None
+
+
+def test_exception_is_rendered_and_traceback_released():
+    log, records = queued_logger("test.exc")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.error("failed", exc_info=True)
+
+    record = records.get_nowait()
+    assert record.exc_info is None
+    assert "ValueError: boom" in record.exc_text
+    assert "ValueError: boom" in logging.Formatter().format(record)
+    assert json.loads(JsonFormatter().format(record))["exc"] == record.exc_text
+
+
+def test_plain_messages_are_queued_untouched():
+    log, records = queued_logger("test.plain")
+    log.info("ready")
+    record = records.get_nowait()
+    assert record.msg == "ready"
+
+
+def test_event_fields_and_request_id():
+    log, records = queued_logger("test.event")
+    log.handlers[0].addFilter(RequestContextFilter())
+    with request_context("req-1"):
+        log_event("search", log=log, k=4, hits=lambda: 2)
+
+    record = records.get_nowait()
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["msg"] == "search k=4 hits=2"
+    assert payload["hits"] == 2
+    assert payload["request_id"] == "req-1"
+
+
+def test_sampled_events_are_dropped_at_zero_rate(monkeypatch):
+    log, records = queued_logger("test.sampled")
+    monkeypatch.setattr(logger_module, "_sample_rate", 0.0)
+    log_event("hot", log=log, sampled=True)
+    log_event("cold", log=log)
+    assert records.get_nowait().msg.event == "cold"
+    assert records.empty()
@@ -0,0 +1,44 @@
+"""Tests for the prompt-layout prefix reuse measurement."""
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.data import generate_employee_data
+from src.utils.prompt_cache import PrefixCachingChatModel, common_prefix, format_report, measure_layout, tokenize
+from src.utils.vectorstore import create_vectorstore, load_pdf, split_documents
+
+
+@pytest.fixture
+def vector_store(policy_pdf, embeddings):
+    return create_vectorstore(split_documents(load_pdf(policy_pdf), chunk_size=200, chunk_overlap=20), embeddings)
+
+
+def test_common_prefix():
+    assert common_prefix([1, 2, 3], [1, 2, 4, 5]) == 2
+    assert common_prefix([1, 2], [1, 2, 3]) == 2
+    assert common_prefix([], [1]) == 0
+
+
+def test_model_reuses_the_longest_cached_prefix():
+    llm = PrefixCachingChatModel(first_token_latency=0.0, token_latency=0.0, prefill_per_token=0.0, slots=2)
+    system = SystemMessage(content="You are the onboarding assistant. " * 20)
+
+    llm.invoke([system, HumanMessage(content="When is payday?")])
+    llm.invoke([system, HumanMessage(content="Do I need PPE?")])
+
+    (first_total, first_reused), (second_total, second_reused) = llm.requests()
+    assert first_reused == 0
+    assert second_reused >= len(tokenize(system.content))
+    assert second_reused < second_total
+
+
+def test_prefix_layout_reuses_more_tokens_than_inline(vector_store):
+    employees = generate_employee_data(3)
+
+    inline = measure_layout("inline", vector_store, employees, prefill_per_token=0.0, slots=16)
+    prefix = measure_layout("prefix", vector_store, employees, prefill_per_token=0.0, slots=16)
+
+    assert inline["requests"] == prefix["requests"] == 9
+    assert prefix["avg_reused_tokens"] > inline["avg_reused_tokens"]
+    assert prefix["reuse_ratio"] > inline["reuse_ratio"]
+    report = format_report([inline, prefix]).splitlines()
+    assert report[2].startswith("inline") and report[3].startswith("prefix")
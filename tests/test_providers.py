@@ -0,0 +1,95 @@
+"""Tests for the hedged multi-provider chat model."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.local_llm import FakeStreamingChatModel
+from src.models.providers import HedgedChatModel, LLMProvider, ProviderHealth, create_fallback_llm
+
+
+def fake(response: str, first_token_latency: float = 0.0, error_rate: float = 0.0) -> FakeStreamingChatModel:
+    return FakeStreamingChatModel(response=response, first_token_latency=first_token_latency,
+                                  token_latency=0.0, error_rate=error_rate)
+
+
+def hedged(*providers, hedge_after: float = 0.05) -> HedgedChatModel:
+    return HedgedChatModel(providers=list(providers), hedge_after=hedge_after)
+
+
+def test_fast_primary_answers_without_hedging():
+    primary = LLMProvider("primary", fake("from primary"))
+    backup = LLMProvider("backup", fake("from backup"))
+
+    assert hedged(primary, backup).invoke("hi").content == "from primary"
+    assert primary.health.successes == 1
+    assert backup.health.snapshot()["successes"] == 0
+    assert primary.health.ttft_ewma is not None
+
+
+def test_slow_primary_is_hedged_and_loses():
+    primary = LLMProvider("primary", fake("from primary", first_token_latency=1.0))
+    backup = LLMProvider("backup", fake("from backup"))
+
+    start = time.perf_counter()
+    answer = hedged(primary, backup).invoke("hi").content
+
+    assert answer == "from backup"
+    assert time.perf_counter() - start < 0.9
+    assert backup.health.hedges_won == 1
+    assert primary.health.consecutive_failures == 1
+
+
+def test_failing_primary_fails_over_before_the_hedge_delay():
+    primary = LLMProvider("primary", fake("from primary", error_rate=1.0))
+    backup = LLMProvider("backup", fake("from backup"))
+
+    assert hedged(primary, backup, hedge_after=5.0).invoke("hi").content == "from backup"
+    assert primary.health.failures == 1
+
+
+def test_all_providers_failing_raises():
+    model = hedged(LLMProvider("a", fake("a", error_rate=1.0)), LLMProvider("b", fake("b", error_rate=1.0)))
+
+    with pytest.raises(RuntimeError, match="Simulated LLM failure"):
+        model.invoke("hi")
+
+
+def test_demoted_provider_is_tried_last_until_cooldown():
+    primary = LLMProvider("primary", fake("from primary"), max_failures=2, cooldown=60.0)
+    backup = LLMProvider("backup", fake("from backup"))
+    model = hedged(primary, backup)
+    primary.health.record_failure()
+    primary.health.record_failure()
+
+    assert not primary.healthy
+    assert [p.name for p in model.ordered_providers()] == ["backup", "primary"]
+    assert model.health()["primary"]["healthy"] is False
+
+    primary.health.last_failure -= 61.0
+    assert primary.healthy
+    assert [p.name for p in model.ordered_providers()] == ["primary", "backup"]
+
+
+def test_create_fallback_llm():
+    assert create_fallback_llm(SimpleNamespace(llm_fallback="none")) is None
+    assert isinstance(create_fallback_llm(SimpleNamespace(llm_fallback="fake")), FakeStreamingChatModel)
+
+
+def test_health_counters_are_not_lost_under_concurrency():
+    health = ProviderHealth()
+
+    def record():
+        for _ in range(1000):
+            health.record_hedge_won()
+            health.record_success()
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = health.snapshot()
+    assert (snapshot["hedges_won"], snapshot["successes"]) == (8000, 8000)
@@ -0,0 +1,101 @@
+"""Tests for follow-up query rewriting."""
+import threading
+
+import pytest
+
+from src.utils.query_rewrite import QueryRewriter
+
+EMPLOYEE = {"department": "Research & Development", "position": "Research Scientist", "location": "Raccoon City"}
+
+
+def history(*questions):
+    return [{"role": "user", "content": q} for q in questions]
+
+
+@pytest.mark.parametrize("previous, question", [
+    ("How many vacation days do I get?", "What about for my department?"),
+    ("What is the dress code in the labs?", "And in my office?"),
+    ("How do I report a security incident?", "Who do I send it to?"),
+    ("When is payday?", "Is that the same for contractors?"),
+    ("What PPE is required in the lab?", "Where do I get it?"),
+    ("Is there a gym on site?", "Can I park there?"),
+])
+def test_follow_ups_carry_the_previous_topic(previous, question):
+    rewriter = QueryRewriter()
+
+    query = rewriter.rewrite(question, history(previous), EMPLOYEE)
+
+    assert query != question
+    assert query.endswith(")")
+
+
+@pytest.mark.parametrize("question", [
+    "Is there a gym?",
+    "Parking?",
+    "So how do I reset my password?",
+    "Or can I work remotely?",
+    "What are the security clearance levels?",
+    "Which one of the health plans covers dental?",
+])
+def test_standalone_questions_are_left_alone(question):
+    rewriter = QueryRewriter()
+
+    assert rewriter.rewrite(question, history("How many vacation days do I get?"), EMPLOYEE) == question
+    assert rewriter.metrics.rewritten == 0
+
+
+def test_employee_references_are_resolved_without_history():
+    query = QueryRewriter().rewrite("Who is my manager?", [], dict(EMPLOYEE, supervisor="Albert Wesker"))
+
+    assert query == "Who is my supervisor Albert Wesker?"
+
+
+def test_rewrites_are_cached():
+    rewriter = QueryRewriter()
+    messages = history("When is payday?")
+
+    first = rewriter.rewrite("Is that the same for contractors?", messages, EMPLOYEE)
+
+    assert rewriter.rewrite("Is that the same for contractors?", messages, EMPLOYEE) == first
+    assert rewriter.metrics.cache_hits == 1
+
+
+class BlockingModel:
+    """Model whose calls wait until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        self.release.wait(5.0)
+        return "standalone query from the model"
+
+
+def test_fast_model_answer_is_used():
+    model = BlockingModel()
+    model.release.set()
+    rewriter = QueryRewriter(llm=model, budget_ms=1000)
+
+    assert rewriter.rewrite("Where do I get it?", history("What PPE is required?"), EMPLOYEE) == \
+        "standalone query from the model"
+    assert rewriter.metrics.model_used == 1
+
+
+def test_busy_model_is_skipped_instead_of_queued():
+    model = BlockingModel()
+    rewriter = QueryRewriter(llm=model, budget_ms=10, model_workers=2)
+    messages = history("What PPE is required?")
+
+    for question in ("Where do I get it?", "Who pays for it?", "Is that mandatory?"):
+        assert rewriter.rewrite(question, messages, EMPLOYEE) != question
+
+    assert model.calls == 2
+    snapshot = rewriter.metrics.snapshot()
+    assert (snapshot["over_budget"], snapshot["model_skipped"]) == (2, 1)
+
+    model.release.set()
+    rewriter._pool.shutdown(wait=True)
+    # Late answers are cached for the next time the follow-up comes up
+    assert rewriter.rewrite("Where do I get it?", messages, EMPLOYEE) == "standalone query from the model"
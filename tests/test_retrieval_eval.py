@@ -0,0 +1,63 @@
+"""Tests for the retrieval evaluation harness."""
+import json
+
+import pytest
+
+from src.utils.retrieval_eval import EvalConfig, evaluate_vectorstore, format_table, load_golden, run_sweep
+from src.utils.vectorstore import create_vectorstore, load_pdf, split_documents
+
+MODEL = "all-MiniLM-L6-v2"
+
+
+def chunk_golden(splits, shift: int = 0):
+    """Golden set asking for each chunk's own text on its own page (or a shifted one)."""
+    return [(doc.page_content, [doc.metadata["page"] + shift], str(i)) for i, doc in enumerate(splits)]
+
+
+@pytest.fixture
+def splits(policy_pdf):
+    return split_documents(load_pdf(policy_pdf), chunk_size=200, chunk_overlap=20)
+
+
+def test_exact_questions_are_found_first(splits, embeddings):
+    vectorstore = create_vectorstore(splits, embeddings)
+
+    scores = evaluate_vectorstore(vectorstore, chunk_golden(splits), ks=(1, 3))
+
+    assert scores["recall"] == {1: 1.0, 3: 1.0}
+    assert scores["mrr"] == 1.0
+    assert scores["per_query_qps"] > 0 and scores["batched_qps"] > 0
+
+
+def test_questions_answered_on_no_retrieved_page_score_zero(splits, embeddings):
+    vectorstore = create_vectorstore(splits, embeddings)
+
+    scores = evaluate_vectorstore(vectorstore, chunk_golden(splits, shift=100), ks=(1, 2))
+
+    assert scores["recall"] == {1: 0.0, 2: 0.0}
+    assert scores["mrr"] == 0.0
+
+
+def test_storage_labels():
+    assert EvalConfig(1000, 100, MODEL).storage == "f32"
+    assert EvalConfig(1000, 100, MODEL, pca_dim=64, quantization="int8", rescore_factor=4).storage == "pca64/int8+r4"
+
+
+def test_sweep_reports_each_configuration(policy_pdf, splits):
+    configs = [EvalConfig(200, 20, MODEL), EvalConfig(200, 20, MODEL, quantization="fp16")]
+
+    results = run_sweep(policy_pdf, configs, ks=(1, 2), golden=chunk_golden(splits))
+
+    assert [r.storage for r in results] == ["f32", "fp16"]
+    assert all(r.chunks == len(splits) for r in results)
+    assert results[1].vector_bytes_per_1k < results[0].vector_bytes_per_1k
+    table = format_table(results).splitlines()
+    assert len(table) == 4
+    assert "+0.000" in table[2]
+
+
+def test_load_golden(tmp_path):
+    path = tmp_path / "golden.json"
+    path.write_text(json.dumps([{"question": "When is payday?", "pages": [4]}]))
+
+    assert load_golden(str(path)) == [("When is payday?", [4], "")]
@@ -0,0 +1,54 @@
+"""Tests for the local scope classifier."""
+import pytest
+
+from src.utils.scope import HELD_OUT_QUESTIONS, LABELLED_QUESTIONS, ScopeClassifier, evaluate
+
+
+@pytest.mark.parametrize("question", [
+    "I need to see a doctor, can I take time off?",
+    "How do I get reimbursed for a doctor visit?",
+    "How do I solve a login problem with my laptop?",
+    "Is there a cafeteria or restaurant nearby?",
+    "Does our health insurance cover medication?",
+    "Hi there!",
+])
+def test_onboarding_questions_reach_the_llm(question):
+    assert ScopeClassifier().classify(question).in_scope
+
+
+@pytest.mark.parametrize("question, topic", [
+    ("What's the weather today?", "the weather"),
+    ("Should I buy bitcoin?", "financial advice"),
+    ("What are the symptoms of the flu?", "medical questions"),
+    ("Tell me a riddle", "general questions"),
+])
+def test_clearly_off_topic_questions_are_redirected(question, topic):
+    decision = ScopeClassifier().classify(question)
+    assert not decision.in_scope
+    assert decision.topic == topic
+    assert decision.resource
+
+
+def test_held_out_set_is_separate_from_development_set():
+    assert not {q for q, _ in HELD_OUT_QUESTIONS} & {q for q, _ in LABELLED_QUESTIONS}
+
+
+def test_no_false_rejections_on_held_out_set():
+    report = evaluate(ScopeClassifier())
+    assert report["questions"] == len(HELD_OUT_QUESTIONS)
+    assert report["false_rejections"] == 0
+    assert report["precision"] == 1.0
+    assert report["recall"] > 0.5
+
+
+def test_saving_is_an_estimate_unless_the_pipeline_is_timed():
+    estimated = evaluate(ScopeClassifier(), pipeline_seconds=2.0)
+    assert estimated["assumed_pipeline_seconds"] == 2.0
+    assert "seconds_saved" not in estimated
+
+    timed = []
+    measured = evaluate(ScopeClassifier(), pipeline=timed.append)
+
+    assert "estimated_seconds_saved" not in measured
+    assert len(timed) == round(measured["recall"] * sum(not in_scope for _, in_scope in HELD_OUT_QUESTIONS))
+    assert measured["pipeline_ms"] >= 0.0
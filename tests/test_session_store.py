@@ -0,0 +1,185 @@
+"""Tests for the chat session stores."""
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.session_store import (
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+    create_session_store,
+    is_session_id,
+    new_session_id,
+    owned_session_key,
+)
+from tests.fake_redis import FakeRedis
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("src.utils.session_store.time.time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_store(tmp_path, clock):
+    def make(kind, ttl=None, max_messages=500):
+        if kind == "memory":
+            return MemorySessionStore(ttl, max_messages)
+        if kind == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl, max_messages)
+        return RedisSessionStore(client=FakeRedis(clock=clock), ttl=ttl, max_messages=max_messages)
+
+    return make
+
+
+def message(i):
+    return {"role": "user" if i % 2 == 0 else "ai", "content": f"message {i}"}
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_recent_returns_the_latest_messages_in_order(make_store, kind):
+    store = make_store(kind)
+    store.append("s1", message(0))
+    store.append("s1", message(1), message(2))
+    store.append("s2", message(9))
+
+    assert store.recent("s1", 2) == [message(1), message(2)]
+    assert store.recent("s1", 10) == [message(0), message(1), message(2)]
+    assert store.recent("s1", 0) == []
+    assert store.count("s1") == 3
+    assert store.count("unknown") == 0 and store.recent("unknown", 5) == []
+
+    store.delete("s1")
+    assert store.count("s1") == 0
+    assert store.recent("s2", 5) == [message(9)]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_sessions_expire_after_the_ttl(make_store, clock, kind):
+    store = make_store(kind, ttl=60)
+    store.append("s1", message(0))
+
+    clock.now += 59
+    assert store.count("s1") == 1
+    clock.now += 2
+    assert store.count("s1") == 0
+    assert store.recent("s1", 5) == []
+
+    store.append("s1", message(1))
+    assert store.recent("s1", 5) == [message(1)]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_each_message_refreshes_the_ttl(make_store, clock, kind):
+    store = make_store(kind, ttl=60)
+    store.append("s1", message(0))
+    clock.now += 50
+    store.append("s1", message(1))
+    clock.now += 50
+
+    assert store.recent("s1", 5) == [message(0), message(1)]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_oldest_messages_are_dropped_beyond_the_cap(make_store, kind):
+    store = make_store(kind, max_messages=3)
+    for i in range(5):
+        store.append("s1", message(i))
+    store.append("s1", message(5), message(6))
+
+    assert store.count("s1") == 3
+    assert store.recent("s1", 10) == [message(4), message(5), message(6)]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_byte_cap_keeps_at_least_the_newest_message(tmp_path, kind):
+    big = {"role": "ai", "content": "x" * 100}
+    if kind == "memory":
+        store = MemorySessionStore(max_bytes=300)
+    elif kind == "sqlite":
+        store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), max_bytes=300)
+    else:
+        store = RedisSessionStore(client=FakeRedis(), max_bytes=300)
+    for _ in range(4):
+        store.append("s1", big)
+
+    assert store.count("s1") == 2
+    store.append("s1", {"role": "ai", "content": "y" * 1000})
+    assert store.recent("s1", 5) == [{"role": "ai", "content": "y" * 1000}]
+
+
+def test_memory_store_drops_least_recently_active_sessions():
+    store = MemorySessionStore(max_sessions=2)
+    store.append("a", message(0))
+    store.append("b", message(0))
+    store.append("a", message(1))
+    store.append("c", message(0))
+
+    assert (store.count("a"), store.count("b"), store.count("c")) == (2, 0, 1)
+
+
+def test_sqlite_store_survives_reopening(tmp_path, clock):
+    path = str(tmp_path / "sessions.sqlite3")
+    SQLiteSessionStore(path, ttl=60).append("s1", message(0), message(1))
+
+    reopened = SQLiteSessionStore(path, ttl=60)
+
+    assert reopened.recent("s1", 5) == [message(0), message(1)]
+
+
+def test_sqlite_purge_deletes_expired_rows(tmp_path, clock):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=60, purge_interval=0)
+    store.append("old", message(0))
+    clock.now += 61
+    store.append("new", message(1))
+
+    assert store._conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = 'old'").fetchone()[0] == 0
+
+
+def test_redis_keys_carry_the_ttl(clock):
+    client = FakeRedis(clock=clock)
+    RedisSessionStore(client=client, ttl=60).append("s1", message(0))
+
+    assert 0 < client.pttl("onboard:session:s1") <= 60_000
+    assert 0 < client.pttl("onboard:session:s1:sizes") <= 60_000
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_session_keys_are_scoped_to_their_owner():
+    session_id = new_session_id()
+
+    assert is_session_id(session_id)
+    assert not is_session_id("../other") and not is_session_id(None) and not is_session_id(session_id.upper())
+    assert owned_session_key("alice@example.com", session_id) == owned_session_key("alice@example.com", session_id)
+    assert owned_session_key("alice@example.com", session_id) != owned_session_key("bob@example.com", session_id)
+    assert "alice" not in owned_session_key("alice@example.com", session_id)
+
+
+def test_create_session_store(tmp_path):
+    settings = SimpleNamespace(session_backend="memory", session_ttl_seconds=0, session_max_messages=10,
+                               session_max_bytes=1000, session_max_sessions=5,
+                               session_path=str(tmp_path / "s.sqlite3"))
+
+    assert isinstance(create_session_store(settings), MemorySessionStore)
+    settings.session_backend = "sqlite"
+    assert isinstance(create_session_store(settings), SQLiteSessionStore)
+    settings.session_backend = "mongo"
+    with pytest.raises(ValueError, match="Unknown session backend"):
+        create_session_store(settings)
@@ -0,0 +1,94 @@
+"""Tests for the stream coalescer."""
+import threading
+import time
+
+import pytest
+
+from src.utils.streaming import StreamCoalescer
+
+
+def tokens(n: int, delay: float = 0.0):
+    for i in range(n):
+        if delay:
+            time.sleep(delay)
+        yield f"t{i} "
+
+
+def test_first_chunk_passes_through_and_rest_is_coalesced():
+    coalescer = StreamCoalescer(max_chars=20, max_interval_ms=1000)
+
+    out = list(coalescer.wrap(tokens(30)))
+
+    assert out[0] == "t0 "
+    assert "".join(out) == "".join(tokens(30))
+    assert len(out) < 30
+    assert coalescer.metrics.snapshot()["chunks_in"] == 30
+
+
+def test_buffered_text_is_flushed_while_the_source_stalls():
+    def stalling():
+        yield "a"
+        yield "b"
+        time.sleep(0.5)
+        yield "c"
+
+    coalescer = StreamCoalescer(max_chars=1000, max_interval_ms=20)
+    stream = coalescer.wrap(stalling())
+    start = time.monotonic()
+
+    assert next(stream) == "a"
+    assert next(stream) == "b"
+    assert time.monotonic() - start < 0.3
+    assert list(stream) == ["c"]
+
+
+def test_source_errors_are_raised_after_buffered_text():
+    def failing():
+        yield "a"
+        yield "b"
+        raise ValueError("boom")
+
+    stream = StreamCoalescer(max_chars=1000, max_interval_ms=1000).wrap(failing())
+
+    assert next(stream) == "a"
+    assert next(stream) == "b"
+    with pytest.raises(ValueError, match="boom"):
+        next(stream)
+
+
+def test_reader_stays_bounded_behind_a_slow_consumer():
+    produced = []
+
+    def source():
+        for i in range(1000):
+            produced.append(i)
+            yield "x"
+
+    stream = StreamCoalescer(max_pending=8).wrap(source())
+    next(stream)
+    time.sleep(0.2)
+
+    assert len(produced) <= 8 + 2
+    stream.close()
+
+
+def test_abandoned_stream_closes_its_source():
+    closed = threading.Event()
+    produced = []
+
+    def source():
+        try:
+            for chunk in tokens(10000, delay=0.001):
+                produced.append(chunk)
+                yield chunk
+        finally:
+            closed.set()
+
+    stream = StreamCoalescer(max_pending=4).wrap(source())
+    next(stream)
+    stream.close()
+
+    assert closed.wait(2.0)
+    count = len(produced)
+    time.sleep(0.05)
+    assert len(produced) == count < 10000
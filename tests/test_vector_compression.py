@@ -0,0 +1,99 @@
+"""Tests for PCA-reduced and quantized indexes with exact re-scoring."""
+import numpy as np
+import pytest
+
+from src.utils.vectorstore import (
+    CompressedFAISS,
+    build_faiss_index,
+    create_vectorstore,
+    load_pdf,
+    search_vectors,
+    split_documents,
+)
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((400, 64)).astype("float32")
+
+
+@pytest.fixture
+def splits(policy_pdf):
+    return split_documents(load_pdf(policy_pdf), chunk_size=200, chunk_overlap=20)
+
+
+@pytest.mark.parametrize("pca_dim, quantization, code_size", [
+    (0, "none", 64 * 4),
+    (0, "fp16", 64 * 2),
+    (0, "int8", 64),
+    (16, "int8", 16),
+])
+def test_index_code_size(vectors, pca_dim, quantization, code_size):
+    index = build_faiss_index(vectors, pca_dim=pca_dim, quantization=quantization)
+
+    assert index.ntotal == len(vectors)
+    assert index.sa_code_size() == code_size
+
+
+def test_pca_is_capped_by_the_number_of_vectors(vectors):
+    index = build_faiss_index(vectors[:5], pca_dim=16, quantization="int8")
+
+    assert index.sa_code_size() == 5
+
+
+def test_compressed_index_takes_full_dimension_queries(vectors):
+    index = build_faiss_index(vectors, pca_dim=16, quantization="fp16")
+
+    _, positions = index.search(vectors[:5], 10)
+
+    assert positions.shape == (5, 10)
+    assert all(i in row for i, row in enumerate(positions))
+
+
+def test_unknown_quantization_is_rejected(vectors):
+    with pytest.raises(ValueError, match="Unknown quantization"):
+        build_faiss_index(vectors, quantization="int4")
+
+
+def test_options_select_the_store_class(splits, embeddings):
+    assert not isinstance(create_vectorstore(splits, embeddings), CompressedFAISS)
+
+    store = create_vectorstore(splits, embeddings, quantization="int8", rescore_factor=3)
+
+    assert isinstance(store, CompressedFAISS)
+    assert store.rescore_factor == 3
+    assert store.index.sa_code_size() == len(embeddings.embed_query("x"))
+
+
+def test_rescoring_restores_exact_ranking(splits, embeddings):
+    flat = create_vectorstore(splits, embeddings)
+    compressed = create_vectorstore(splits, embeddings, quantization="int8", rescore_factor=4)
+    question = splits[3].page_content
+
+    expected = [doc.page_content for doc in flat.similarity_search(question, k=3)]
+    rescored = compressed.similarity_search_with_score(question, k=3)
+
+    assert [doc.page_content for doc, _ in rescored] == expected
+    assert rescored[0][1] == pytest.approx(0.0, abs=1e-4)
+    assert [score for _, score in rescored] == sorted(score for _, score in rescored)
+
+
+def test_batched_search_matches_per_query_rescoring(splits, embeddings):
+    compressed = create_vectorstore(splits, embeddings, pca_dim=8, quantization="int8", rescore_factor=4)
+    questions = [doc.page_content for doc in splits[:4]]
+
+    results = search_vectors(compressed, embeddings.embed_documents(questions), k=2)
+
+    for row, question in enumerate(questions):
+        expected = [doc.page_content for doc in compressed.similarity_search(question, k=2)]
+        assert [doc.page_content for doc in results.documents(row)] == expected
+    assert np.all(np.diff(results.scores, axis=1) >= 0)
+
+
+def test_search_pads_when_fewer_hits_than_k(splits, embeddings):
+    compressed = create_vectorstore(splits[:2], embeddings, quantization="fp16", rescore_factor=2)
+
+    results = search_vectors(compressed, embeddings.embed_documents([splits[0].page_content]), k=4)
+
+    assert len(results.documents(0)) == 2
+    assert results.ids(0) == [compressed.index_to_docstore_id[int(p)] for p in results.positions[0] if p != -1]